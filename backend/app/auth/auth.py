@@ -1,39 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_db, create_access_token
 from app.models.models import User
-from passlib.context import CryptContext
+from app.auth.hashing import verify_password, get_password_hash
 from app.auth.schemas import UserCreate, Token
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
+# Hashing runs on the dedicated hashing executor so it never blocks the event loop
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.username == form_data.username))
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await verify_password(form_data.password, user.hashed_password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     access_token = create_access_token(data={"sub": user.username})
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/users", response_model=dict)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.username == user.username).first()
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     new_user = User(
         username=user.username,
         hashed_password=hashed_password,
@@ -42,6 +42,5 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
         is_active=True
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return {"message": "User created successfully"}
\ No newline at end of file
+    await db.commit()
+    return {"message": "User created successfully"}
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# bcrypt cost factor. Hashes made with any other cost are upgraded on the next
+# successful login.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+# bcrypt releases the GIL, so one thread per core keeps every core busy without
+# touching the AnyIO threadpool shared by the sync endpoints
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# Hash jobs allowed to run or wait at once; anything beyond is rejected with 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=PASSWORD_HASH_ROUNDS,
+    bcrypt__max_rounds=PASSWORD_HASH_ROUNDS,
+)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending = 0
+_pending_lock = threading.Lock()
+
+async def _run(fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+# Returns (is_valid, new_hash); new_hash is set when the stored hash should be
+# replaced because the configured cost factor changed
+async def verify_password(plain_password, hashed_password):
+    return await _run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash(password):
+    return await _run(pwd_context.hash, password)
+
+def shutdown_hashing():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -15,4 +16,15 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    username: str
\ No newline at end of file
+    username: str
+
+# Authenticated user as seen by the API, detached from any database session
+class Principal(BaseModel):
+    id: int
+    username: str
+    descript: Optional[str] = None
+    is_active: bool
+    role_name: str
+
+    class Config:
+        allow_mutation = False
\ No newline at end of file
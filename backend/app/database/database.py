@@ -1,21 +1,50 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.database.pool import pool_options, pool_status
+from app.services.instrumentation import instrument_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import configparser
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# database.ini is only a fallback for running outside docker-compose, which
+# sets DATABASE_URL
+def _url_from_ini():
+    path = os.path.join(os.path.dirname(__file__), "database.ini")
+    config = configparser.ConfigParser()
+    if not config.read(path) or "postgresql" not in config:
+        raise RuntimeError(f"DATABASE_URL is not set and {path} has no [postgresql] section")
+    db_config = config["postgresql"]
+    return f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}"
 
-# Read database configuration from database.ini
-config = configparser.ConfigParser()
-config.read("app/database/database.ini")
-db_config = config["postgresql"]
+DATABASE_URL = os.getenv("DATABASE_URL") or _url_from_ini()
 
-# Construct DATABASE_URL if not using .env
-DATABASE_URL = os.getenv("DATABASE_URL", f"postgresql://{db_config['user']}:{db_config['password']}@{db_config['host']}:{db_config['port']}/{db_config['database']}")
-
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async driver for the same database, used by the API request path
+def _async_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, use_async=True))
+# Objects stay loaded after commit so handlers can read them without implicit IO
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Statement counts and timings per request, slow-query log and /metrics
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+# Occupancy and wait statistics of both pools, by engine name
+def pool_statuses():
+    return {"async": pool_status(async_engine.sync_engine), "sync": pool_status(engine)}
+
 Base = declarative_base()
\ No newline at end of file
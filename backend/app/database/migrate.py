@@ -0,0 +1,86 @@
+import argparse
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from app.database import migrations
+
+# Applied versions, one row per migration module
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Any constant works; it only has to be the same in every process
+_ADVISORY_LOCK_ID = 4_201_776
+
+# Migration modules are named NNNN_description.py and expose upgrade(conn)
+def discover():
+    found = []
+    for module in pkgutil.iter_modules(migrations.__path__):
+        match = re.match(r"^(\d+)_(\w+)$", module.name)
+        if match:
+            found.append((int(match.group(1)), module.name))
+    found.sort()
+    versions = [version for version, _ in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {migrations.__name__}")
+    return found
+
+def applied_versions(conn: Connection):
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.scalars(select(schema_migrations.c.version)))
+
+def pending(conn: Connection):
+    applied = applied_versions(conn)
+    return [(version, name) for version, name in discover() if version not in applied]
+
+# Applies every pending migration in its own transaction. On PostgreSQL an
+# advisory lock serialises concurrent workers starting at the same time.
+def upgrade(engine: Engine):
+    applied = []
+    with engine.connect() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _ADVISORY_LOCK_ID})
+            conn.commit()
+        try:
+            with conn.begin():
+                schema_migrations.create(conn, checkfirst=True)
+                todo = pending(conn)
+            for version, name in todo:
+                module = importlib.import_module(f"{migrations.__name__}.{name}")
+                with conn.begin():
+                    module.upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=version, name=name, applied_at=datetime.utcnow()
+                    ))
+                applied.append(name)
+        finally:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _ADVISORY_LOCK_ID})
+                conn.commit()
+    return applied
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply or list schema migrations.")
+    parser.add_argument("--status", action="store_true", help="list pending migrations without applying them")
+    args = parser.parse_args()
+
+    from app.database.database import engine
+    if args.status:
+        with engine.connect() as conn:
+            names = [name for _, name in pending(conn)]
+        print("\n".join(names) if names else "up to date")
+        return
+    names = upgrade(engine)
+    print("\n".join(f"applied {name}" for name in names) if names else "up to date")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, Integer, MetaData, String, Table, Text
+from sqlalchemy.engine import Connection
+
+# The schema as it stood before versioned migrations, the same tables as
+# database/init.sql. Frozen here rather than taken from app.models, so a
+# fresh database replays exactly the history an existing one went through;
+# changes to it belong in a later migration.
+metadata = MetaData()
+
+def _timestamps():
+    return Column("created_at", DateTime), Column("updated_at", DateTime)
+
+def _id():
+    return Column("id", Integer, primary_key=True, index=True)
+
+Table(
+    "roles", metadata, _id(),
+    Column("role_name", String, unique=True, nullable=False),
+    Column("descript", String),
+    *_timestamps(),
+)
+Table(
+    "users", metadata, _id(),
+    Column("username", String, unique=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("descript", String),
+    Column("is_active", Boolean),
+    Column("role_id", Integer, ForeignKey("roles.id"), nullable=False),
+    *_timestamps(),
+)
+Table(
+    "address", metadata, _id(),
+    Column("line1", String),
+    Column("line2", String),
+    Column("line3", String),
+    Column("postalcode", String),
+    Column("town", String),
+    Column("state", String),
+    Column("country", String),
+    *_timestamps(),
+)
+Table(
+    "driving_license", metadata, _id(),
+    Column("driving_license_ame", String, unique=True, nullable=False),
+    Column("descript", String),
+    *_timestamps(),
+)
+for name in ("employee_function", "employee_status"):
+    Table(
+        name, metadata, _id(),
+        Column("name", String, unique=True, nullable=False),
+        Column("descript", String),
+        *_timestamps(),
+    )
+Table(
+    "insurance", metadata, _id(),
+    Column("insurance_ref", String, unique=True, nullable=False),
+    Column("insurance_company", String),
+    Column("descript", String),
+    *_timestamps(),
+)
+Table(
+    "orders_status", metadata, _id(),
+    Column("orde_status_name", String, unique=True, nullable=False),
+    Column("descript", String),
+    *_timestamps(),
+)
+Table(
+    "vehicle_status", metadata, _id(),
+    Column("vehicle_status_name", String, unique=True, nullable=False),
+    Column("descript", String),
+    *_timestamps(),
+)
+Table(
+    "vehicle_type", metadata, _id(),
+    Column("vehicle_type_name", String, unique=True, nullable=False),
+    Column("descript", String),
+    *_timestamps(),
+)
+Table(
+    "customer", metadata, _id(),
+    Column("customer_name", String, unique=True),
+    Column("address_id", Integer, ForeignKey("address.id")),
+    Column("customer_type", String),
+    Column("phone_number", String),
+    Column("email", String),
+    *_timestamps(),
+)
+Table(
+    "employees", metadata, _id(),
+    Column("firstname", String, nullable=False),
+    Column("lastname", String, nullable=False),
+    Column("email", String, unique=True, nullable=False),
+    Column("birth_date", Date),
+    Column("hire_date", Date),
+    Column("function_id", Integer, ForeignKey("employee_function.id")),
+    Column("status_id", Integer, ForeignKey("employee_status.id")),
+    Column("line1", String),
+    Column("line2", String),
+    Column("line3", String),
+    Column("postalcode", String),
+    Column("town", String),
+    Column("state", String),
+    Column("country", String),
+    Column("license_id", Integer, ForeignKey("driving_license.id")),
+    Column("photo_file", String),
+    *_timestamps(),
+)
+Table(
+    "orders", metadata, _id(),
+    Column("order_name", String, unique=True),
+    Column("order_number", Integer, unique=True),
+    Column("customer_id", Integer, ForeignKey("customer.id")),
+    Column("delivery_address", Integer, ForeignKey("address.id")),
+    Column("order_date", Date),
+    Column("required_date", Date),
+    Column("delivery_date", Date),
+    Column("status_id", Integer, ForeignKey("orders_status.id")),
+    Column("weight_kg", Float),
+    Column("volume_litre", Float),
+    *_timestamps(),
+    Column("notes", Text),
+)
+Table(
+    "supplier", metadata, _id(),
+    Column("supplier_name", String, unique=True),
+    Column("address_id", Integer, ForeignKey("address.id")),
+    Column("supplier_type", String),
+    Column("phone_number", String),
+    Column("email", String),
+    *_timestamps(),
+)
+Table(
+    "vehicles", metadata, _id(),
+    Column("license_plate", String, unique=True, nullable=False),
+    Column("make", String, nullable=False),
+    Column("model", String, nullable=False),
+    Column("color", String),
+    Column("type_id", Integer, ForeignKey("vehicle_type.id")),
+    Column("status_id", Integer, ForeignKey("vehicle_status.id")),
+    Column("insurance_id", Integer, ForeignKey("insurance.id")),
+    Column("capacity_kg", Float),
+    Column("volume_litre", Float),
+    Column("photo_file", String),
+    *_timestamps(),
+)
+Table(
+    "warehouse", metadata, _id(),
+    Column("warehouse_name", String, unique=True),
+    Column("address_id", Integer, ForeignKey("address.id")),
+    *_timestamps(),
+)
+Table(
+    "vehicle_assign", metadata, _id(),
+    Column("employee_id", Integer, ForeignKey("employees.id")),
+    Column("vehicle_id", Integer, ForeignKey("vehicles.id")),
+    *_timestamps(),
+    Column("end_date", DateTime),
+)
+Table(
+    "upload_blob", metadata, _id(),
+    Column("file_name", String, unique=True, nullable=False),
+    Column("size_bytes", Integer),
+    Column("ref_count", Integer, nullable=False, server_default="0"),
+    *_timestamps(),
+)
+Table(
+    "delivery", metadata, _id(),
+    Column("delivery_name", String, unique=True),
+    Column("order_id", Integer),
+    *_timestamps(),
+    Column("employee_id", Integer, ForeignKey("employees.id")),
+    Column("notes", Text),
+)
+
+# Tables created by database/init.sql are kept as they are
+def upgrade(conn: Connection):
+    metadata.create_all(conn, checkfirst=True)
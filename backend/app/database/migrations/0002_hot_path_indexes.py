@@ -0,0 +1,33 @@
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_vehicle_assign_vehicle_id ON vehicle_assign (vehicle_id)",
+    "CREATE INDEX IF NOT EXISTS ix_vehicle_assign_employee_id ON vehicle_assign (employee_id)",
+    "CREATE INDEX IF NOT EXISTS ix_vehicle_assign_updated_at ON vehicle_assign (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_employees_status_id ON employees (status_id)",
+    "CREATE INDEX IF NOT EXISTS ix_employees_updated_at ON employees (updated_at)",
+    "CREATE INDEX IF NOT EXISTS ix_vehicles_status_id ON vehicles (status_id)",
+    "CREATE INDEX IF NOT EXISTS ix_vehicles_updated_at ON vehicles (updated_at)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_vehicle_assign_active_vehicle "
+    "ON vehicle_assign (vehicle_id) WHERE end_date IS NULL",
+)
+
+# Legacy data can hold several active assignments for one vehicle. The
+# earliest one is kept, matching what the employee list displays, and the
+# others are closed so the partial unique index can be built.
+CLOSE_DUPLICATE_ACTIVE = text("""
+    UPDATE vehicle_assign SET end_date = :now, updated_at = :now
+    WHERE end_date IS NULL
+      AND id NOT IN (
+          SELECT min(id) FROM vehicle_assign WHERE end_date IS NULL GROUP BY vehicle_id
+      )
+""")
+
+def upgrade(conn: Connection):
+    conn.execute(CLOSE_DUPLICATE_ACTIVE, {"now": datetime.utcnow()})
+    for statement in INDEXES:
+        conn.execute(text(statement))
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ANALYZE vehicle_assign, employees, vehicles"))
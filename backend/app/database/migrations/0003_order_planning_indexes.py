@@ -0,0 +1,11 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_orders_required_date ON orders (required_date)",
+    "CREATE INDEX IF NOT EXISTS ix_orders_order_status_id ON orders (status_id)",
+)
+
+def upgrade(conn: Connection):
+    for statement in INDEXES:
+        conn.execute(text(statement))
@@ -0,0 +1,12 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+COLUMNS = {"latitude": "FLOAT", "longitude": "FLOAT"}
+
+# Databases migrated before the baseline was frozen got the columns from
+# create_all already
+def upgrade(conn: Connection):
+    existing = {column["name"] for column in inspect(conn).get_columns("address")}
+    for name, sql_type in COLUMNS.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE address ADD COLUMN {name} {sql_type}"))
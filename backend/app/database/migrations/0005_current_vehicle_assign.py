@@ -0,0 +1,28 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# No serial column, so the same DDL works on PostgreSQL and SQLite
+STATEMENTS = (
+    """
+    CREATE TABLE IF NOT EXISTS current_vehicle_assign (
+        vehicle_id INTEGER NOT NULL PRIMARY KEY REFERENCES vehicles (id),
+        employee_id INTEGER NOT NULL REFERENCES employees (id),
+        assign_id INTEGER NOT NULL UNIQUE REFERENCES vehicle_assign (id),
+        assigned_at TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_current_vehicle_assign_employee_id ON current_vehicle_assign (employee_id)",
+)
+
+# One row per vehicle: 0002 already closed duplicate active assignments
+BACKFILL = text("""
+    INSERT INTO current_vehicle_assign (vehicle_id, employee_id, assign_id, assigned_at)
+    SELECT vehicle_id, employee_id, id, created_at FROM vehicle_assign
+    WHERE end_date IS NULL AND vehicle_id IS NOT NULL AND employee_id IS NOT NULL
+      AND vehicle_id NOT IN (SELECT vehicle_id FROM current_vehicle_assign)
+""")
+
+def upgrade(conn: Connection):
+    for statement in STATEMENTS:
+        conn.execute(text(statement))
+    conn.execute(BACKFILL)
@@ -0,0 +1,14 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Rows are created by the first commit that changes each table
+CREATE = text("""
+    CREATE TABLE IF NOT EXISTS table_version (
+        table_name VARCHAR NOT NULL PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP
+    )
+""")
+
+def upgrade(conn: Connection):
+    conn.execute(CREATE)
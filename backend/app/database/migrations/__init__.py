@@ -0,0 +1,8 @@
+# Versioned schema migrations, applied in order by app.database.migrate.
+#
+# The baseline is the frozen pre-migration schema (database/init.sql) and
+# every later change is a migration with its own DDL; none of them import
+# app.models, whose tables describe the schema after the last migration.
+# Databases migrated while the baseline still ran create_all on the models
+# already have later tables, columns and indexes, so migrations must be
+# idempotent (IF NOT EXISTS, inspector checks).
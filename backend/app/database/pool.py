@@ -0,0 +1,84 @@
+import os
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.services.metrics import Histogram
+from app.services.instrumentation import record_pool_wait
+
+class PoolStats:
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.checkouts = 0
+        self.timeouts = 0
+
+# Time spent in Pool.connect(): waiting for a free connection, opening a new
+# one on overflow, and the pre-ping
+class _InstrumentedMixin:
+    stats: PoolStats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.checkout_wait.observe(elapsed)
+            record_pool_wait(elapsed)
+        self.stats.checkouts += 1
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+class InstrumentedAsyncQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+# create_engine() keyword arguments for the configured pool, shared by the sync
+# and async engines. Each uvicorn worker owns its own pools, so the database
+# sees up to workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections per engine.
+# SQLite keeps the dialect's default pool, which does not take sizing options.
+def pool_options(url, use_async=False):
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+def pool_status(engine):
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update({
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "checkout_wait_seconds": stats.checkout_wait.snapshot(),
+        })
+    return status
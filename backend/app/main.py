@@ -1,11 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routes import user, role, employees, vehicles
+from app.routes import user, role, employees, vehicles, orders, routing, dashboard, events, exports, monitoring, health, metrics
 from app.auth import auth
-from app.database.database import engine
-from app.models import models
+from app.auth.hashing import shutdown_hashing
+from app.middleware import CompressionMiddleware, MetricsMiddleware, ProfilingMiddleware
+from app.database.database import engine, async_engine, pool_statuses
+from app.services.images import shutdown_images
+from app.services.instrumentation import start_metrics_writer, stop_metrics_writer
+from app.services.invalidation import start_invalidation_listener, stop_invalidation_listener
+from app.services.route_planning import shutdown_routing
+from app.services.warmup import warm_up
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# Importing the app does no I/O. Migrations and cache warm-up run in the
+# background once the server starts; /health/ready reports when they are done.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warm_up_task = asyncio.create_task(warm_up())
+    start_invalidation_listener()
+    start_metrics_writer(pool_statuses)
+    yield
+    warm_up_task.cancel()
+    stop_invalidation_listener()
+    stop_metrics_writer(pool_statuses)
+    shutdown_hashing()
+    shutdown_images()
+    shutdown_routing()
+    await async_engine.dispose()
+    engine.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS configuration
 app.add_middleware(
@@ -14,10 +39,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Brotli/gzip for JSON, CSV and NDJSON bodies above COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+# On-demand and sampled request profiles, compression included
+app.add_middleware(ProfilingMiddleware)
+
+# Per-route latency and SQL metrics, exported on /metrics
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(user.router, prefix="/api")
@@ -25,6 +57,14 @@ app.include_router(role.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
 app.include_router(employees.router, prefix="/api")
 app.include_router(vehicles.router, prefix="/api")
+app.include_router(orders.router, prefix="/api")
+app.include_router(routing.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
+app.include_router(events.router, prefix="/api")
+app.include_router(exports.router, prefix="/api")
+app.include_router(monitoring.router, prefix="/api")
+app.include_router(health.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
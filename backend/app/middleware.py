@@ -0,0 +1,191 @@
+import os
+import time
+import zlib
+import brotli
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.dependencies import get_current_user
+from app.services.instrumentation import current_request_stats, end_request, record_request, route_template, start_request
+from app.services.profiling import finish_profile, should_sample, start_profile
+
+# Bodies smaller than this are sent as they are; the headers would eat the gain
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Levels tuned for dynamic responses: most of the ratio for little CPU
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+# Photos and other binary payloads are already compressed
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript", "application/xml")
+# Event streams stay plain: one compressor per long-lived, mostly idle
+# connection costs hundreds of KB for a few bytes of events
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+class _Gzip:
+    def __init__(self):
+        self._stream = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes):
+        return self._stream.compress(data) + self._stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes):
+        return self._stream.compress(data) + self._stream.flush()
+
+class _Brotli:
+    def __init__(self):
+        self._stream = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes):
+        return self._stream.process(data) + self._stream.flush()
+
+    def finish(self, data: bytes):
+        return self._stream.process(data) + self._stream.finish()
+
+# Preference order when the client accepts several
+ENCODERS = {"br": _Brotli, "gzip": _Gzip}
+
+# First encoding of ENCODERS the Accept-Encoding header allows (q > 0)
+def choose_encoding(accept_encoding: str):
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if float(q or 1) > 0:
+                accepted.add(name.strip().lower())
+        except ValueError:
+            continue
+    for encoding in ENCODERS:
+        if encoding in accepted:
+            return encoding
+    return None
+
+# Brotli or gzip compression of text responses, streamed ones included (each
+# chunk is flushed so NDJSON exports still arrive progressively). Like
+# Starlette's GZipMiddleware, but with brotli and a content-type filter.
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        # None until the first body chunk decides, False when passing through
+        encoder = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSED_TYPES)
+                if compressible:
+                    headers.add_vary_header("Accept-Encoding")
+                if (
+                    not compressible
+                    or "content-encoding" in headers
+                    or start["status"] in (204, 206, 304)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    encoder = False
+                else:
+                    encoder = ENCODERS[encoding]()
+                    headers["Content-Encoding"] = encoding
+                    del headers["Content-Length"]
+                    if not more_body:
+                        body = encoder.finish(body)
+                        headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+                        encoder = False
+                    else:
+                        message = {**message, "body": encoder.compress(body)}
+                await send(start)
+            elif encoder:
+                message = {**message, "body": encoder.compress(body) if more_body else encoder.finish(body)}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+# Latency, status and the SQL run on the request's behalf, per method and
+# route template. Added last so its timing covers the other middleware.
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_request(scope)
+        stats = current_request_stats()
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            end_request(token)
+            record_request(scope["method"], route_template(scope), status, time.perf_counter() - start, stats)
+
+async def _is_admin(headers: Headers):
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        principal = await get_current_user(token)
+    except HTTPException:
+        return False
+    return principal.is_active and principal.role_name == "Admin"
+
+# Profiles the requests an admin flags with "X-Profile: 1" or "?profile=1",
+# and PROFILE_SAMPLE_RATE of all others. The stored profile's id is returned
+# in X-Profile-Id; GET /api/monitoring/profiles/{id} serves its stacks.
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        requested = headers.get("x-profile") == "1" or (
+            b"profile=" in scope["query_string"] and QueryParams(scope["query_string"]).get("profile") == "1"
+        )
+        if not (requested and await _is_admin(headers)) and not should_sample():
+            await self.app(scope, receive, send)
+            return
+
+        profile = start_profile(scope["method"], scope["path"])
+        status = 500
+
+        async def send_with_profile_id(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(raw=message["headers"]).append("X-Profile-Id", profile.id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await finish_profile(profile, route_template(scope), status, current_request_stats())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text, Date
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Text, Date, Index, text
 from sqlalchemy.orm import relationship
 from app.database.database import Base
 from datetime import datetime
@@ -34,6 +34,9 @@ class Address(Base):
     town = Column(String)
     state = Column(String)
     country = Column(String)
+    # WGS84 degrees, used by route planning
+    latitude = Column(Float)
+    longitude = Column(Float)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -119,7 +122,7 @@ class Employee(Base):
     birth_date = Column(Date)
     hire_date = Column(Date)
     function_id = Column(Integer, ForeignKey("employee_function.id"))
-    status_id = Column(Integer, ForeignKey("employee_status.id"))
+    status_id = Column(Integer, ForeignKey("employee_status.id"), index=True)
     line1 = Column(String)
     line2 = Column(String)
     line3 = Column(String)
@@ -130,7 +133,7 @@ class Employee(Base):
     license_id = Column(Integer, ForeignKey("driving_license.id"))
     photo_file = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     function = relationship("EmployeeFunction", back_populates="employees")
     status = relationship("EmployeeStatus", back_populates="employees")
     license = relationship("DrivingLicense")
@@ -138,13 +141,15 @@ class Employee(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    # ix_orders_status_id is already taken by the orders_status primary key index
+    __table_args__ = (Index("ix_orders_order_status_id", "status_id"),)
     id = Column(Integer, primary_key=True, index=True)
     order_name = Column(String, unique=True)
     order_number = Column(Integer, unique=True)
     customer_id = Column(Integer, ForeignKey("customer.id"))
     delivery_address = Column(Integer, ForeignKey("address.id"))
     order_date = Column(Date)
-    required_date = Column(Date)
+    required_date = Column(Date, index=True)
     delivery_date = Column(Date)
     status_id = Column(Integer, ForeignKey("orders_status.id"))
     weight_kg = Column(Float)
@@ -172,13 +177,13 @@ class Vehicle(Base):
     model = Column(String, nullable=False)
     color = Column(String)
     type_id = Column(Integer, ForeignKey("vehicle_type.id"))
-    status_id = Column(Integer, ForeignKey("vehicle_status.id"))
+    status_id = Column(Integer, ForeignKey("vehicle_status.id"), index=True)
     insurance_id = Column(Integer, ForeignKey("insurance.id"))
     capacity_kg = Column(Float)
     volume_litre = Column(Float)
     photo_file = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     type = relationship("VehicleType", back_populates="vehicles")
     status = relationship("VehicleStatus", back_populates="vehicles")
     insurance = relationship("Insurance", back_populates="vehicles")
@@ -194,15 +199,51 @@ class Warehouse(Base):
 
 class VehicleAssign(Base):
     __tablename__ = "vehicle_assign"
-    id = Column(Integer, primary_key=True, index=True)
-    employee_id = Column(Integer, ForeignKey("employees.id"))
-    vehicle_id = Column(Integer, ForeignKey("vehicles.id"))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # At most one active (end_date IS NULL) assignment per vehicle
+    __table_args__ = (
+        Index(
+            "ux_vehicle_assign_active_vehicle", "vehicle_id", unique=True,
+            postgresql_where=text("end_date IS NULL"), sqlite_where=text("end_date IS NULL"),
+        ),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), index=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     end_date = Column(DateTime, nullable=True, default=None)
     employee = relationship("Employee", back_populates="vehicle_assigns")  # Added relationship
     vehicle = relationship("Vehicle", back_populates="vehicle_assigns")  # Added relationship
 
+# Read model of the active assignments: one row per assigned vehicle, kept in
+# step with vehicle_assign by the assign and unassign handlers, so "who has
+# this vehicle" never searches the assignment history
+class CurrentVehicleAssign(Base):
+    __tablename__ = "current_vehicle_assign"
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"), nullable=False, index=True)
+    assign_id = Column(Integer, ForeignKey("vehicle_assign.id"), nullable=False, unique=True)
+    assigned_at = Column(DateTime, default=datetime.utcnow)
+
+# Content-addressed photo stored under uploads/, shared by every row that
+# references it through photo_file
+class UploadBlob(Base):
+    __tablename__ = "upload_blob"
+    id = Column(Integer, primary_key=True, index=True)
+    file_name = Column(String, unique=True, nullable=False)
+    size_bytes = Column(Integer)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Bumped by every transaction that commits a change to the table, so list
+# ETags change in commit order (see services/conditional.py)
+class TableVersion(Base):
+    __tablename__ = "table_version"
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
 class Delivery(Base):
     __tablename__ = "delivery"
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,21 @@
+from sqlalchemy import select
+from app.models.models import Employee, Vehicle, VehicleAssign
+
+# Flat projection of the assignment history with employee and vehicle
+# identities resolved in SQL; end_date is NULL for active assignments
+def assignment_history_query():
+    return (
+        select(
+            VehicleAssign.id,
+            VehicleAssign.vehicle_id,
+            Vehicle.license_plate,
+            VehicleAssign.employee_id,
+            Employee.firstname,
+            Employee.lastname,
+            Employee.email,
+            VehicleAssign.created_at,
+            VehicleAssign.end_date,
+        )
+        .outerjoin(Vehicle, Vehicle.id == VehicleAssign.vehicle_id)
+        .outerjoin(Employee, Employee.id == VehicleAssign.employee_id)
+    )
@@ -0,0 +1,80 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.queries.pagination import paginate
+from app.models.models import Employee, EmployeeFunction, EmployeeStatus, DrivingLicense, CurrentVehicleAssign, Vehicle
+
+# Earliest active assignment per employee, from the current-assignment read
+# model: bounded by the fleet size, however long the history grows
+def _current_assignment_subquery():
+    return (
+        select(CurrentVehicleAssign.employee_id, func.min(CurrentVehicleAssign.assign_id).label("assign_id"))
+        .group_by(CurrentVehicleAssign.employee_id)
+        .subquery()
+    )
+
+# Flat projection of an employee row with all display names resolved in SQL,
+# so building a response never touches a lazy relationship
+def employee_rows_query():
+    current = _current_assignment_subquery()
+    return (
+        select(
+            Employee.id,
+            Employee.firstname,
+            Employee.lastname,
+            Employee.email,
+            Employee.birth_date,
+            Employee.hire_date,
+            Employee.function_id,
+            Employee.status_id,
+            Employee.line1,
+            Employee.line2,
+            Employee.line3,
+            Employee.postalcode,
+            Employee.town,
+            Employee.state,
+            Employee.country,
+            Employee.license_id,
+            Employee.photo_file,
+            EmployeeFunction.name.label("function_name"),
+            EmployeeStatus.name.label("status_name"),
+            DrivingLicense.driving_license_ame.label("license_name"),
+            (Vehicle.make + "_" + Vehicle.license_plate).label("assigned_vehicle"),
+        )
+        .outerjoin(EmployeeFunction, EmployeeFunction.id == Employee.function_id)
+        .outerjoin(EmployeeStatus, EmployeeStatus.id == Employee.status_id)
+        .outerjoin(DrivingLicense, DrivingLicense.id == Employee.license_id)
+        .outerjoin(current, current.c.employee_id == Employee.id)
+        .outerjoin(CurrentVehicleAssign, CurrentVehicleAssign.assign_id == current.c.assign_id)
+        .outerjoin(Vehicle, Vehicle.id == CurrentVehicleAssign.vehicle_id)
+    )
+
+# Whitelisted sort keys; each must be a non-null column present in the projection
+EMPLOYEE_SORT_KEYS = {
+    "id": Employee.id,
+    "lastname": Employee.lastname,
+    "firstname": Employee.firstname,
+    "email": Employee.email,
+}
+
+async def list_employees(
+    db: AsyncSession,
+    status_id: int = None,
+    function_id: int = None,
+    town: str = None,
+    sort: str = "id",
+    order: str = "asc",
+    cursor: str = None,
+    limit: int = None,
+):
+    stmt = employee_rows_query()
+    if status_id is not None:
+        stmt = stmt.where(Employee.status_id == status_id)
+    if function_id is not None:
+        stmt = stmt.where(Employee.function_id == function_id)
+    if town:
+        stmt = stmt.where(Employee.town == town)
+    return await paginate(db, stmt, EMPLOYEE_SORT_KEYS, Employee.id, sort, order, cursor, limit)
+
+async def get_employee(db: AsyncSession, employee_id: int):
+    row = (await db.execute(employee_rows_query().where(Employee.id == employee_id))).first()
+    return dict(row._mapping) if row else None
@@ -0,0 +1,56 @@
+from datetime import date
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.queries.pagination import paginate
+from app.models.models import Order, OrdersStatus, Customer
+
+# Flat projection of an order row with status and customer names resolved in SQL
+def order_rows_query():
+    return (
+        select(
+            Order.id,
+            Order.order_name,
+            Order.order_number,
+            Order.customer_id,
+            Order.delivery_address,
+            Order.order_date,
+            Order.required_date,
+            Order.delivery_date,
+            Order.status_id,
+            Order.weight_kg,
+            Order.volume_litre,
+            Order.notes,
+            OrdersStatus.orde_status_name.label("status_name"),
+            Customer.customer_name,
+        )
+        .outerjoin(OrdersStatus, OrdersStatus.id == Order.status_id)
+        .outerjoin(Customer, Customer.id == Order.customer_id)
+    )
+
+# Whitelisted sort keys; each must be a non-null column present in the projection
+ORDER_SORT_KEYS = {
+    "id": Order.id,
+}
+
+async def list_orders(
+    db: AsyncSession,
+    status_id: int = None,
+    customer_id: int = None,
+    required_date: date = None,
+    sort: str = "id",
+    order: str = "asc",
+    cursor: str = None,
+    limit: int = None,
+):
+    stmt = order_rows_query()
+    if status_id is not None:
+        stmt = stmt.where(Order.status_id == status_id)
+    if customer_id is not None:
+        stmt = stmt.where(Order.customer_id == customer_id)
+    if required_date is not None:
+        stmt = stmt.where(Order.required_date == required_date)
+    return await paginate(db, stmt, ORDER_SORT_KEYS, Order.id, sort, order, cursor, limit)
+
+async def get_order(db: AsyncSession, order_id: int):
+    row = (await db.execute(order_rows_query().where(Order.id == order_id))).first()
+    return dict(row._mapping) if row else None
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import date, datetime
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MAX_PAGE_SIZE = 500
+
+# Dates and datetimes are carried as ISO strings
+def encode_cursor(sort: str, value, last_id: int):
+    raw = json.dumps([sort, value, last_id], separators=(",", ":"), default=lambda v: v.isoformat()).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+# The cursor's sort value as the sort column's Python type, or None when it
+# has another type; it is compared with the column in SQL, so a mismatch
+# would be a database error (or a cast) rather than a 400
+def _column_value(value, column):
+    python_type = column.type.python_type
+    if python_type in (date, datetime):
+        if isinstance(value, str):
+            try:
+                return python_type.fromisoformat(value)
+            except ValueError:
+                return None
+        return None
+    if isinstance(value, bool):
+        return None
+    if python_type is float and isinstance(value, int):
+        return float(value)
+    return value if isinstance(value, python_type) else None
+
+def decode_cursor(cursor: str, sort: str, column, id_column):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, last_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # A cursor is only meaningful for the sort order it was issued for
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    value, last_id = _column_value(value, column), _column_value(last_id, id_column)
+    if value is None or last_id is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+# Keyset pagination over (sort column, id). Fetches one extra row to know
+# whether another page exists, so the cost of a page never depends on how
+# deep into the table it is. Without a limit the full filtered list is returned.
+async def paginate(db: AsyncSession, stmt, sort_columns: dict, id_column, sort: str, order: str, cursor, limit):
+    if sort not in sort_columns:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort key. Use one of: {', '.join(sort_columns)}"
+        )
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order. Use 'asc' or 'desc'.")
+    column = sort_columns[sort]
+    descending = order == "desc"
+
+    if cursor and limit:
+        value, last_id = decode_cursor(cursor, sort, column, id_column)
+        if column is id_column:
+            stmt = stmt.where(id_column < last_id if descending else id_column > last_id)
+        else:
+            key = tuple_(column, id_column)
+            stmt = stmt.where(key < tuple_(value, last_id) if descending else key > tuple_(value, last_id))
+
+    if column is id_column:
+        stmt = stmt.order_by(id_column.desc() if descending else id_column.asc())
+    elif descending:
+        stmt = stmt.order_by(column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(column.asc(), id_column.asc())
+
+    if not limit:
+        return [dict(row._mapping) for row in await db.execute(stmt)], None
+
+    rows = [dict(row._mapping) for row in await db.execute(stmt.limit(limit + 1))]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, last[sort], last["id"])
+    return rows, next_cursor
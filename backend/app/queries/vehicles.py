@@ -0,0 +1,56 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.queries.pagination import paginate
+from app.models.models import Vehicle, VehicleType, VehicleStatus, Insurance
+
+# Flat projection of a vehicle row with type, status and insurance resolved in SQL
+def vehicle_rows_query():
+    return (
+        select(
+            Vehicle.id,
+            Vehicle.license_plate,
+            Vehicle.make,
+            Vehicle.model,
+            Vehicle.color,
+            Vehicle.type_id,
+            Vehicle.status_id,
+            Vehicle.insurance_id,
+            Vehicle.capacity_kg,
+            Vehicle.volume_litre,
+            Vehicle.photo_file,
+            VehicleType.vehicle_type_name,
+            VehicleStatus.vehicle_status_name,
+            Insurance.insurance_ref,
+        )
+        .outerjoin(VehicleType, VehicleType.id == Vehicle.type_id)
+        .outerjoin(VehicleStatus, VehicleStatus.id == Vehicle.status_id)
+        .outerjoin(Insurance, Insurance.id == Vehicle.insurance_id)
+    )
+
+# Whitelisted sort keys; each must be a non-null column present in the projection
+VEHICLE_SORT_KEYS = {
+    "id": Vehicle.id,
+    "license_plate": Vehicle.license_plate,
+    "make": Vehicle.make,
+    "model": Vehicle.model,
+}
+
+async def list_vehicles(
+    db: AsyncSession,
+    status_id: int = None,
+    type_id: int = None,
+    sort: str = "id",
+    order: str = "asc",
+    cursor: str = None,
+    limit: int = None,
+):
+    stmt = vehicle_rows_query()
+    if status_id is not None:
+        stmt = stmt.where(Vehicle.status_id == status_id)
+    if type_id is not None:
+        stmt = stmt.where(Vehicle.type_id == type_id)
+    return await paginate(db, stmt, VEHICLE_SORT_KEYS, Vehicle.id, sort, order, cursor, limit)
+
+async def get_vehicle(db: AsyncSession, vehicle_id: int):
+    row = (await db.execute(vehicle_rows_query().where(Vehicle.id == vehicle_id))).first()
+    return dict(row._mapping) if row else None
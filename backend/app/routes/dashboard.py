@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_db, get_current_active_user, check_user_role
+from app.services.dashboard import get_dashboard_stats
+from app.auth.schemas import Principal
+
+router = APIRouter()
+
+# Employee and vehicle status distributions for the dashboard in one response
+@router.get("/dashboard_stats", response_model=dict)
+async def read_dashboard_stats(db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    return await get_dashboard_stats(db)
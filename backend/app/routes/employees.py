@@ -1,22 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from app.dependencies import get_db, get_current_active_user, check_user_role
-from app.models.models import Employee, EmployeeFunction, EmployeeStatus, DrivingLicense, User, VehicleAssign, Vehicle
+from app.queries.employees import list_employees, get_employee
+from app.queries.pagination import MAX_PAGE_SIZE
+from app.services.storage import save_photo, release_photo
+from app.services.file_serving import resolve_upload, serve_upload
+from app.services.images import VARIANT_SIZES, VARIANT_FORMATS, DEFAULT_VARIANT_FORMAT, get_variant
+from app.services.responses import trusted_rows
+from app.services.conditional import check_list_not_modified, reference_list
+from app.services.reference_data import reference_exists
+from app.services import dashboard, events
+from app.services.bulk_import import import_rows
+from app.auth.schemas import Principal
+from app.models.models import Employee, CurrentVehicleAssign, Vehicle
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import date
-import os
-import shutil
 
 router = APIRouter()
 
-# Directory to store uploaded photos
-UPLOAD_DIR = "uploads"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
-
 # Pydantic models for request/response
 class EmployeeBase(BaseModel):
     firstname: str
@@ -81,75 +84,42 @@ class EmployeeResponse(EmployeeBase):
         orm_mode = True
 
 # Get all employees
+# Pass `limit` to page through results; the next page's cursor is returned
+# in the X-Next-Cursor header and is absent on the last page
 @router.get("/employees", response_model=List[EmployeeResponse])
-def read_employees(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_employees(
+    request: Request,
+    response: Response,
+    status_id: Optional[int] = None,
+    function_id: Optional[int] = None,
+    town: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
     check_user_role(current_user, "Admin")
-    employees = db.query(Employee).all()
-    return [
-        {
-            "id": emp.id,
-            "firstname": emp.firstname,
-            "lastname": emp.lastname,
-            "email": emp.email,
-            "birth_date": emp.birth_date,
-            "hire_date": emp.hire_date,
-            "function_id": emp.function_id,
-            "status_id": emp.status_id,
-            "line1": emp.line1,
-            "line2": emp.line2,
-            "line3": emp.line3,
-            "postalcode": emp.postalcode,
-            "town": emp.town,
-            "state": emp.state,
-            "country": emp.country,
-            "license_id": emp.license_id,
-            "photo_file": emp.photo_file,
-            "function_name": emp.function.name if emp.function else None,
-            "status_name": emp.status.name if emp.status else None,
-            "license_name": emp.license.driving_license_ame if emp.license else None,
-            "assigned_vehicle": (
-                f"{emp.vehicle_assigns[0].vehicle.make}_{emp.vehicle_assigns[0].vehicle.license_plate}"
-                if emp.vehicle_assigns and any(va.end_date is None for va in emp.vehicle_assigns)
-                else None
-            )
-        }
-        for emp in employees
-    ]
+    not_modified = await check_list_not_modified(db, request, response, "employees")
+    if not_modified:
+        return not_modified
+    employees, next_cursor = await list_employees(
+        db, status_id=status_id, function_id=function_id, town=town,
+        sort=sort, order=order, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trusted_rows(employees, EmployeeResponse, response)
 
 # Get a single employee by ID
 @router.get("/employees/{employee_id}", response_model=EmployeeResponse)
-def read_employee(employee_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_employee(employee_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    employee = await get_employee(db, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    return {
-        "id": employee.id,
-        "firstname": employee.firstname,
-        "lastname": employee.lastname,
-        "email": employee.email,
-        "birth_date": employee.birth_date,
-        "hire_date": employee.hire_date,
-        "function_id": employee.function_id,
-        "status_id": employee.status_id,
-        "line1": employee.line1,
-        "line2": employee.line2,
-        "line3": employee.line3,
-        "postalcode": employee.postalcode,
-        "town": employee.town,
-        "state": employee.state,
-        "country": employee.country,
-        "license_id": employee.license_id,
-        "photo_file": employee.photo_file,
-        "function_name": employee.function.name if employee.function else None,
-        "status_name": employee.status.name if employee.status else None,
-        "license_name": employee.license.driving_license_ame if employee.license else None,
-        "assigned_vehicle": (
-            f"{employee.vehicle_assigns[0].vehicle.make}_{employee.vehicle_assigns[0].vehicle.license_plate}"
-            if employee.vehicle_assigns and any(va.end_date is None for va in employee.vehicle_assigns)
-            else None
-        )
-    }
+    return employee
 
 # Create a new employee with photo upload
 @router.post("/employees", response_model=EmployeeResponse)
@@ -170,17 +140,17 @@ async def create_employee(
     country: Optional[str] = Form(None),
     license_id: Optional[int] = Form(None),
     photo: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     check_user_role(current_user, "Admin")
-    if db.query(Employee).filter(Employee.email == email).first():
+    if await db.scalar(select(Employee.id).where(Employee.email == email)):
         raise HTTPException(status_code=400, detail="Email already exists")
-    if function_id and not db.query(EmployeeFunction).filter(EmployeeFunction.id == function_id).first():
+    if function_id and not await reference_exists(db, "employee_functions", function_id):
         raise HTTPException(status_code=400, detail="Invalid function_id")
-    if status_id and not db.query(EmployeeStatus).filter(EmployeeStatus.id == status_id).first():
+    if status_id and not await reference_exists(db, "employee_statuses", status_id):
         raise HTTPException(status_code=400, detail="Invalid status_id")
-    if license_id and not db.query(DrivingLicense).filter(DrivingLicense.id == license_id).first():
+    if license_id and not await reference_exists(db, "driving_licenses", license_id):
         raise HTTPException(status_code=400, detail="Invalid license_id")
 
     birth_date_obj = None
@@ -198,9 +168,7 @@ async def create_employee(
 
     photo_file_path = None
     if photo:
-        photo_file_path = os.path.join(UPLOAD_DIR, photo.filename)
-        with open(photo_file_path, "wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
+        photo_file_path = await save_photo(db, photo)
 
     db_employee = Employee(
         firstname=firstname,
@@ -221,31 +189,22 @@ async def create_employee(
         photo_file=photo_file_path
     )
     db.add(db_employee)
-    db.commit()
-    db.refresh(db_employee)
-    return {
-        "id": db_employee.id,
-        "firstname": db_employee.firstname,
-        "lastname": db_employee.lastname,
-        "email": db_employee.email,
-        "birth_date": db_employee.birth_date,
-        "hire_date": db_employee.hire_date,
-        "function_id": db_employee.function_id,
-        "status_id": db_employee.status_id,
-        "line1": db_employee.line1,
-        "line2": db_employee.line2,
-        "line3": db_employee.line3,
-        "postalcode": db_employee.postalcode,
-        "town": db_employee.town,
-        "state": db_employee.state,
-        "country": db_employee.country,
-        "license_id": db_employee.license_id,
-        "photo_file": db_employee.photo_file,
-        "function_name": db_employee.function.name if db_employee.function else None,
-        "status_name": db_employee.status.name if db_employee.status else None,
-        "license_name": db_employee.license.driving_license_ame if db_employee.license else None,
-        "assigned_vehicle": None  # New employee won't have an assignment yet
-    }
+    await db.commit()
+    dashboard.employee_added(status_id)
+    events.employee_changed("created", db_employee.id)
+    return await get_employee(db, db_employee.id)
+
+# Bulk import employees from a CSV (header row) or NDJSON file. Invalid rows are
+# skipped and reported by line number; valid rows are committed in batches.
+@router.post("/employees/import", response_model=dict)
+async def import_employees(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    check_user_role(current_user, "Admin")
+    return await import_rows(db, "employees", file, format)
 
 # Update an employee with photo upload
 @router.put("/employees/{employee_id}", response_model=EmployeeResponse)
@@ -267,20 +226,20 @@ async def update_employee(
     country: Optional[str] = Form(None),
     license_id: Optional[int] = Form(None),
     photo: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     check_user_role(current_user, "Admin")
-    db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    db_employee = await db.get(Employee, employee_id)
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
-    if email != db_employee.email and db.query(Employee).filter(Employee.email == email).first():
+    if email != db_employee.email and await db.scalar(select(Employee.id).where(Employee.email == email)):
         raise HTTPException(status_code=400, detail="Email already exists")
-    if function_id and not db.query(EmployeeFunction).filter(EmployeeFunction.id == function_id).first():
+    if function_id and not await reference_exists(db, "employee_functions", function_id):
         raise HTTPException(status_code=400, detail="Invalid function_id")
-    if status_id and not db.query(EmployeeStatus).filter(EmployeeStatus.id == status_id).first():
+    if status_id and not await reference_exists(db, "employee_statuses", status_id):
         raise HTTPException(status_code=400, detail="Invalid status_id")
-    if license_id and not db.query(DrivingLicense).filter(DrivingLicense.id == license_id).first():
+    if license_id and not await reference_exists(db, "driving_licenses", license_id):
         raise HTTPException(status_code=400, detail="Invalid license_id")
 
     birth_date_obj = None
@@ -297,13 +256,11 @@ async def update_employee(
             raise HTTPException(status_code=400, detail="Invalid hire_date format. Use YYYY-MM-DD.")
 
     if photo:
-        if db_employee.photo_file and os.path.exists(db_employee.photo_file):
-            os.remove(db_employee.photo_file)
-        photo_file_path = os.path.join(UPLOAD_DIR, photo.filename)
-        with open(photo_file_path, "wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
-        db_employee.photo_file = photo_file_path
+        old_photo_file = db_employee.photo_file
+        db_employee.photo_file = await save_photo(db, photo)
+        await release_photo(db, old_photo_file)
 
+    old_status_id = db_employee.status_id
     db_employee.firstname = firstname
     db_employee.lastname = lastname
     db_employee.email = email
@@ -320,105 +277,81 @@ async def update_employee(
     db_employee.country = country
     db_employee.license_id = license_id
 
-    db.commit()
-    db.refresh(db_employee)
-    return {
-        "id": db_employee.id,
-        "firstname": db_employee.firstname,
-        "lastname": db_employee.lastname,
-        "email": db_employee.email,
-        "birth_date": db_employee.birth_date,
-        "hire_date": db_employee.hire_date,
-        "function_id": db_employee.function_id,
-        "status_id": db_employee.status_id,
-        "line1": db_employee.line1,
-        "line2": db_employee.line2,
-        "line3": db_employee.line3,
-        "postalcode": db_employee.postalcode,
-        "town": db_employee.town,
-        "state": db_employee.state,
-        "country": db_employee.country,
-        "license_id": db_employee.license_id,
-        "photo_file": db_employee.photo_file,
-        "function_name": db_employee.function.name if db_employee.function else None,
-        "status_name": db_employee.status.name if db_employee.status else None,
-        "license_name": db_employee.license.driving_license_ame if db_employee.license else None,
-        "assigned_vehicle": (
-            f"{db_employee.vehicle_assigns[0].vehicle.make}_{db_employee.vehicle_assigns[0].vehicle.license_plate}"
-            if db_employee.vehicle_assigns and any(va.end_date is None for va in db_employee.vehicle_assigns)
-            else None
-        )
-    }
+    await db.commit()
+    dashboard.employee_status_changed(old_status_id, status_id)
+    events.employee_changed("updated", employee_id)
+    return await get_employee(db, db_employee.id)
 
 # Delete an employee
 @router.delete("/employees/{employee_id}", response_model=dict)
-def delete_employee(employee_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def delete_employee(employee_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    db_employee = db.query(Employee).filter(Employee.id == employee_id).first()
+    db_employee = await db.get(Employee, employee_id)
     if not db_employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
     # Check if the employee has an active vehicle assignment
-    active_assignment = db.query(VehicleAssign).filter(
-        (VehicleAssign.employee_id == employee_id) & 
-        (VehicleAssign.end_date.is_(None))
-    ).first()
-    if active_assignment:
-        assigned_vehicle = db.query(Vehicle).filter(Vehicle.id == active_assignment.vehicle_id).first()
+    current = await db.scalar(
+        select(CurrentVehicleAssign).where(CurrentVehicleAssign.employee_id == employee_id).limit(1)
+    )
+    if current:
+        assigned_vehicle = await db.get(Vehicle, current.vehicle_id)
         raise HTTPException(
             status_code=403,
             detail=f"Cannot delete employee. They are currently assigned to vehicle {assigned_vehicle.make} {assigned_vehicle.license_plate}."
         )
     
     # Proceed with deletion if no active assignment exists
-    if db_employee.photo_file and os.path.exists(db_employee.photo_file):
-        os.remove(db_employee.photo_file)
-    db.delete(db_employee)
-    db.commit()
+    await release_photo(db, db_employee.photo_file)
+    await db.delete(db_employee)
+    await db.commit()
+    dashboard.employee_removed(db_employee.status_id)
+    events.employee_changed("deleted", employee_id)
     return {"message": "Employee deleted successfully"}
 
-# Serve uploaded photos
+# Serve uploaded photos. `size` selects a resized variant (64 or 256 px) in
+# `format` webp or jpeg; files that are not images are served as stored.
 @router.get("/uploads/{filename}")
-async def get_uploaded_file(filename: str):
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path)
+async def get_uploaded_file(
+    filename: str,
+    request: Request,
+    size: Optional[int] = None,
+    format: str = DEFAULT_VARIANT_FORMAT,
+    current_user: Principal = Depends(get_current_active_user)
+):
+    check_user_role(current_user, "Admin")
+    file_path = resolve_upload(filename)
+    if size is not None:
+        if size not in VARIANT_SIZES or format not in VARIANT_FORMATS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid variant. Sizes: {', '.join(map(str, VARIANT_SIZES))}; formats: {', '.join(VARIANT_FORMATS)}"
+            )
+        variant = await get_variant(file_path, size, format)
+        if variant:
+            file_path = variant
+    return await serve_upload(request, file_path)
 
 # Get all employee functions
 @router.get("/employee_functions", response_model=List[dict])
-def read_employee_functions(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_employee_functions(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    functions = db.query(EmployeeFunction).all()
-    return [{"id": func.id, "name": func.name} for func in functions]
+    return await reference_list(db, request, response, "employee_functions")
 
 # Get all employee statuses
 @router.get("/employee_statuses", response_model=List[dict])
-def read_employee_statuses(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_employee_statuses(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    statuses = db.query(EmployeeStatus).all()
-    return [{"id": status.id, "name": status.name} for status in statuses]
+    return await reference_list(db, request, response, "employee_statuses")
 
 # Get all driving licenses
 @router.get("/driving_licenses", response_model=List[dict])
-def read_driving_licenses(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_driving_licenses(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    licenses = db.query(DrivingLicense).all()
-    return [{"id": lic.id, "driving_license_ame": lic.driving_license_ame} for lic in licenses]
+    return await reference_list(db, request, response, "driving_licenses")
 
 # Get employee status distribution for pie chart
 @router.get("/employee_status_distribution", response_model=List[dict])
-def get_employee_status_distribution(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def get_employee_status_distribution(db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    # Query to count employees by status_id and join with EmployeeStatus for names
-    status_distribution = (
-        db.query(EmployeeStatus.name, func.count(Employee.id).label("count"))
-        .outerjoin(Employee, Employee.status_id == EmployeeStatus.id)
-        .group_by(EmployeeStatus.id, EmployeeStatus.name)
-        .all()
-    )
-    # Convert to list of dictionaries
-    return [
-        {"status_name": name if name else "No Status", "count": count}
-        for name, count in status_distribution
-    ]
\ No newline at end of file
+    return await dashboard.get_employee_status_distribution(db)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from app.dependencies import get_current_active_user, check_user_role
+from app.services.events import EVENT_MAX_SUBSCRIBERS, fleet_events
+from app.auth.schemas import Principal
+
+router = APIRouter()
+
+# Live fleet changes as server-sent events. "delta" events carry a JSON list
+# of {"type": "vehicle"|"employee", "op": "created"|"updated"|"deleted", "id"}
+# and {"type": "assignment", "op": "assigned"|"unassigned", "vehicle_id",
+# "employee_id"}; on "resync" the client reloads what it shows. No database
+# session is held while the stream is open.
+@router.get("/events")
+async def stream_events(current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    if len(fleet_events) >= EVENT_MAX_SUBSCRIBERS:
+        raise HTTPException(status_code=503, detail="Too many event subscribers", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        fleet_events.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,28 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from app.dependencies import get_current_active_user, check_user_role
+from app.services.export import EXPORT_MEDIA_TYPES, export_statement, stream_export
+from app.auth.schemas import Principal
+
+router = APIRouter()
+
+# Stream employees, vehicles or the vehicle_assign history as CSV or NDJSON.
+# date_from/date_to (inclusive) filter on creation date, or on the assignment
+# period for vehicle_assign.
+@router.get("/export/{table}")
+async def export_table(
+    table: str = Path(..., regex="^(employees|vehicles|vehicle_assign)$"),
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    current_user: Principal = Depends(get_current_active_user)
+):
+    check_user_role(current_user, "Admin")
+    stmt = export_statement(table, date_from, date_to)
+    return StreamingResponse(
+        stream_export(stmt, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
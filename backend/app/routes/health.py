@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services.warmup import database_reachable, is_ready, last_error
+
+router = APIRouter()
+
+# Liveness: the process is up and the event loop answers. No I/O, so a slow
+# database never gets a healthy worker restarted.
+@router.get("/health/live", response_model=dict)
+async def live():
+    return {"status": "ok"}
+
+# Readiness: migrations applied, caches warm and the database answering
+@router.get("/health/ready", response_model=dict)
+async def ready():
+    if is_ready() and await database_reachable():
+        return {"status": "ready"}
+    return JSONResponse(status_code=503, content={"status": "starting" if not is_ready() else "unavailable", "error": last_error()})
@@ -0,0 +1,20 @@
+import secrets
+from typing import Optional
+import anyio
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.database.database import pool_statuses
+from app.services.instrumentation import METRICS_TOKEN, export_metrics
+
+router = APIRouter()
+
+# Prometheus scrape target, summed over the workers of this container. Like
+# the health probes it is served outside /api, so nginx does not proxy it;
+# the backend port is published on localhost only. Set METRICS_TOKEN when
+# the scraper reaches it over a network.
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and not secrets.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    text = await anyio.to_thread.run_sync(export_metrics, pool_statuses())
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
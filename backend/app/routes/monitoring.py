@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.dependencies import get_current_active_user, check_user_role
+from app.auth.schemas import Principal
+from app.database.database import pool_statuses
+from app.services.profiling import list_profiles, read_profile
+
+router = APIRouter()
+
+# Connection pool occupancy, checkout wait histogram and timeouts for this worker
+@router.get("/monitoring/db_pool", response_model=dict)
+async def read_db_pool(current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    return pool_statuses()
+
+# Summaries of the stored request profiles, newest first
+@router.get("/monitoring/profiles", response_model=list)
+async def read_profiles(limit: int = Query(50, ge=1, le=500), current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    return await list_profiles(limit)
+
+# Folded stacks of one profile, for flamegraph.pl, inferno or speedscope
+@router.get("/monitoring/profiles/{profile_id}", response_class=PlainTextResponse)
+async def read_profile_stacks(profile_id: str, current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    stacks = await read_profile(profile_id)
+    if stacks is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(stacks)
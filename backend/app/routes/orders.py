@@ -0,0 +1,151 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.dependencies import get_db, get_current_active_user, check_user_role
+from app.queries.orders import list_orders, get_order
+from app.queries.pagination import MAX_PAGE_SIZE
+from app.services.load_planning import PLANNING_STRATEGIES, plan_loads
+from app.services.responses import trusted_rows
+from app.services.conditional import check_list_not_modified, reference_list
+from app.services.reference_data import reference_exists
+from app.auth.schemas import Principal
+from app.models.models import Order, Customer, Address
+from pydantic import BaseModel, confloat
+from typing import List, Optional
+from datetime import date
+
+router = APIRouter()
+
+# Pydantic models for request/response
+class OrderBase(BaseModel):
+    order_name: Optional[str] = None
+    order_number: Optional[int] = None
+    customer_id: Optional[int] = None
+    delivery_address: Optional[int] = None
+    order_date: Optional[date] = None
+    required_date: Optional[date] = None
+    delivery_date: Optional[date] = None
+    status_id: Optional[int] = None
+    weight_kg: Optional[confloat(ge=0)] = None
+    volume_litre: Optional[confloat(ge=0)] = None
+    notes: Optional[str] = None
+
+class OrderCreate(OrderBase):
+    pass
+
+class OrderUpdate(OrderBase):
+    pass
+
+class OrderResponse(OrderBase):
+    id: int
+    status_name: Optional[str] = None
+    customer_name: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+async def _validate_order(db: AsyncSession, order: OrderBase, order_id: int = None):
+    if order.order_name is not None:
+        existing = await db.scalar(select(Order.id).where(Order.order_name == order.order_name))
+        if existing and existing != order_id:
+            raise HTTPException(status_code=400, detail="Order name already exists")
+    if order.order_number is not None:
+        existing = await db.scalar(select(Order.id).where(Order.order_number == order.order_number))
+        if existing and existing != order_id:
+            raise HTTPException(status_code=400, detail="Order number already exists")
+    if order.status_id and not await reference_exists(db, "orders_statuses", order.status_id):
+        raise HTTPException(status_code=400, detail="Invalid status_id")
+    if order.customer_id and not await db.get(Customer, order.customer_id):
+        raise HTTPException(status_code=400, detail="Invalid customer_id")
+    if order.delivery_address and not await db.get(Address, order.delivery_address):
+        raise HTTPException(status_code=400, detail="Invalid delivery_address")
+
+# Get all orders
+# Pass `limit` to page through results; the next page's cursor is returned
+# in the X-Next-Cursor header and is absent on the last page
+@router.get("/orders", response_model=List[OrderResponse])
+async def read_orders(
+    request: Request,
+    response: Response,
+    status_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    required_date: Optional[date] = None,
+    sort: str = "id",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    check_user_role(current_user, "Admin")
+    not_modified = await check_list_not_modified(db, request, response, "orders")
+    if not_modified:
+        return not_modified
+    orders, next_cursor = await list_orders(
+        db, status_id=status_id, customer_id=customer_id, required_date=required_date,
+        sort=sort, order=order, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trusted_rows(orders, OrderResponse, response)
+
+# Propose a loading plan for `day`: open orders due by then are packed onto
+# vehicles that are available (not in maintenance, not assigned)
+@router.get("/orders/load_plan", response_model=dict)
+async def read_load_plan(
+    day: date,
+    strategy: str = Query("best_fit", regex=f"^({'|'.join(PLANNING_STRATEGIES)})$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    check_user_role(current_user, "Admin")
+    return await plan_loads(db, day, strategy)
+
+# Get a single order by ID
+@router.get("/orders/{order_id}", response_model=OrderResponse)
+async def read_order(order_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    order = await get_order(db, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
+
+# Create a new order
+@router.post("/orders", response_model=OrderResponse)
+async def create_order(order: OrderCreate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    await _validate_order(db, order)
+    db_order = Order(**order.dict())
+    db.add(db_order)
+    await db.commit()
+    return await get_order(db, db_order.id)
+
+# Update an order
+@router.put("/orders/{order_id}", response_model=OrderResponse)
+async def update_order(order_id: int, order: OrderUpdate, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    db_order = await db.get(Order, order_id)
+    if not db_order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    await _validate_order(db, order, order_id)
+    for field, value in order.dict().items():
+        setattr(db_order, field, value)
+    await db.commit()
+    return await get_order(db, db_order.id)
+
+# Delete an order
+@router.delete("/orders/{order_id}", response_model=dict)
+async def delete_order(order_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    db_order = await db.get(Order, order_id)
+    if not db_order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    await db.delete(db_order)
+    await db.commit()
+    return {"message": "Order deleted successfully"}
+
+# Get all order statuses
+@router.get("/orders_statuses", response_model=List[dict])
+async def read_orders_statuses(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
+    check_user_role(current_user, "Admin")
+    return await reference_list(db, request, response, "orders_statuses")
@@ -1,11 +1,11 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_db, get_current_active_user, check_user_role
-from app.models.models import Role, User  
+from app.services.conditional import reference_list
+from app.auth.schemas import Principal
 router = APIRouter()
 
 @router.get("/roles")
-def read_roles(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_roles(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    roles = db.query(Role).all()
-    return [{"id": role.id, "role_name": role.role_name, "descript": role.descript} for role in roles]
\ No newline at end of file
+    return await reference_list(db, request, response, "roles")
\ No newline at end of file
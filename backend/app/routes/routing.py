@@ -0,0 +1,20 @@
+from datetime import date
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.dependencies import get_db, get_current_active_user, check_user_role
+from app.services.route_planning import plan_routes
+from app.auth.schemas import Principal
+
+router = APIRouter()
+
+# Propose delivery routes for `day`: open orders with coordinates are split
+# over the available vehicles, each route starting and ending at the warehouse
+@router.get("/delivery_routes/plan", response_model=dict)
+async def read_route_plan(
+    day: date,
+    warehouse_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    check_user_role(current_user, "Admin")
+    return await plan_routes(db, day, warehouse_id)
@@ -1,20 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.dependencies import get_db, get_current_active_user, check_user_role
-from app.models.models import User
+from app.auth.schemas import Principal
+from app.models.models import User, Role
 
 router = APIRouter()
 
 @router.get("/users/me")
-def read_users_me(current_user: User = Depends(get_current_active_user)):
+async def read_users_me(current_user: Principal = Depends(get_current_active_user)):
     return {
         "username": current_user.username,
-        "role": current_user.role.role_name,
+        "role": current_user.role_name,
         "descript": current_user.descript
     }
 
 @router.get("/users")
-def read_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_users(db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    users = db.query(User).all()
-    return [{"username": user.username, "role": user.role.role_name} for user in users]
\ No newline at end of file
+    users = await db.execute(select(User.username, Role.role_name).join(Role, Role.id == User.role_id))
+    return [{"username": username, "role": role_name} for username, role_name in users]
\ No newline at end of file
@@ -1,22 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from app.dependencies import get_db, get_current_active_user, check_user_role
-from app.models.models import Vehicle, VehicleType, VehicleStatus, Insurance, User, VehicleAssign, Employee
+from app.queries.vehicles import list_vehicles, get_vehicle
+from app.queries.pagination import MAX_PAGE_SIZE
+from app.services.storage import save_photo, release_photo
+from app.services.responses import trusted_rows
+from app.services.conditional import check_list_not_modified, reference_list
+from app.services.reference_data import reference_exists
+from app.services import dashboard, events
+from app.services.bulk_import import import_rows
+from app.auth.schemas import Principal
+from app.models.models import Vehicle, VehicleAssign, CurrentVehicleAssign, Employee
 from pydantic import BaseModel
 from typing import List, Optional
-import os
-import shutil
 from datetime import datetime
 
 router = APIRouter()
 
-# Directory to store uploaded photos (same as employees)
-UPLOAD_DIR = "uploads"
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR)
-
 # Pydantic models for request/response
 class VehicleBase(BaseModel):
     license_plate: str
@@ -71,53 +74,41 @@ class VehicleUnassignRequest(BaseModel):
     vehicle_id: int
 
 # Get all vehicles
+# Pass `limit` to page through results; the next page's cursor is returned
+# in the X-Next-Cursor header and is absent on the last page
 @router.get("/vehicles", response_model=List[VehicleResponse])
-def read_vehicles(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_vehicles(
+    request: Request,
+    response: Response,
+    status_id: Optional[int] = None,
+    type_id: Optional[int] = None,
+    sort: str = "id",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
     check_user_role(current_user, "Admin")
-    vehicles = db.query(Vehicle).all()
-    return [
-        {
-            "id": veh.id,
-            "license_plate": veh.license_plate,
-            "make": veh.make,
-            "model": veh.model,
-            "color": veh.color,
-            "type_id": veh.type_id,
-            "status_id": veh.status_id,
-            "insurance_id": veh.insurance_id,
-            "capacity_kg": veh.capacity_kg,
-            "volume_litre": veh.volume_litre,
-            "photo_file": veh.photo_file,
-            "vehicle_type_name": veh.type.vehicle_type_name if veh.type else None,
-            "vehicle_status_name": veh.status.vehicle_status_name if veh.status else None,
-            "insurance_ref": veh.insurance.insurance_ref if veh.insurance else None
-        }
-        for veh in vehicles
-    ]
+    not_modified = await check_list_not_modified(db, request, response, "vehicles")
+    if not_modified:
+        return not_modified
+    vehicles, next_cursor = await list_vehicles(
+        db, status_id=status_id, type_id=type_id,
+        sort=sort, order=order, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trusted_rows(vehicles, VehicleResponse, response)
 
 # Get a single vehicle by ID
 @router.get("/vehicles/{vehicle_id}", response_model=VehicleResponse)
-def read_vehicle(vehicle_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_vehicle(vehicle_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await get_vehicle(db, vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    return {
-        "id": vehicle.id,
-        "license_plate": vehicle.license_plate,
-        "make": vehicle.make,
-        "model": vehicle.model,
-        "color": vehicle.color,
-        "type_id": vehicle.type_id,
-        "status_id": vehicle.status_id,
-        "insurance_id": vehicle.insurance_id,
-        "capacity_kg": vehicle.capacity_kg,
-        "volume_litre": vehicle.volume_litre,
-        "photo_file": vehicle.photo_file,
-        "vehicle_type_name": vehicle.type.vehicle_type_name if vehicle.type else None,
-        "vehicle_status_name": vehicle.status.vehicle_status_name if vehicle.status else None,
-        "insurance_ref": vehicle.insurance.insurance_ref if vehicle.insurance else None
-    }
+    return vehicle
 
 # Create a new vehicle with photo upload
 @router.post("/vehicles", response_model=VehicleResponse)
@@ -132,24 +123,22 @@ async def create_vehicle(
     capacity_kg: Optional[float] = Form(None),
     volume_litre: Optional[float] = Form(None),
     photo: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     check_user_role(current_user, "Admin")
-    if db.query(Vehicle).filter(Vehicle.license_plate == license_plate).first():
+    if await db.scalar(select(Vehicle.id).where(Vehicle.license_plate == license_plate)):
         raise HTTPException(status_code=400, detail="License plate already exists")
-    if type_id and not db.query(VehicleType).filter(VehicleType.id == type_id).first():
+    if type_id and not await reference_exists(db, "vehicle_types", type_id):
         raise HTTPException(status_code=400, detail="Invalid type_id")
-    if status_id and not db.query(VehicleStatus).filter(VehicleStatus.id == status_id).first():
+    if status_id and not await reference_exists(db, "vehicle_statuses", status_id):
         raise HTTPException(status_code=400, detail="Invalid status_id")
-    if insurance_id and not db.query(Insurance).filter(Insurance.id == insurance_id).first():
+    if insurance_id and not await reference_exists(db, "insurances", insurance_id):
         raise HTTPException(status_code=400, detail="Invalid insurance_id")
 
     photo_file_path = None
     if photo:
-        photo_file_path = os.path.join(UPLOAD_DIR, photo.filename)
-        with open(photo_file_path, "wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
+        photo_file_path = await save_photo(db, photo)
 
     db_vehicle = Vehicle(
         license_plate=license_plate,
@@ -164,24 +153,22 @@ async def create_vehicle(
         photo_file=photo_file_path
     )
     db.add(db_vehicle)
-    db.commit()
-    db.refresh(db_vehicle)
-    return {
-        "id": db_vehicle.id,
-        "license_plate": db_vehicle.license_plate,
-        "make": db_vehicle.make,
-        "model": db_vehicle.model,
-        "color": db_vehicle.color,
-        "type_id": db_vehicle.type_id,
-        "status_id": db_vehicle.status_id,
-        "insurance_id": db_vehicle.insurance_id,
-        "capacity_kg": db_vehicle.capacity_kg,
-        "volume_litre": db_vehicle.volume_litre,
-        "photo_file": db_vehicle.photo_file,
-        "vehicle_type_name": db_vehicle.type.vehicle_type_name if db_vehicle.type else None,
-        "vehicle_status_name": db_vehicle.status.vehicle_status_name if db_vehicle.status else None,
-        "insurance_ref": db_vehicle.insurance.insurance_ref if db_vehicle.insurance else None
-    }
+    await db.commit()
+    dashboard.vehicle_added(status_id)
+    events.vehicle_changed("created", db_vehicle.id)
+    return await get_vehicle(db, db_vehicle.id)
+
+# Bulk import vehicles from a CSV (header row) or NDJSON file. Invalid rows are
+# skipped and reported by line number; valid rows are committed in batches.
+@router.post("/vehicles/import", response_model=dict)
+async def import_vehicles(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    check_user_role(current_user, "Admin")
+    return await import_rows(db, "vehicles", file, format)
 
 # Update a vehicle with photo upload
 @router.put("/vehicles/{vehicle_id}", response_model=VehicleResponse)
@@ -197,30 +184,28 @@ async def update_vehicle(
     capacity_kg: Optional[float] = Form(None),
     volume_litre: Optional[float] = Form(None),
     photo: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     check_user_role(current_user, "Admin")
-    db_vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    db_vehicle = await db.get(Vehicle, vehicle_id)
     if not db_vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    if license_plate != db_vehicle.license_plate and db.query(Vehicle).filter(Vehicle.license_plate == license_plate).first():
+    if license_plate != db_vehicle.license_plate and await db.scalar(select(Vehicle.id).where(Vehicle.license_plate == license_plate)):
         raise HTTPException(status_code=400, detail="License plate already exists")
-    if type_id and not db.query(VehicleType).filter(VehicleType.id == type_id).first():
+    if type_id and not await reference_exists(db, "vehicle_types", type_id):
         raise HTTPException(status_code=400, detail="Invalid type_id")
-    if status_id and not db.query(VehicleStatus).filter(VehicleStatus.id == status_id).first():
+    if status_id and not await reference_exists(db, "vehicle_statuses", status_id):
         raise HTTPException(status_code=400, detail="Invalid status_id")
-    if insurance_id and not db.query(Insurance).filter(Insurance.id == insurance_id).first():
+    if insurance_id and not await reference_exists(db, "insurances", insurance_id):
         raise HTTPException(status_code=400, detail="Invalid insurance_id")
 
     if photo:
-        if db_vehicle.photo_file and os.path.exists(db_vehicle.photo_file):
-            os.remove(db_vehicle.photo_file)
-        photo_file_path = os.path.join(UPLOAD_DIR, photo.filename)
-        with open(photo_file_path, "wb") as buffer:
-            shutil.copyfileobj(photo.file, buffer)
-        db_vehicle.photo_file = photo_file_path
+        old_photo_file = db_vehicle.photo_file
+        db_vehicle.photo_file = await save_photo(db, photo)
+        await release_photo(db, old_photo_file)
 
+    old_status_id = db_vehicle.status_id
     db_vehicle.license_plate = license_plate
     db_vehicle.make = make
     db_vehicle.model = model
@@ -231,103 +216,81 @@ async def update_vehicle(
     db_vehicle.capacity_kg = capacity_kg
     db_vehicle.volume_litre = volume_litre
 
-    db.commit()
-    db.refresh(db_vehicle)
-    return {
-        "id": db_vehicle.id,
-        "license_plate": db_vehicle.license_plate,
-        "make": db_vehicle.make,
-        "model": db_vehicle.model,
-        "color": db_vehicle.color,
-        "type_id": db_vehicle.type_id,
-        "status_id": db_vehicle.status_id,
-        "insurance_id": db_vehicle.insurance_id,
-        "capacity_kg": db_vehicle.capacity_kg,
-        "volume_litre": db_vehicle.volume_litre,
-        "photo_file": db_vehicle.photo_file,
-        "vehicle_type_name": db_vehicle.type.vehicle_type_name if db_vehicle.type else None,
-        "vehicle_status_name": db_vehicle.status.vehicle_status_name if db_vehicle.status else None,
-        "insurance_ref": db_vehicle.insurance.insurance_ref if db_vehicle.insurance else None
-    }
+    await db.commit()
+    dashboard.vehicle_status_changed(old_status_id, status_id)
+    events.vehicle_changed("updated", vehicle_id)
+    return await get_vehicle(db, db_vehicle.id)
 
 # Delete a vehicle
 @router.delete("/vehicles/{vehicle_id}", response_model=dict)
-def delete_vehicle(vehicle_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def delete_vehicle(vehicle_id: int, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    db_vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    db_vehicle = await db.get(Vehicle, vehicle_id)
     if not db_vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
     # Check if the vehicle is currently assigned to an employee
-    active_assignment = db.query(VehicleAssign).filter(
-        (VehicleAssign.vehicle_id == vehicle_id) & 
-        (VehicleAssign.end_date.is_(None))
-    ).first()
-    if active_assignment:
-        assigned_employee = db.query(Employee).filter(Employee.id == active_assignment.employee_id).first()
+    current = await db.get(CurrentVehicleAssign, vehicle_id)
+    if current:
+        assigned_employee = await db.get(Employee, current.employee_id)
         raise HTTPException(
             status_code=403,
             detail=f"Cannot delete vehicle. It is currently assigned to {assigned_employee.firstname} {assigned_employee.lastname}."
         )
     
     # Clean up any orphaned assignments (historical data fix)
-    orphaned_assignments = db.query(VehicleAssign).filter(VehicleAssign.vehicle_id == vehicle_id).all()
+    orphaned_assignments = await db.scalars(select(VehicleAssign).where(VehicleAssign.vehicle_id == vehicle_id))
     for assignment in orphaned_assignments:
-        db.delete(assignment)
+        await db.delete(assignment)
     
     # Proceed with deletion
-    if db_vehicle.photo_file and os.path.exists(db_vehicle.photo_file):
-        os.remove(db_vehicle.photo_file)
-    db.delete(db_vehicle)
-    db.commit()
+    await release_photo(db, db_vehicle.photo_file)
+    await db.delete(db_vehicle)
+    await db.commit()
+    dashboard.vehicle_removed(db_vehicle.status_id)
+    events.vehicle_changed("deleted", vehicle_id)
     return {"message": "Vehicle deleted successfully"}
 
 # Get all vehicle types
 @router.get("/vehicle_types", response_model=List[dict])
-def read_vehicle_types(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_vehicle_types(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    types = db.query(VehicleType).all()
-    return [{"id": type_.id, "vehicle_type_name": type_.vehicle_type_name} for type_ in types]
+    return await reference_list(db, request, response, "vehicle_types")
 
 # Get all vehicle statuses
 @router.get("/vehicle_statuses", response_model=List[dict])
-def read_vehicle_statuses(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_vehicle_statuses(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    statuses = db.query(VehicleStatus).all()
-    return [{"id": status.id, "vehicle_status_name": status.vehicle_status_name} for status in statuses]
+    return await reference_list(db, request, response, "vehicle_statuses")
 
 # Get all insurances
 @router.get("/insurances", response_model=List[dict])
-def read_insurances(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def read_insurances(request: Request, response: Response, db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    insurances = db.query(Insurance).all()
-    return [{"id": ins.id, "insurance_ref": ins.insurance_ref} for ins in insurances]
+    return await reference_list(db, request, response, "insurances")
 
 # Assign a vehicle to an employee
 @router.post("/vehicle_assign", response_model=dict)
-def assign_vehicle(
+async def assign_vehicle(
     assignment: VehicleAssignCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     check_user_role(current_user, "Admin")
 
     # Check if vehicle and employee exist
-    vehicle = db.query(Vehicle).filter(Vehicle.id == assignment.vehicle_id).first()
+    vehicle = await db.get(Vehicle, assignment.vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    employee = db.query(Employee).filter(Employee.id == assignment.employee_id).first()
+    employee = await db.get(Employee, assignment.employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
 
     # Check for existing active assignment for this vehicle
-    active_assignment = db.query(VehicleAssign).filter(
-        (VehicleAssign.vehicle_id == assignment.vehicle_id) & 
-        (VehicleAssign.end_date.is_(None))
-    ).first()
+    current = await db.get(CurrentVehicleAssign, assignment.vehicle_id)
 
-    if active_assignment:
-        assigned_employee = db.query(Employee).filter(Employee.id == active_assignment.employee_id).first()
+    if current:
+        assigned_employee = await db.get(Employee, current.employee_id)
         raise HTTPException(
             status_code=403,
             detail=f"This vehicle is already assigned to {assigned_employee.firstname} {assigned_employee.lastname}. This operation is not permitted."
@@ -344,95 +307,62 @@ def assign_vehicle(
         end_date=None  # Active assignment
     )
     db.add(new_assignment)
-    db.commit()
-    db.refresh(new_assignment)
+    try:
+        await db.flush()
+        # The read model row commits with the assignment or not at all
+        db.add(CurrentVehicleAssign(
+            vehicle_id=assignment.vehicle_id,
+            employee_id=assignment.employee_id,
+            assign_id=new_assignment.id,
+            assigned_at=current_time,
+        ))
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request assigned the vehicle after the check above;
+        # the read model's primary key rejected this one
+        await db.rollback()
+        raise HTTPException(status_code=403, detail="This vehicle is already assigned. This operation is not permitted.")
+    dashboard.vehicle_assigned(vehicle.status_id)
+    events.assignment_changed("assigned", assignment.vehicle_id, assignment.employee_id)
 
     return {"message": "Vehicle assigned successfully"}
 
 # Unassign a vehicle from an employee
 @router.post("/vehicle_unassign", response_model=dict)
-def unassign_vehicle(
+async def unassign_vehicle(
     request: VehicleUnassignRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     check_user_role(current_user, "Admin")
 
     # Check if vehicle exists
-    vehicle = db.query(Vehicle).filter(Vehicle.id == request.vehicle_id).first()
+    vehicle = await db.get(Vehicle, request.vehicle_id)
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
 
     # Find active assignment for this vehicle
-    active_assignment = db.query(VehicleAssign).filter(
-        (VehicleAssign.vehicle_id == request.vehicle_id) & 
-        (VehicleAssign.end_date.is_(None))
-    ).first()
+    current = await db.get(CurrentVehicleAssign, request.vehicle_id)
 
-    if not active_assignment:
+    if not current:
         raise HTTPException(status_code=400, detail="Vehicle is not currently assigned to any employee")
 
-    # Set end_date to current time to mark assignment as inactive
+    # Set end_date to current time to mark assignment as inactive; the read
+    # model row goes in the same transaction
+    active_assignment = await db.get(VehicleAssign, current.assign_id)
     current_time = datetime.utcnow()
     active_assignment.end_date = current_time
     active_assignment.updated_at = current_time
+    await db.delete(current)
 
-    db.commit()
-    db.refresh(active_assignment)
+    await db.commit()
+    dashboard.vehicle_unassigned(vehicle.status_id)
+    events.assignment_changed("unassigned", request.vehicle_id, current.employee_id)
 
     return {"message": "Vehicle unassigned successfully"}
 
 # Get vehicle status distribution for pie chart
 @router.get("/vehicle_status_distribution", response_model=List[dict])
-def get_vehicle_status_distribution(db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+async def get_vehicle_status_distribution(db: AsyncSession = Depends(get_db), current_user: Principal = Depends(get_current_active_user)):
     check_user_role(current_user, "Admin")
-    
-    # Get status IDs for "disponible" and "maintenance" (lowercase to match DB)
-    disponible_status = db.query(VehicleStatus).filter(VehicleStatus.vehicle_status_name == "disponible").first()
-    maintenance_status = db.query(VehicleStatus).filter(VehicleStatus.vehicle_status_name == "maintenance").first()
-    
-    if not disponible_status or not maintenance_status:
-        missing = []
-        if not disponible_status:
-            missing.append("'disponible'")
-        if not maintenance_status:
-            missing.append("'maintenance'")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Required status names {', '.join(missing)} not found in database"
-        )
-        
-    disponible_status_id = disponible_status.id  # 1
-    maintenance_status_id = maintenance_status.id  # 2
-
-    # Count assigned vehicles (active assignments in VehicleAssign OR status_id = "assigne")
-    assigned_count = (
-        db.query(Vehicle)
-        .outerjoin(VehicleAssign, (VehicleAssign.vehicle_id == Vehicle.id) & (VehicleAssign.end_date.is_(None)))
-        .filter(
-            (VehicleAssign.vehicle_id.isnot(None)) |  # Active assignment
-            (Vehicle.status_id == 3)  # OR status_id = "assigne"
-        )
-        .distinct()  # Avoid double-counting if a vehicle is both assigned and has status "assigne"
-        .count()
-    )
-
-    # Count available vehicles (status_id = "disponible" and no active assignment)
-    available_count = (
-        db.query(Vehicle)
-        .filter(Vehicle.status_id == disponible_status_id)
-        .outerjoin(VehicleAssign, (VehicleAssign.vehicle_id == Vehicle.id) & (VehicleAssign.end_date.is_(None)))
-        .filter(VehicleAssign.vehicle_id.is_(None))  # No active assignment
-        .count()
-    )
-    
-# Count maintenance vehicles (status_id = "maintenance")
-    maintenance_count = db.query(Vehicle).filter(Vehicle.status_id == maintenance_status_id).count()
-
-    # Return distribution with user-friendly labels
-    return [
-        {"status_name": "Available", "count": available_count},
-        {"status_name": "In Maintenance", "count": maintenance_count},
-        {"status_name": "Assigned", "count": assigned_count}
-    ]
-
+    return await dashboard.get_vehicle_status_distribution(db)
@@ -0,0 +1,267 @@
+import codecs
+import csv
+import json
+import os
+from datetime import date, datetime
+import anyio
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Employee, Vehicle
+from app.services.conditional import mark_changed
+from app.services.dashboard import invalidate_dashboard
+from app.services.events import fleet_reloaded
+from app.services.reference_data import get_reference_ids, invalidate_reference_data
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+MAX_IMPORT_ERRORS = int(os.getenv("MAX_IMPORT_ERRORS", "1000"))
+# COPY is used on asyncpg connections; other drivers get multi-row INSERTs
+IMPORT_USE_COPY = os.getenv("IMPORT_USE_COPY", "true").lower() in ("1", "true", "yes")
+
+def _text(value):
+    value = str(value).strip()
+    return value or None
+
+def _int(value):
+    return int(value) if _text(value) is not None else None
+
+def _float(value):
+    return float(value) if _text(value) is not None else None
+
+def _date(value):
+    return date.fromisoformat(str(value).strip()) if _text(value) is not None else None
+
+# Column -> (parser, required)
+VEHICLE_FIELDS = {
+    "license_plate": (_text, True),
+    "make": (_text, True),
+    "model": (_text, True),
+    "color": (_text, False),
+    "type_id": (_int, False),
+    "status_id": (_int, False),
+    "insurance_id": (_int, False),
+    "capacity_kg": (_float, False),
+    "volume_litre": (_float, False),
+}
+
+EMPLOYEE_FIELDS = {
+    "firstname": (_text, True),
+    "lastname": (_text, True),
+    "email": (_text, True),
+    "birth_date": (_date, False),
+    "hire_date": (_date, False),
+    "function_id": (_int, False),
+    "status_id": (_int, False),
+    "line1": (_text, False),
+    "line2": (_text, False),
+    "line3": (_text, False),
+    "postalcode": (_text, False),
+    "town": (_text, False),
+    "state": (_text, False),
+    "country": (_text, False),
+    "license_id": (_int, False),
+}
+
+# name -> (model, fields, unique column, {foreign key column: lookup table})
+IMPORT_TABLES = {
+    "vehicles": (Vehicle, VEHICLE_FIELDS, "license_plate", {
+        "type_id": "vehicle_types",
+        "status_id": "vehicle_statuses",
+        "insurance_id": "insurances",
+    }),
+    "employees": (Employee, EMPLOYEE_FIELDS, "email", {
+        "function_id": "employee_functions",
+        "status_id": "employee_statuses",
+        "license_id": "driving_licenses",
+    }),
+}
+
+def detect_format(upload: UploadFile, fmt=None):
+    if fmt:
+        return fmt
+    filename = (upload.filename or "").lower()
+    if filename.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if filename.endswith(".csv"):
+        return "csv"
+    return "ndjson" if "json" in (upload.content_type or "") else "csv"
+
+# Reads the spooled upload a batch at a time; runs in a worker thread
+class _RowReader:
+    def __init__(self, file, fmt):
+        self._lines = codecs.iterdecode(file, "utf-8-sig")
+        self._fmt = fmt
+        self._line = 0
+        if fmt == "csv":
+            self._csv = csv.DictReader(self._lines)
+
+    def _next_csv(self):
+        row = next(self._csv)
+        if None in row:
+            return self._csv.line_num, "Too many values"
+        return self._csv.line_num, {key.strip(): value for key, value in row.items() if key}
+
+    def _next_ndjson(self):
+        while True:
+            text = next(self._lines)
+            self._line += 1
+            if text.strip():
+                break
+        try:
+            row = json.loads(text)
+        except ValueError:
+            return self._line, "Invalid JSON"
+        if not isinstance(row, dict):
+            return self._line, "Expected a JSON object"
+        return self._line, row
+
+    # [(line, dict of raw values or an error message)], empty at end of file
+    def read_batch(self, size):
+        batch = []
+        read = self._next_csv if self._fmt == "csv" else self._next_ndjson
+        try:
+            while len(batch) < size:
+                batch.append(read())
+        except StopIteration:
+            pass
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPException(status_code=400, detail=f"Unreadable import file: {exc}")
+        return batch
+
+def _parse(fields, raw):
+    values, errors = {}, {}
+    for column, (parser, required) in fields.items():
+        value = raw.get(column)
+        try:
+            values[column] = parser(value) if value is not None else None
+        except (TypeError, ValueError):
+            errors[column] = "Invalid value"
+            continue
+        if required and values[column] is None:
+            errors[column] = "Field required"
+    return values, errors
+
+# COPY goes to asyncpg directly: it bypasses the engine's cursor hooks, so it
+# is missing from the request SQL metrics, and its errors are asyncpg's own.
+# Constraint violations are raised as IntegrityError like the INSERT path's,
+# and the list ETags are told about the new rows.
+async def _insert(db: AsyncSession, model, rows):
+    conn = await db.connection()
+    if IMPORT_USE_COPY and conn.dialect.driver == "asyncpg":
+        from asyncpg.exceptions import IntegrityConstraintViolationError
+
+        columns = list(rows[0])
+        raw = await conn.get_raw_connection()
+        try:
+            await raw.driver_connection.copy_records_to_table(
+                model.__tablename__,
+                records=[tuple(row[column] for column in columns) for row in rows],
+                columns=columns,
+            )
+        except IntegrityConstraintViolationError as exc:
+            raise IntegrityError(f"COPY {model.__tablename__}", None, exc) from exc
+        mark_changed(db, model.__tablename__)
+    else:
+        await db.execute(insert(model), rows)
+
+class _Import:
+    def __init__(self, db: AsyncSession, name: str):
+        self.db = db
+        self.model, self.fields, self.unique, self.references = IMPORT_TABLES[name]
+        self.seen = {}
+        self.refreshed = set()
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def reject(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    # A foreign key missing from the cache reloads that table once per import
+    async def reference_ids(self, table, row_id):
+        ids = await get_reference_ids(self.db, table)
+        if row_id not in ids and table not in self.refreshed:
+            self.refreshed.add(table)
+            invalidate_reference_data(table)
+            ids = await get_reference_ids(self.db, table)
+        return ids
+
+    async def load_batch(self, batch):
+        candidates = []
+        for line, raw in batch:
+            if isinstance(raw, str):
+                self.reject(line, {"row": raw})
+                continue
+            values, errors = _parse(self.fields, raw)
+            for column, table in self.references.items():
+                row_id = values.get(column)
+                if row_id is not None and column not in errors:
+                    if row_id not in await self.reference_ids(table, row_id):
+                        errors[column] = f"Unknown {column}"
+            key = values.get(self.unique)
+            if key is not None and key in self.seen:
+                errors[self.unique] = f"Duplicate {self.unique} in file (line {self.seen[key]})"
+            if errors:
+                self.reject(line, errors)
+                continue
+            self.seen[key] = line
+            candidates.append((line, values))
+        if not candidates:
+            return
+
+        unique_column = getattr(self.model, self.unique)
+        existing = set(await self.db.scalars(
+            select(unique_column).where(unique_column.in_([values[self.unique] for _, values in candidates]))
+        ))
+        rows, lines = [], []
+        now = datetime.utcnow()
+        for line, values in candidates:
+            if values[self.unique] in existing:
+                self.reject(line, {self.unique: f"{self.unique} already exists"})
+            else:
+                rows.append({**values, "created_at": now, "updated_at": now})
+                lines.append(line)
+        if not rows:
+            return
+
+        try:
+            await _insert(self.db, self.model, rows)
+            await self.db.commit()
+        except IntegrityError as exc:
+            # Only reachable when another writer inserted a conflicting row
+            # after the duplicate check; the whole chunk is rolled back
+            await self.db.rollback()
+            message = str(exc.orig).splitlines()[0]
+            for line, row in zip(lines, rows):
+                self.seen.pop(row[self.unique], None)
+                self.reject(line, {"row": f"Batch rejected: {message}"})
+            return
+        self.inserted += len(rows)
+
+    def report(self, fmt):
+        return {
+            "format": fmt,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+# Validates and loads an uploaded CSV or NDJSON file into `name` in chunked
+# transactions of IMPORT_BATCH_SIZE rows. Rows that fail validation are
+# skipped and listed in the report by line number.
+async def import_rows(db: AsyncSession, name: str, upload: UploadFile, fmt=None):
+    fmt = detect_format(upload, fmt)
+    job = _Import(db, name)
+    reader = _RowReader(upload.file, fmt)
+    try:
+        while batch := await anyio.to_thread.run_sync(reader.read_batch, IMPORT_BATCH_SIZE):
+            await job.load_batch(batch)
+    finally:
+        if job.inserted:
+            invalidate_dashboard()
+            fleet_reloaded()
+    return job.report(fmt)
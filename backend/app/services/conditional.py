@@ -0,0 +1,105 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+import orjson
+from fastapi import Request, Response
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.models import (
+    Customer, CurrentVehicleAssign, DrivingLicense, Employee, EmployeeFunction, EmployeeStatus, Insurance,
+    Order, OrdersStatus, TableVersion, Vehicle, VehicleStatus, VehicleType,
+)
+from app.services.file_serving import REVALIDATE_CACHE_CONTROL, etag_matches
+from app.services.reference_data import get_reference_rows
+
+# Tables each list response is built from: a change to any of them changes
+# the list's ETag
+LIST_SOURCES = {
+    "employees": (Employee, EmployeeFunction, EmployeeStatus, DrivingLicense, CurrentVehicleAssign, Vehicle),
+    "vehicles": (Vehicle, VehicleType, VehicleStatus, Insurance),
+    "orders": (Order, OrdersStatus, Customer),
+}
+_TRACKED = frozenset(model.__tablename__ for models in LIST_SOURCES.values() for model in models)
+
+# (commit counter, last commit time) of every table, (None, None) for one
+# never changed since table_version was created. The counters are bumped as
+# each transaction commits, so unlike max(updated_at) they also move for a
+# transaction that flushed before another writer and commits after it, and
+# reading them is a primary-key lookup rather than a scan of every table.
+async def table_versions(db: AsyncSession, models):
+    names = [model.__tablename__ for model in models]
+    stmt = select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at) \
+        .where(TableVersion.table_name.in_(names))
+    found = {name: (version, updated_at) for name, version, updated_at in await db.execute(stmt)}
+    return [found.get(name, (None, None)) for name in names]
+
+# Writes made outside a Session (COPY, a raw connection) are invisible to
+# the hooks below, so the list ETags miss them unless the caller records
+# the table here before committing
+def mark_changed(db, *tables):
+    db.info.setdefault("changed_tables", set()).update(set(tables) & _TRACKED)
+
+def _track(session, objects):
+    mark_changed(session, *(obj.__table__.name for obj in objects))
+
+@event.listens_for(Session, "before_flush")
+def _track_flush(session, flush_context, instances):
+    _track(session, (*session.new, *session.dirty, *session.deleted))
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_statement(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        mark_changed(state.session, state.statement.table.name)
+
+# The counters are bumped last thing before COMMIT, in table name order, so
+# writers to the same table wait on the row only while committing. Objects
+# still pending are flushed after this hook, in the same transaction.
+@event.listens_for(Session, "before_commit")
+def _bump_table_versions(session):
+    _track(session, (*session.new, *session.dirty, *session.deleted))
+    tables = session.info.pop("changed_tables", None)
+    if not tables:
+        return
+    conn = session.connection()
+    insert = postgresql.insert if conn.dialect.name == "postgresql" else sqlite.insert
+    table = TableVersion.__table__
+    now = datetime.utcnow()
+    for name in sorted(tables):
+        conn.execute(insert(table).values(table_name=name, version=1, updated_at=now).on_conflict_do_update(
+            index_elements=[table.c.table_name], set_={"version": table.c.version + 1, "updated_at": now},
+        ))
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_changed_tables(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("changed_tables", None)
+
+# Sets the validators on `response`, or returns a 304 when the client
+# already holds this version
+def _conditional(request: Request, response: Response, etag: str, last_modified=None):
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+# Conditional GET for a list endpoint. The weak ETag hashes the source table
+# versions with the query string (filters, sort, cursor, limit), so an
+# unchanged reload costs one primary-key lookup in table_version and no body.
+async def check_list_not_modified(db: AsyncSession, request: Request, response: Response, name: str):
+    versions = await table_versions(db, LIST_SOURCES[name])
+    key = repr((name, [version for version, _ in versions], request.url.query)).encode()
+    etag = f'W/"{hashlib.blake2b(key, digest_size=12).hexdigest()}"'
+    modified = [modified for _, modified in versions if modified is not None]
+    return _conditional(request, response, etag, max(modified) if modified else None)
+
+# Rows of a lookup table, or a 304. The ETag hashes the cached rows, so it
+# costs no query and is the same in every worker holding the same data.
+async def reference_list(db: AsyncSession, request: Request, response: Response, name: str):
+    rows = await get_reference_rows(db, name)
+    etag = f'W/"{hashlib.blake2b(orjson.dumps(rows), digest_size=12).hexdigest()}"'
+    return _conditional(request, response, etag) or rows
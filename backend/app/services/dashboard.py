@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from collections import Counter
+from fastapi import HTTPException
+from sqlalchemy import case, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import CurrentVehicleAssign, Employee, Vehicle
+from app.services.invalidation import notify, publish, register
+from app.services.reference_data import find_reference_id, get_reference_rows
+
+# Counters are kept in memory and adjusted by the write handlers. The TTL
+# bounds drift from writers outside this process (other workers, psql).
+DASHBOARD_COUNTERS = os.getenv("DASHBOARD_COUNTERS", "true").lower() in ("1", "true", "yes")
+DASHBOARD_COUNTERS_TTL_SECONDS = float(os.getenv("DASHBOARD_COUNTERS_TTL_SECONDS", "30"))
+
+# (expires_at, vehicles: (status_id, assigned) -> n, employees: status_id -> n)
+_counts = None
+# Bumped by every delta so a recount that raced with a write is not installed
+_generation = 0
+_lock = threading.Lock()
+
+def _counts_statement():
+    assigned = case((CurrentVehicleAssign.vehicle_id.isnot(None), 1), else_=0)
+    vehicles = (
+        select(literal("vehicle").label("kind"), Vehicle.status_id, assigned.label("assigned"), func.count().label("count"))
+        .select_from(Vehicle)
+        .outerjoin(CurrentVehicleAssign, CurrentVehicleAssign.vehicle_id == Vehicle.id)
+        .group_by(Vehicle.status_id, assigned)
+    )
+    employees = (
+        select(literal("employee").label("kind"), Employee.status_id, literal(0).label("assigned"), func.count().label("count"))
+        .group_by(Employee.status_id)
+    )
+    return union_all(vehicles, employees)
+
+# Both fleet and staff counts in a single grouped statement
+async def _load(db: AsyncSession):
+    global _counts
+    generation = _generation
+    vehicles, employees = Counter(), Counter()
+    for kind, status_id, assigned, count in await db.execute(_counts_statement()):
+        if kind == "vehicle":
+            vehicles[(status_id, bool(assigned))] += count
+        else:
+            employees[status_id] += count
+    entry = (time.monotonic() + DASHBOARD_COUNTERS_TTL_SECONDS, vehicles, employees)
+    if DASHBOARD_COUNTERS:
+        with _lock:
+            if generation == _generation:
+                _counts = entry
+    return entry
+
+async def _snapshot(db: AsyncSession):
+    with _lock:
+        entry = _counts
+        if entry is not None and entry[0] > time.monotonic():
+            return Counter(entry[1]), Counter(entry[2])
+    entry = await _load(db)
+    return entry[1], entry[2]
+
+async def _vehicle_status_id(db: AsyncSession, name: str):
+    return await find_reference_id(db, "vehicle_statuses", "vehicle_status_name", name)
+
+def _vehicle_distribution(vehicles, disponible_id, maintenance_id, assigne_id):
+    # A vehicle counts as assigned when it has an active assignment or its
+    # status is "assigne"; maintenance is reported whatever the assignment.
+    available = maintenance = assigned = 0
+    for (status_id, is_assigned), count in vehicles.items():
+        if is_assigned or (assigne_id is not None and status_id == assigne_id):
+            assigned += count
+        elif status_id == disponible_id:
+            available += count
+        if status_id == maintenance_id:
+            maintenance += count
+    return [
+        {"status_name": "Available", "count": available},
+        {"status_name": "In Maintenance", "count": maintenance},
+        {"status_name": "Assigned", "count": assigned},
+    ]
+
+async def get_vehicle_status_distribution(db: AsyncSession, vehicles=None):
+    # Status ids are resolved by name (lowercase to match DB)
+    disponible_id = await _vehicle_status_id(db, "disponible")
+    maintenance_id = await _vehicle_status_id(db, "maintenance")
+    assigne_id = await _vehicle_status_id(db, "assigne")
+    if not disponible_id or not maintenance_id:
+        missing = []
+        if not disponible_id:
+            missing.append("'disponible'")
+        if not maintenance_id:
+            missing.append("'maintenance'")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Required status names {', '.join(missing)} not found in database"
+        )
+    if vehicles is None:
+        vehicles, _ = await _snapshot(db)
+    return _vehicle_distribution(vehicles, disponible_id, maintenance_id, assigne_id)
+
+async def get_employee_status_distribution(db: AsyncSession, employees=None):
+    if employees is None:
+        _, employees = await _snapshot(db)
+    return [
+        {"status_name": row["name"] if row["name"] else "No Status", "count": employees.get(row["id"], 0)}
+        for row in await get_reference_rows(db, "employee_statuses")
+    ]
+
+async def get_dashboard_stats(db: AsyncSession):
+    vehicles, employees = await _snapshot(db)
+    return {
+        "employee_status_distribution": await get_employee_status_distribution(db, employees),
+        "vehicle_status_distribution": await get_vehicle_status_distribution(db, vehicles),
+    }
+
+# Incremental updates, called by the write handlers after their commit.
+# Other workers cannot apply the delta to counts they loaded at another time,
+# so they recount on their next read instead.
+def _apply(vehicles=(), employees=()):
+    global _generation
+    with _lock:
+        _generation += 1
+        if _counts is not None:
+            for key, delta in vehicles:
+                _counts[1][key] += delta
+            for key, delta in employees:
+                _counts[2][key] += delta
+    notify("dashboard")
+
+def vehicle_added(status_id):
+    _apply(vehicles=[((status_id, False), 1)])
+
+def vehicle_removed(status_id):
+    _apply(vehicles=[((status_id, False), -1)])
+
+def vehicle_assigned(status_id):
+    _apply(vehicles=[((status_id, False), -1), ((status_id, True), 1)])
+
+def vehicle_unassigned(status_id):
+    _apply(vehicles=[((status_id, True), -1), ((status_id, False), 1)])
+
+# The handler does not know whether the vehicle is assigned, so a status
+# change falls back to a recount on the next read
+def vehicle_status_changed(old_status_id, new_status_id):
+    if old_status_id != new_status_id:
+        invalidate_dashboard()
+
+def employee_added(status_id):
+    _apply(employees=[(status_id, 1)])
+
+def employee_removed(status_id):
+    _apply(employees=[(status_id, -1)])
+
+def employee_status_changed(old_status_id, new_status_id):
+    if old_status_id != new_status_id:
+        _apply(employees=[(old_status_id, -1), (new_status_id, 1)])
+
+def _reset():
+    global _counts, _generation
+    with _lock:
+        _generation += 1
+        _counts = None
+
+register("dashboard", lambda *keys: _reset())
+
+def invalidate_dashboard():
+    publish("dashboard")
@@ -0,0 +1,98 @@
+import os
+import threading
+
+EARTH_RADIUS_KM = 6371.0088
+# Straight-line distance times this factor approximates the road distance
+DISTANCE_ROAD_FACTOR = float(os.getenv("DISTANCE_ROAD_FACTOR", "1.3"))
+# Address pairs kept in memory; matrices with more pairs than this skip the
+# cache, since computing them is cheaper than millions of dict lookups
+DISTANCE_CACHE_SIZE = int(os.getenv("DISTANCE_CACHE_SIZE", "200000"))
+# Rows computed per batch when building a large matrix, bounding temporaries
+MATRIX_BATCH_ROWS = 512
+
+# numpy is imported by the functions that use it: only routing needs it, and
+# importing it at module level added ~60ms to every worker's startup
+
+# Great-circle distance in km between coordinates given in degrees. Arrays
+# broadcast, so an (n, 1) column against an (m,) row gives an (n, m) matrix.
+def haversine_km(lat1, lon1, lat2, lon2):
+    import numpy as np
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(a, dtype=float)) for a in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+# Dense symmetric matrix of road-factor distances, float32 to halve memory
+def distance_matrix(lats, lons, road_factor: float = DISTANCE_ROAD_FACTOR):
+    import numpy as np
+
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    n = len(lats)
+    matrix = np.empty((n, n), dtype=np.float32)
+    for start in range(0, n, MATRIX_BATCH_ROWS):
+        stop = min(start + MATRIX_BATCH_ROWS, n)
+        matrix[start:stop] = haversine_km(lats[start:stop, None], lons[start:stop, None], lats, lons) * road_factor
+    return matrix
+
+# Distances between addresses keyed by the (smaller id, larger id) pair.
+# Misses are computed together in one vectorized batch; the oldest pairs are
+# dropped first once the cache is full.
+class DistanceCache:
+    def __init__(self, size: int = DISTANCE_CACHE_SIZE, road_factor: float = DISTANCE_ROAD_FACTOR):
+        self.size = size
+        self.road_factor = road_factor
+        self._pairs = {}
+        self._lock = threading.Lock()
+
+    def matrix(self, address_ids, lats, lons):
+        import numpy as np
+
+        n = len(address_ids)
+        if n * (n - 1) // 2 > self.size:
+            return distance_matrix(lats, lons, self.road_factor)
+        ids = np.asarray(address_ids, dtype=np.int64)
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        rows, cols = np.triu_indices(n, k=1)
+        keys = list(zip(np.minimum(ids[rows], ids[cols]).tolist(), np.maximum(ids[rows], ids[cols]).tolist()))
+
+        values = np.empty(len(keys))
+        missing = []
+        with self._lock:
+            for k, key in enumerate(keys):
+                value = self._pairs.get(key)
+                if value is None:
+                    missing.append(k)
+                else:
+                    values[k] = value
+        if missing:
+            missing = np.array(missing)
+            computed = haversine_km(
+                lats[rows[missing]], lons[rows[missing]], lats[cols[missing]], lons[cols[missing]]
+            ) * self.road_factor
+            values[missing] = computed
+            with self._lock:
+                for k, value in zip(missing.tolist(), computed.tolist()):
+                    self._pairs[keys[k]] = value
+                overflow = len(self._pairs) - self.size
+                if overflow > 0:
+                    for key in list(self._pairs)[:overflow]:
+                        del self._pairs[key]
+
+        matrix = np.zeros((n, n), dtype=np.float32)
+        matrix[rows, cols] = values
+        matrix[cols, rows] = values
+        return matrix
+
+    # Coordinates of an address changed: its pairs are stale
+    def invalidate(self, *address_ids):
+        with self._lock:
+            if not address_ids:
+                self._pairs.clear()
+                return
+            stale = set(address_ids)
+            for key in [key for key in self._pairs if key[0] in stale or key[1] in stale]:
+                del self._pairs[key]
+
+distance_cache = DistanceCache()
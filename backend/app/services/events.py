@@ -0,0 +1,131 @@
+import asyncio
+import os
+import orjson
+from app.services.invalidation import publish, register
+
+# Distinct pending events a subscriber may hold before it is told to reload
+# instead; a consumer that cannot keep up costs bounded memory
+EVENT_BUFFER_LIMIT = int(os.getenv("EVENT_BUFFER_LIMIT", "500"))
+# Events arriving within this window after the first one go out as one batch,
+# and repeated changes to one row within it collapse to the last
+EVENT_FLUSH_SECONDS = float(os.getenv("EVENT_FLUSH_SECONDS", "0.25"))
+# Comment lines keep idle connections open through proxies; one timer per
+# hub wakes every stream for them
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+EVENT_MAX_SUBSCRIBERS = int(os.getenv("EVENT_MAX_SUBSCRIBERS", "5000"))
+
+# Coalescing key: the row an event is about
+def _key(event):
+    if event["type"] == "assignment":
+        return ("assignment", event["vehicle_id"])
+    return (event["type"], event["id"])
+
+# One connected client: a dict of its pending events, latest per row, and
+# the event its stream waits on. An idle subscriber is just these objects.
+class Subscriber:
+    __slots__ = ("pending", "overflowed", "wake")
+
+    def __init__(self):
+        self.pending = {}
+        self.overflowed = False
+        self.wake = asyncio.Event()
+
+    def offer(self, event):
+        if not self.overflowed:
+            self.pending[_key(event)] = event
+            if len(self.pending) > EVENT_BUFFER_LIMIT:
+                self.resync()
+                return
+        self.wake.set()
+
+    def resync(self):
+        self.pending.clear()
+        self.overflowed = True
+        self.wake.set()
+
+    def drain(self):
+        events, overflowed = list(self.pending.values()), self.overflowed
+        self.pending.clear()
+        self.overflowed = False
+        self.wake.clear()
+        return events, overflowed
+
+# Fan-out to the subscribers of this worker. Delivery is a dict write and an
+# Event.set() per subscriber, all on the event loop; each stream does its own
+# waiting, batching and sending.
+class EventHub:
+    def __init__(self):
+        self._subscribers = set()
+        self._heartbeat = None
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self):
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.get_running_loop().create_task(self._beat())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    # Runs while anyone is subscribed. A woken stream with nothing pending
+    # sends a keepalive.
+    async def _beat(self):
+        while self._subscribers:
+            await asyncio.sleep(EVENT_HEARTBEAT_SECONDS)
+            for subscriber in self._subscribers:
+                subscriber.wake.set()
+
+    # No events: something was lost (oversized NOTIFY, reconnect), every
+    # client reloads
+    def deliver(self, *events):
+        for subscriber in self._subscribers:
+            if events:
+                for event in events:
+                    subscriber.offer(event)
+            else:
+                subscriber.resync()
+
+    # Server-sent events for one new subscriber: "delta" carries a JSON list
+    # of events, "resync" asks the client to reload what it shows. The
+    # subscription lives exactly as long as the generator runs.
+    async def stream(self):
+        subscriber = self.subscribe()
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                await subscriber.wake.wait()
+                if not subscriber.pending and not subscriber.overflowed:
+                    subscriber.wake.clear()
+                    yield ": keepalive\n\n"
+                    continue
+                await asyncio.sleep(EVENT_FLUSH_SECONDS)
+                events, overflowed = subscriber.drain()
+                if overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                if events:
+                    yield f"event: delta\ndata: {orjson.dumps(events).decode()}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+fleet_events = EventHub()
+
+register("fleet_events", fleet_events.deliver)
+
+# Called by the write handlers after their commit; reaches the subscribers
+# of every worker through the invalidation channel
+def vehicle_changed(op: str, vehicle_id: int):
+    publish("fleet_events", {"type": "vehicle", "op": op, "id": vehicle_id})
+
+def employee_changed(op: str, employee_id: int):
+    publish("fleet_events", {"type": "employee", "op": op, "id": employee_id})
+
+def assignment_changed(op: str, vehicle_id: int, employee_id: int):
+    publish("fleet_events", {"type": "assignment", "op": op, "vehicle_id": vehicle_id, "employee_id": employee_id})
+
+# Bulk imports change too many rows to describe
+def fleet_reloaded():
+    publish("fleet_events")
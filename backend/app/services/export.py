@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import or_
+from app.database.database import AsyncSessionLocal
+from app.models.models import Employee, Vehicle, VehicleAssign
+from app.queries.assignments import assignment_history_query
+from app.queries.employees import employee_rows_query
+from app.queries.vehicles import vehicle_rows_query
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Date range filters return the WHERE clauses for [start, end); either bound may be None
+def _created_between(column):
+    def where(start, end):
+        clauses = []
+        if start is not None:
+            clauses.append(column >= start)
+        if end is not None:
+            clauses.append(column < end)
+        return clauses
+    return where
+
+# An assignment is in range when its period overlaps [start, end)
+def _assigned_between(start, end):
+    clauses = []
+    if start is not None:
+        clauses.append(or_(VehicleAssign.end_date.is_(None), VehicleAssign.end_date >= start))
+    if end is not None:
+        clauses.append(VehicleAssign.created_at < end)
+    return clauses
+
+# name -> (projection, id column for ordering, date range filter)
+EXPORT_TABLES = {
+    "employees": (employee_rows_query, Employee.id, _created_between(Employee.created_at)),
+    "vehicles": (vehicle_rows_query, Vehicle.id, _created_between(Vehicle.created_at)),
+    "vehicle_assign": (assignment_history_query, VehicleAssign.id, _assigned_between),
+}
+
+def export_statement(name: str, date_from: date = None, date_to: date = None):
+    projection, id_column, date_filter = EXPORT_TABLES[name]
+    stmt = projection()
+    # date_to is inclusive: the range ends at midnight of the next day
+    start = datetime.combine(date_from, time.min) if date_from else None
+    end = datetime.combine(date_to, time.min) + timedelta(days=1) if date_to else None
+    clauses = date_filter(start, end)
+    if clauses:
+        stmt = stmt.where(*clauses)
+    return stmt.order_by(id_column).execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _csv_chunk(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+# Streams the statement as CSV or NDJSON, one chunk per fetched batch. The
+# session is owned by the generator so it lives as long as the response.
+async def stream_export(stmt, fmt: str):
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt)
+        if fmt == "csv":
+            yield _csv_chunk([list(result.keys())])
+            async for rows in result.partitions():
+                yield _csv_chunk(rows)
+        else:
+            async for rows in result.mappings().partitions():
+                yield "".join(json.dumps(dict(row), default=_json_default) + "\n" for row in rows).encode()
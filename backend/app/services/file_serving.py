@@ -0,0 +1,108 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+import anyio
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from app.services.storage import UPLOAD_DIR
+
+# <sha256>.<ext> originals and <sha256>_<size>.<ext> variants never change
+# content under the same name, so they can be cached forever
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{64}(_\d+)?\.[a-z]+$")
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+CHUNK_SIZE = 64 * 1024
+
+# When set (e.g. "/protected_uploads/"), the byte transfer is handed to nginx
+# through X-Accel-Redirect and the worker returns immediately
+UPLOADS_ACCEL_REDIRECT_PREFIX = os.getenv("UPLOADS_ACCEL_REDIRECT_PREFIX")
+
+# Path of an uploaded file from a request path segment. Anything that is not a
+# plain file name inside UPLOAD_DIR is reported as missing.
+def resolve_upload(filename: str):
+    if not filename or filename != os.path.basename(filename) or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="File not found")
+    path = os.path.join(UPLOAD_DIR, filename)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    return path
+
+# Weak comparison, as If-None-Match requires
+def etag_matches(if_none_match, etag: str):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+# (start, end) inclusive for a single satisfiable range, None when unsatisfiable,
+# "full" when the header should be ignored (multiple ranges or bad syntax)
+def _parse_range(range_header: str, size: int):
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return "full"
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return "full"
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or size == 0:
+        return None
+    return start, end
+
+async def _read_range(path: str, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as file:
+        await file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+# Serve a file from UPLOAD_DIR with validators, conditional GET and Range support
+async def serve_upload(request: Request, path: str):
+    stat = os.stat(path)
+    name = os.path.basename(path)
+    if _CONTENT_ADDRESSED.match(name):
+        etag = f'"{name}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        cache_control = REVALIDATE_CACHE_CONTROL
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if UPLOADS_ACCEL_REDIRECT_PREFIX:
+        # nginx answers Range and conditional requests itself for internal locations
+        relative = os.path.relpath(path, UPLOAD_DIR).replace(os.sep, "/")
+        headers["X-Accel-Redirect"] = UPLOADS_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative
+        return Response(headers=headers, media_type=media_type)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_range(range_header, stat.st_size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{stat.st_size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range != "full":
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _read_range(path, start, end), status_code=206, headers=headers, media_type=media_type
+            )
+    return FileResponse(path, headers=headers, media_type=media_type, stat_result=stat)
@@ -0,0 +1,85 @@
+import asyncio
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+# Derivatives generated for every stored photo, longest side in pixels
+VARIANT_SIZES = (64, 256)
+VARIANT_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+DEFAULT_VARIANT_FORMAT = "webp"
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+_executor = None
+# Variant path -> future of the render producing it, so concurrent requests
+# for a missing variant share one render
+_inflight = {}
+_background = set()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def variant_path(source_path: str, size: int, fmt: str):
+    directory, file_name = os.path.split(source_path)
+    stem = os.path.splitext(file_name)[0]
+    return os.path.join(directory, "variants", f"{stem}_{size}.{fmt}")
+
+# Runs in a worker process
+def _render_variant(source_path: str, target_path: str, size: int, fmt: str):
+    from PIL import Image, ImageOps
+
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), prefix=".variant-")
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                image.save(buffer, VARIANT_FORMATS[fmt], quality=80)
+            os.replace(tmp_path, target_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    return target_path
+
+# Path of the requested variant, rendering it first if needed. Returns None when
+# the source cannot be decoded as an image.
+async def get_variant(source_path: str, size: int, fmt: str = DEFAULT_VARIANT_FORMAT):
+    target_path = variant_path(source_path, size, fmt)
+    if os.path.exists(target_path):
+        return target_path
+    future = _inflight.get(target_path)
+    if future is None:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_get_executor(), _render_variant, source_path, target_path, size, fmt)
+        _inflight[target_path] = future
+        future.add_done_callback(lambda _: _inflight.pop(target_path, None))
+    try:
+        # Shielded so one cancelled request does not cancel the shared render
+        return await asyncio.shield(future)
+    except Exception:
+        return None
+
+# Pre-render the default variants of a newly stored photo in the background
+def schedule_variants(source_path: str):
+    for size in VARIANT_SIZES:
+        task = asyncio.ensure_future(get_variant(source_path, size))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+def remove_variants(source_path: str):
+    for size in VARIANT_SIZES:
+        for fmt in VARIANT_FORMATS:
+            path = variant_path(source_path, size, fmt)
+            if os.path.exists(path):
+                os.remove(path)
+
+def shutdown_images():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
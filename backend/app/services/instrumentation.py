@@ -0,0 +1,365 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+import anyio
+from sqlalchemy import event
+from app.services.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their shape and route
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_SECONDS", "0.2"))
+# Development aid: warn when one request runs the same statement shape more
+# than N_PLUS_ONE_THRESHOLD times, the signature of a lazy load in a loop
+N_PLUS_ONE_DETECTION = os.getenv("N_PLUS_ONE_DETECTION", "false").lower() in ("1", "true", "yes")
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+# Each worker writes its metrics to this directory, shared by the workers of a
+# container, every METRICS_FLUSH_SECONDS and when scraped; /metrics serves
+# their sum, whichever worker the scrape reaches
+METRICS_DIR = os.getenv("METRICS_DIR", "/tmp/zeetms-metrics")
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# When set, scrapes must send "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+ROW_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+# Database work done on behalf of one request
+class RequestStats:
+    __slots__ = ("scope", "statements", "db_seconds", "rows", "pool_wait", "shapes")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.pool_wait = 0.0
+        self.shapes = Counter() if N_PLUS_ONE_DETECTION else None
+
+_current = ContextVar("request_stats", default=None)
+
+def current_request_stats():
+    return _current.get()
+
+def start_request(scope):
+    return _current.set(RequestStats(scope))
+
+def end_request(token):
+    _current.reset(token)
+
+# app -> {endpoint: route path template}, read from the routes on first use
+_templates = {}
+
+# Template of the route that handled (or is handling) the request; set once
+# the router has matched it
+def route_template(scope):
+    app = scope.get("app")
+    templates = _templates.get(app)
+    if templates is None:
+        templates = _templates[app] = {route.endpoint: route.path for route in getattr(app, "routes", ()) if hasattr(route, "endpoint")}
+    return templates.get(scope.get("endpoint"), "<unmatched>")
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+|%\(\w+\)s|%s|(?<![:\w]):\w+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*")
+_SPACE = re.compile(r"\s+")
+
+# Statement with literals and bound parameters replaced by "?" and IN lists or
+# multi-row VALUES collapsed, so that statements differing only in their
+# values share one shape
+@lru_cache(maxsize=4096)
+def normalise(statement: str):
+    shape = _LITERAL.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("(?)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+# Process-wide SQL totals, requests or not
+class _SqlMetrics:
+    def __init__(self):
+        self.duration = Histogram()
+        self.slow = 0
+
+sql_metrics = _SqlMetrics()
+
+def _rows(cursor):
+    # The async adapters fetch a result set before the hook runs; for DML and
+    # the sync drivers the driver's rowcount is all there is
+    if cursor.description is not None:
+        rows = getattr(cursor, "_rows", None)
+        if rows is not None:
+            return len(rows)
+    return max(cursor.rowcount, 0)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+    sql_metrics.duration.observe(elapsed)
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        stats.rows += _rows(cursor)
+        if stats.shapes is not None:
+            stats.shapes[normalise(statement)] += 1
+    if elapsed >= SLOW_QUERY_SECONDS:
+        sql_metrics.slow += 1
+        logger.warning(
+            "Slow query %.3fs on %s: %s",
+            elapsed, route_template(stats.scope) if stats is not None else "<no request>", normalise(statement),
+        )
+
+# Called by database.py for each engine it creates
+def instrument_engine(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# Called by the instrumented pools for every checkout
+def record_pool_wait(seconds: float):
+    stats = _current.get()
+    if stats is not None:
+        stats.pool_wait += seconds
+
+class _RouteMetrics:
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_seconds = Histogram()
+        self.pool_wait = Histogram()
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.rows = Histogram(ROW_BUCKETS)
+        self.responses = Counter()
+
+# (method, route template) -> _RouteMetrics. Templates, not paths, keep the
+# label set bounded.
+_routes = {}
+_routes_lock = threading.Lock()
+
+def record_request(method: str, route: str, status: int, seconds: float, stats: RequestStats):
+    key = (method, route)
+    metrics = _routes.get(key)
+    if metrics is None:
+        with _routes_lock:
+            metrics = _routes.setdefault(key, _RouteMetrics())
+    metrics.latency.observe(seconds)
+    metrics.db_seconds.observe(stats.db_seconds)
+    metrics.pool_wait.observe(stats.pool_wait)
+    metrics.statements.observe(stats.statements)
+    metrics.rows.observe(stats.rows)
+    metrics.responses[status] += 1
+    if stats.shapes:
+        for shape, count in stats.shapes.items():
+            if count > N_PLUS_ONE_THRESHOLD:
+                logger.warning("Possible N+1 on %s %s: %d executions of %s", method, route, count, shape)
+
+# This process's file in METRICS_DIR. Named on first use, after any fork, and
+# made unique because pids are reused.
+_file = {"pid": None, "name": None}
+_writer = {"task": None}
+
+_ROUTE_HISTOGRAMS = (
+    ("latency", "http_request_duration_seconds", "Request latency"),
+    ("db_seconds", "http_request_db_seconds", "Time spent executing SQL per request"),
+    ("pool_wait", "http_request_pool_wait_seconds", "Time spent waiting for a pooled connection per request"),
+    ("statements", "http_request_sql_statements", "SQL statements executed per request"),
+    ("rows", "http_request_sql_rows", "Rows returned or affected by SQL per request"),
+)
+
+_POOL_GAUGES = ("size", "checked_in", "checked_out", "overflow")
+_POOL_COUNTERS = ("checkouts", "timeouts")
+
+# This worker's metrics as written to METRICS_DIR. `pools` maps an engine name
+# to its pool_status().
+def _worker_state(pools):
+    with _routes_lock:
+        routes = list(_routes.items())
+    return {
+        "routes": [
+            [method, route, {
+                **{attribute: getattr(metrics, attribute).snapshot() for attribute, _, _ in _ROUTE_HISTOGRAMS},
+                "responses": dict(metrics.responses),
+            }]
+            for (method, route), metrics in routes
+        ],
+        "sql": {"duration": sql_metrics.duration.snapshot(), "slow": sql_metrics.slow},
+        "pools": pools,
+    }
+
+def _add_snapshot(total, snapshot):
+    if total is None:
+        return {"buckets": dict(snapshot["buckets"]), "sum": snapshot["sum"], "count": snapshot["count"]}
+    for bound, count in snapshot["buckets"].items():
+        total["buckets"][bound] = total["buckets"].get(bound, 0) + count
+    total["sum"] += snapshot["sum"]
+    total["count"] += snapshot["count"]
+    return total
+
+# Sum of worker states. Pool gauges describe running workers only, so
+# `gauges=False` drops them when folding in workers that exited.
+def _merge(states, gauges=True):
+    routes, duration, slow, pools = {}, None, 0, {}
+    for state in states:
+        for method, route, data in state["routes"]:
+            total = routes.setdefault((method, route), {"responses": {}})
+            for key, value in data.items():
+                if key == "responses":
+                    for status, count in value.items():
+                        total["responses"][str(status)] = total["responses"].get(str(status), 0) + count
+                else:
+                    total[key] = _add_snapshot(total.get(key), value)
+        duration = _add_snapshot(duration, state["sql"]["duration"])
+        slow += state["sql"]["slow"]
+        for engine, status in state["pools"].items():
+            total = pools.setdefault(engine, {})
+            for key in _POOL_COUNTERS + (_POOL_GAUGES if gauges else ()):
+                if key in status:
+                    total[key] = total.get(key, 0) + status[key]
+            if "checkout_wait_seconds" in status:
+                total["checkout_wait_seconds"] = _add_snapshot(total.get("checkout_wait_seconds"), status["checkout_wait_seconds"])
+    return {
+        "routes": [[method, route, data] for (method, route), data in routes.items()],
+        "sql": {"duration": duration, "slow": slow},
+        "pools": pools,
+    }
+
+def _write_json(path, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _alive(pid: int):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def write_worker_metrics(pools):
+    if _file["pid"] != os.getpid():
+        _file.update(pid=os.getpid(), name=f"worker-{os.getpid()}-{uuid.uuid4().hex[:8]}.json")
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    _write_json(os.path.join(METRICS_DIR, _file["name"]), _worker_state(pools))
+
+# Sum of the metrics of every worker in METRICS_DIR and the number of workers
+# running. The files of workers that exited are folded into archive.json, so
+# their counts stay in the totals and counters never go backwards.
+def collect_metrics():
+    archive_path = os.path.join(METRICS_DIR, "archive.json")
+    with open(os.path.join(METRICS_DIR, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = _read_json(archive_path)
+        running, exited = [], []
+        for name in os.listdir(METRICS_DIR):
+            if not (name.startswith("worker-") and name.endswith(".json")):
+                continue
+            path = os.path.join(METRICS_DIR, name)
+            state = _read_json(path)
+            if state is None:
+                continue
+            if _alive(int(name.split("-")[1])):
+                running.append(state)
+            else:
+                exited.append((path, state))
+        if exited:
+            archive = _merge(([archive] if archive else []) + [state for _, state in exited], gauges=False)
+            _write_json(archive_path, archive)
+            for path, _ in exited:
+                os.remove(path)
+    return _merge(running + ([archive] if archive else [])), len(running)
+
+# Prometheus text exposition of every worker's metrics, or of this worker's
+# alone when METRICS_DIR is unusable. Blocking; run it in a thread.
+def export_metrics(pools):
+    try:
+        write_worker_metrics(pools)
+        state, workers = collect_metrics()
+    except OSError as exc:
+        logger.warning("Metrics of other workers unavailable, serving this worker's: %s", exc)
+        state, workers = json.loads(json.dumps(_worker_state(pools))), 1
+    return render_metrics(state, workers)
+
+async def _write_periodically(pools):
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            await anyio.to_thread.run_sync(write_worker_metrics, pools())
+        except OSError as exc:
+            logger.warning("Could not write metrics to %s: %s", METRICS_DIR, exc)
+
+# Called from the lifespan; `pools` returns the current pool statuses
+def start_metrics_writer(pools):
+    if _writer["task"] is None:
+        _writer["task"] = asyncio.create_task(_write_periodically(pools))
+
+def stop_metrics_writer(pools):
+    task = _writer["task"]
+    _writer["task"] = None
+    if task is not None:
+        task.cancel()
+    try:
+        write_worker_metrics(pools())
+    except OSError:
+        pass
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_label(value)}"' for name, value in labels.items()) + "}"
+
+def _histogram(lines, name, labels, snapshot):
+    for bound, count in snapshot["buckets"].items():
+        lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(**labels)} {snapshot['count']}")
+
+# Prometheus text exposition of a state from collect_metrics()
+def render_metrics(state, workers: int):
+    lines = ["# HELP metrics_workers Worker processes whose metrics are included", "# TYPE metrics_workers gauge"]
+    lines.append(f"metrics_workers {workers}")
+    routes = sorted(state["routes"], key=lambda entry: (entry[0], entry[1]))
+    for attribute, name, description in _ROUTE_HISTOGRAMS:
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for method, route, data in routes:
+            _histogram(lines, name, {"method": method, "route": route}, data[attribute])
+    lines += ["# HELP http_responses_total Responses by route and status", "# TYPE http_responses_total counter"]
+    for method, route, data in routes:
+        for status, count in sorted(data["responses"].items()):
+            lines.append(f"http_responses_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines += ["# HELP db_statement_duration_seconds SQL statement latency", "# TYPE db_statement_duration_seconds histogram"]
+    if state["sql"]["duration"] is not None:
+        _histogram(lines, "db_statement_duration_seconds", {}, state["sql"]["duration"])
+    lines += ["# HELP db_slow_statements_total Statements slower than SLOW_QUERY_SECONDS", "# TYPE db_slow_statements_total counter"]
+    lines.append(f"db_slow_statements_total {state['sql']['slow']}")
+
+    pools = state["pools"]
+    for gauge in _POOL_GAUGES:
+        lines += [f"# HELP db_pool_{gauge} Connection pool {gauge.replace('_', ' ')}", f"# TYPE db_pool_{gauge} gauge"]
+        lines += [f"db_pool_{gauge}{_labels(engine=engine)} {status[gauge]}" for engine, status in pools.items() if gauge in status]
+    lines += ["# HELP db_pool_checkout_wait_seconds Connection checkout wait", "# TYPE db_pool_checkout_wait_seconds histogram"]
+    for engine, status in pools.items():
+        if "checkout_wait_seconds" in status:
+            _histogram(lines, "db_pool_checkout_wait_seconds", {"engine": engine}, status["checkout_wait_seconds"])
+    lines += ["# HELP db_pool_timeouts_total Checkouts that timed out", "# TYPE db_pool_timeouts_total counter"]
+    lines += [f"db_pool_timeouts_total{_labels(engine=engine)} {status['timeouts']}" for engine, status in pools.items() if "timeouts" in status]
+    return "\n".join(lines) + "\n"
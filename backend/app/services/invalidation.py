@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from sqlalchemy.engine import make_url
+from app.database.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Every worker keeps its own lookup, principal, dashboard and distance caches.
+# A write evicts the entries locally and publishes the eviction on a Postgres
+# channel that every worker LISTENs on, so the other workers evict them too.
+CACHE_INVALIDATION = os.getenv("CACHE_INVALIDATION", "true").lower() in ("1", "true", "yes")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "cache_invalidation")
+# Idle time after which the listener connection is pinged, so a dropped
+# connection is noticed and events are not silently missed
+INVALIDATION_KEEPALIVE_SECONDS = float(os.getenv("INVALIDATION_KEEPALIVE_SECONDS", "30"))
+# NOTIFY payloads are limited to 8000 bytes; longer key lists evict everything
+MAX_PAYLOAD_BYTES = 7900
+
+# Identifies this worker's own events, which Postgres echoes back to it
+_ORIGIN = uuid.uuid4().hex
+# cache name -> function evicting the given keys locally (no keys: everything)
+_handlers = {}
+_bus = {"loop": None, "queue": None, "task": None}
+
+def register(cache: str, handler):
+    _handlers[cache] = handler
+
+def enabled():
+    return CACHE_INVALIDATION and make_url(DATABASE_URL).get_backend_name() == "postgresql"
+
+def _evict(cache, keys):
+    handler = _handlers.get(cache)
+    if handler is not None:
+        handler(*keys)
+
+# Evicts locally and in every other worker
+def publish(cache: str, *keys):
+    _evict(cache, keys)
+    notify(cache, *keys)
+
+# Evicts in the other workers only, for a worker whose own cache is already
+# up to date (e.g. after applying a delta)
+def notify(cache: str, *keys):
+    loop, queue = _bus["loop"], _bus["queue"]
+    if queue is None:
+        return
+    payload = json.dumps({"origin": _ORIGIN, "cache": cache, "keys": list(keys)})
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        payload = json.dumps({"origin": _ORIGIN, "cache": cache, "keys": []})
+    # Commit hooks of sync sessions can run outside the event loop thread
+    loop.call_soon_threadsafe(queue.put_nowait, payload)
+
+def _on_notification(connection, pid, channel, payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        return
+    if message.get("origin") == _ORIGIN:
+        return
+    _evict(message.get("cache"), message.get("keys") or ())
+
+def _dsn():
+    return make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+# One dedicated connection per worker both LISTENs and sends the NOTIFYs.
+# After a reconnect every cache is emptied: events sent while the worker was
+# not listening are lost. A payload is only dropped once its NOTIFY went
+# through; one whose NOTIFY failed is sent again on the new connection, as
+# the other workers would otherwise keep serving what it evicts.
+async def _run():
+    import asyncpg
+
+    queue = _bus["queue"]
+    delay = 1.0
+    payload = None
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(_dsn())
+            await connection.add_listener(INVALIDATION_CHANNEL, _on_notification)
+            for cache in _handlers:
+                _evict(cache, ())
+            delay = 1.0
+            while True:
+                if payload is None:
+                    try:
+                        payload = await asyncio.wait_for(queue.get(), INVALIDATION_KEEPALIVE_SECONDS)
+                    except asyncio.TimeoutError:
+                        await connection.execute("SELECT 1")
+                        continue
+                await connection.execute("SELECT pg_notify($1, $2)", INVALIDATION_CHANNEL, payload)
+                payload = None
+        except Exception as exc:
+            # Not only OSError and asyncpg's Postgres/Interface errors: a
+            # connection terminated mid-operation can raise its
+            # InternalClientError, and the listener must outlive any of them
+            logger.warning("Cache invalidation listener lost, reconnecting in %.1fs: %r", delay, exc)
+        finally:
+            if connection is not None:
+                connection.terminate()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+# Called from the lifespan; a no-op unless running on Postgres
+def start_invalidation_listener():
+    if not enabled() or _bus["task"] is not None:
+        return
+    _bus["loop"] = asyncio.get_running_loop()
+    _bus["queue"] = asyncio.Queue()
+    _bus["task"] = asyncio.create_task(_run())
+
+def stop_invalidation_listener():
+    task = _bus["task"]
+    _bus.update(loop=None, queue=None, task=None)
+    if task is not None:
+        task.cancel()
@@ -0,0 +1,187 @@
+import time
+from datetime import date
+import anyio
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import CurrentVehicleAssign, Order, Vehicle
+from app.services.reference_data import find_reference_id
+
+PLANNING_STRATEGIES = ("best_fit", "first_fit")
+# Orders in these statuses (matched by name) are never planned
+EXCLUDED_ORDER_STATUSES = ("on_hold", "cancelled")
+# Vehicles in these statuses are not available; "assigne" matches the dashboard
+EXCLUDED_VEHICLE_STATUSES = ("maintenance", "assigne")
+
+async def _status_ids(db: AsyncSession, table: str, column: str, names):
+    ids = []
+    for name in names:
+        status_id = await find_reference_id(db, table, column, name)
+        if status_id is not None:
+            ids.append(status_id)
+    return ids
+
+def _excluding(column, ids):
+    return or_(column.is_(None), column.notin_(ids)) if ids else True
+
+# Filter for undelivered orders due on or before `day` (order_date when there
+# is no required_date) that are not on hold or cancelled
+async def open_order_clauses(db: AsyncSession, day: date):
+    excluded = await _status_ids(db, "orders_statuses", "orde_status_name", EXCLUDED_ORDER_STATUSES)
+    return (
+        func.coalesce(Order.required_date, Order.order_date) <= day,
+        Order.delivery_date.is_(None),
+        _excluding(Order.status_id, excluded),
+    )
+
+# Open orders for `day` as columns: ids, weights, volumes. Missing sizes count as 0.
+async def open_orders(db: AsyncSession, day: date):
+    import numpy as np
+
+    stmt = (
+        select(Order.id, Order.weight_kg, Order.volume_litre)
+        .where(*await open_order_clauses(db, day))
+        .order_by(Order.id)
+    )
+    rows = (await db.execute(stmt)).all()
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    weights = np.nan_to_num(np.array([row[1] for row in rows], dtype=float))
+    volumes = np.nan_to_num(np.array([row[2] for row in rows], dtype=float))
+    return ids, weights, volumes
+
+# Vehicles with a weight capacity that are neither excluded by status nor
+# held by an active assignment, as columns: ids, plates, capacities, volumes.
+# A vehicle without volume_litre is not volume-limited.
+async def available_vehicles(db: AsyncSession):
+    import numpy as np
+
+    excluded = await _status_ids(db, "vehicle_statuses", "vehicle_status_name", EXCLUDED_VEHICLE_STATUSES)
+    active = exists().where(CurrentVehicleAssign.vehicle_id == Vehicle.id)
+    stmt = (
+        select(Vehicle.id, Vehicle.license_plate, Vehicle.capacity_kg, Vehicle.volume_litre)
+        .where(Vehicle.capacity_kg > 0)
+        .where(~active)
+        .where(_excluding(Vehicle.status_id, excluded))
+        .order_by(Vehicle.id)
+    )
+    rows = (await db.execute(stmt)).all()
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    plates = [row[1] for row in rows]
+    capacities = np.array([row[2] for row in rows], dtype=float)
+    volumes = np.array([row[3] for row in rows], dtype=float)
+    volumes[np.isnan(volumes)] = np.inf
+    return ids, plates, capacities, volumes
+
+# Two-dimensional (weight, volume) bin packing, largest order first.
+# Returns the vehicle index for every order, -1 when nothing can take it.
+#
+# first_fit puts an order on the first vehicle, biggest first, with room for
+# it; best_fit picks the vehicle it leaves with the least spare capacity.
+# Orders are placed one at a time, but each placement is a handful of array
+# operations over all vehicles rather than a Python loop.
+def pack(weights, volumes, capacities, vehicle_volumes, strategy="best_fit"):
+    import numpy as np
+
+    n, m = len(weights), len(capacities)
+    assignment = np.full(n, -1, dtype=np.int64)
+    if n == 0 or m == 0:
+        return assignment
+
+    limited = np.isfinite(vehicle_volumes)
+    scale_w = capacities.max()
+    scale_v = vehicle_volumes[limited].max() if limited.any() else 1.0
+    scale_v = scale_v or 1.0
+    # An order's size is its larger share of the biggest vehicle
+    sizes = np.maximum(weights / scale_w, volumes / scale_v)
+    by_size = np.argsort(-sizes, kind="stable")
+
+    if strategy == "first_fit":
+        vehicle_order = np.argsort(-capacities, kind="stable")
+    else:
+        vehicle_order = np.arange(m)
+    rem_w = capacities[vehicle_order].copy()
+    rem_v = vehicle_volumes[vehicle_order].copy()
+    limited = limited[vehicle_order]
+    fits = np.empty(m, dtype=bool)
+    slack = np.empty(m)
+    slack_v = np.empty(m)
+
+    largest_w = rem_w.max()
+    largest_v = rem_v.max()
+    for i in by_size:
+        w, v = weights[i], volumes[i]
+        # Cheap rejection before touching the arrays
+        if w > largest_w or v > largest_v:
+            continue
+        np.greater_equal(rem_w, w, out=fits)
+        fits &= rem_v >= v
+        if strategy == "first_fit":
+            j = int(fits.argmax())
+            if not fits[j]:
+                continue
+        else:
+            np.subtract(rem_w, w, out=slack)
+            slack /= scale_w
+            np.subtract(rem_v, v, out=slack_v)
+            slack_v /= scale_v
+            slack_v[~limited] = 0.0
+            slack += slack_v
+            slack[~fits] = np.inf
+            j = int(slack.argmin())
+            if not fits[j]:
+                continue
+        before_w, before_v = rem_w[j], rem_v[j]
+        rem_w[j] -= w
+        rem_v[j] -= v
+        assignment[i] = vehicle_order[j]
+        if before_w == largest_w:
+            largest_w = rem_w.max()
+        if before_v == largest_v and np.isfinite(before_v):
+            largest_v = rem_v.max()
+    return assignment
+
+def _plan(orders, vehicles, strategy):
+    import numpy as np
+
+    order_ids, weights, volumes = orders
+    vehicle_ids, plates, capacities, vehicle_volumes = vehicles
+    start = time.perf_counter()
+    assignment = pack(weights, volumes, capacities, vehicle_volumes, strategy)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    planned = assignment >= 0
+    m = len(vehicle_ids)
+    load_w = np.bincount(assignment[planned], weights=weights[planned], minlength=m)
+    load_v = np.bincount(assignment[planned], weights=volumes[planned], minlength=m)
+    # Order ids grouped by vehicle index
+    grouped = np.argsort(assignment[planned], kind="stable")
+    planned_ids = order_ids[planned][grouped]
+    bounds = np.searchsorted(assignment[planned][grouped], np.arange(m + 1))
+
+    loads = []
+    for j in np.flatnonzero(bounds[1:] > bounds[:-1]):
+        volume = vehicle_volumes[j]
+        loads.append({
+            "vehicle_id": int(vehicle_ids[j]),
+            "license_plate": plates[j],
+            "capacity_kg": float(capacities[j]),
+            "volume_litre": float(volume) if np.isfinite(volume) else None,
+            "load_kg": float(load_w[j]),
+            "load_litre": float(load_v[j]),
+            "order_ids": planned_ids[bounds[j]:bounds[j + 1]].tolist(),
+        })
+    return {
+        "strategy": strategy,
+        "orders": len(order_ids),
+        "vehicles_available": m,
+        "vehicles_used": len(loads),
+        "loads": loads,
+        "unplanned_order_ids": order_ids[~planned].tolist(),
+        "planning_ms": round(elapsed_ms, 2),
+    }
+
+# Load plan for `day`. Nothing is written: the plan is a proposal.
+async def plan_loads(db: AsyncSession, day: date, strategy: str = "best_fit"):
+    orders = await open_orders(db, day)
+    vehicles = await available_vehicles(db)
+    plan = await anyio.to_thread.run_sync(_plan, orders, vehicles, strategy)
+    return {"day": day.isoformat(), **plan}
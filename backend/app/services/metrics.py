@@ -0,0 +1,31 @@
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds, upper bounds inclusive
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fixed-bucket histogram, cheap enough to observe on every request
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    # Cumulative counts per upper bound, Prometheus style; "+Inf" equals count
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = {}
+        running = 0
+        for bound, count in zip((*self.buckets, "+Inf"), counts):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "sum": total, "count": running}
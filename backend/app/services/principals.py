@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, attributes
+from app.auth.schemas import Principal
+from app.database.database import AsyncSessionLocal
+from app.services.invalidation import publish, register
+from app.models.models import Role, User
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "1024"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+# username -> (expires_at, principal), least recently used first
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+async def _load_principal(username: str):
+    stmt = (
+        select(User.id, User.username, User.descript, User.is_active, Role.role_name)
+        .join(Role, Role.id == User.role_id)
+        .where(User.username == username)
+    )
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(stmt)).first()
+    if row is None:
+        return None
+    return Principal(
+        id=row.id,
+        username=row.username,
+        descript=row.descript,
+        is_active=bool(row.is_active),
+        role_name=row.role_name,
+    )
+
+# Principal for a token subject. Only a cache miss opens a database session.
+async def get_principal(username: str):
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(username)
+        if entry is not None and entry[0] > now:
+            _cache.move_to_end(username)
+            return entry[1]
+    principal = await _load_principal(username)
+    # Unknown users are not cached so a newly created account works immediately
+    if principal is not None:
+        with _lock:
+            _cache[username] = (now + PRINCIPAL_CACHE_TTL_SECONDS, principal)
+            _cache.move_to_end(username)
+            while len(_cache) > PRINCIPAL_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return principal
+
+def _evict(*usernames):
+    with _lock:
+        if not usernames:
+            _cache.clear()
+        for username in usernames:
+            _cache.pop(username, None)
+
+register("principals", _evict)
+
+# Drops the given principals, or all of them, in every worker
+def invalidate_principals(*usernames):
+    publish("principals", *usernames)
+
+# Evict principals whose user row (activation, role, name) or role changed,
+# once the transaction that changed them commits
+@event.listens_for(Session, "before_flush")
+def _track_principal_writes(session, flush_context, instances):
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            history = attributes.get_history(obj, "username")
+            names = session.info.setdefault("principal_writes", set())
+            names.update(name for name in (*history.unchanged, *history.deleted, *history.added) if name)
+        elif isinstance(obj, Role):
+            session.info["principal_writes_all"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("principal_writes_all", False):
+        invalidate_principals()
+    names = session.info.pop("principal_writes", None)
+    if names:
+        invalidate_principals(*names)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("principal_writes_all", None)
+    session.info.pop("principal_writes", None)
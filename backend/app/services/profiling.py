@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+import anyio
+
+logger = logging.getLogger(__name__)
+
+# Admins profile one request by sending "X-Profile: 1" or "?profile=1".
+# Besides those, this fraction of all requests is profiled continuously.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Stack sampling period; one thread samples every profiled request of a worker
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+# Shared by the workers of a container, newest PROFILE_KEEP kept
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/zeetms-profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+PROFILE_ID = re.compile(r"^[0-9]{14}-[0-9a-f]{8}$")
+
+# Category of a sample: its innermost frame belonging to one of these
+_CATEGORIES = (
+    ("sql", ("sqlalchemy", "asyncpg", "aiosqlite", "sqlite3", "psycopg2")),
+    ("validation", ("pydantic",)),
+    ("serialization", ("json", "orjson", "fastapi.encoders", "app.services.responses")),
+)
+_FUNCTIONS = {
+    ("fastapi.routing", "serialize_response"): "serialization",
+    ("starlette.responses", "render"): "serialization",
+    ("app.middleware", "compress"): "compression",
+    ("app.middleware", "finish"): "compression",
+}
+
+# Stack samples of one request; "[waiting]" leaves are samples taken while the
+# request's task was suspended (database, network, other tasks running)
+class Profile:
+    def __init__(self, method: str, path: str, task):
+        self.id = f"{time.strftime('%Y%m%d%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.task = task
+        self.stacks = Counter()
+        self.started = time.perf_counter()
+        # Await chain down to SQLAlchemy's greenlet_spawn, last seen waiting
+        self.greenlet_caller = None
+
+def _frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+# Coroutine chain a task is awaiting, outermost first
+def _awaiting_stack(task):
+    names = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            break
+        names.append(_frame_name(frame))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) or getattr(awaitable, "ag_await", None)
+    return names
+
+# Stack of the loop thread while the profiled task runs, from the task's
+# coroutine down; the event loop and server frames below it are dropped
+def _running_stack(frame, profile: Profile):
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    root = profile.task.get_coro().cr_frame
+    for index, frame in enumerate(frames):
+        if frame is root:
+            return [_frame_name(frame) for frame in frames[index:]]
+    # Code running in a greenlet (SQLAlchemy's async bridge) has a stack of
+    # its own, and the coroutines of a running task do not expose what they
+    # await. It is charged to the last greenlet_spawn caller seen waiting,
+    # nearly always the same one: a query waits before its rows are processed.
+    caller = profile.greenlet_caller or [_frame_name(root), "[greenlet]"]
+    return caller + [_frame_name(frame) for frame in frames]
+
+def _waiting_stack(profile: Profile):
+    names = _awaiting_stack(profile.task)
+    for index, name in enumerate(names):
+        if name == "sqlalchemy.util._concurrency_py3k:greenlet_spawn":
+            profile.greenlet_caller = names[:index + 1]
+            break
+    return names + ["[waiting]"]
+
+# One daemon thread per worker, running while any profile is active. Each
+# tick it reads the event loop thread's stack and charges it to the profile
+# whose task is running, and a "waiting" stack to every other active profile.
+class _Sampler:
+    def __init__(self):
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._loop_thread_id = None
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles[profile.task] = profile
+            if self._thread is None:
+                self._loop = asyncio.get_running_loop()
+                self._loop_thread_id = threading.get_ident()
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile):
+        with self._lock:
+            self._profiles.pop(profile.task, None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                profiles = list(self._profiles.values())
+            frame = sys._current_frames().get(self._loop_thread_id)
+            # asyncio keeps the running task per loop in this (private) dict
+            running = asyncio.tasks._current_tasks.get(self._loop)
+            for profile in profiles:
+                try:
+                    if profile.task is running and frame is not None:
+                        profile.stacks[";".join(_running_stack(frame, profile))] += 1
+                    elif not profile.task.done():
+                        profile.stacks[";".join(_waiting_stack(profile))] += 1
+                except (AttributeError, RuntimeError):
+                    # The loop moved on while the stack was being read
+                    continue
+            del frame
+            time.sleep(PROFILE_INTERVAL_SECONDS)
+
+_sampler = _Sampler()
+
+def should_sample():
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+def start_profile(method: str, path: str):
+    profile = Profile(method, path, asyncio.current_task())
+    _sampler.add(profile)
+    return profile
+
+def _category(stack: str):
+    for name in reversed(stack.split(";")):
+        module, _, function = name.partition(":")
+        if (module, function) in _FUNCTIONS:
+            return _FUNCTIONS[module, function]
+        for category, prefixes in _CATEGORIES:
+            if any(module == prefix or module.startswith(prefix + ".") for prefix in prefixes):
+                return category
+    return "other"
+
+def _summary(profile: Profile, route: str, status: int, stats):
+    samples = sum(profile.stacks.values())
+    wall = time.perf_counter() - profile.started
+    seconds = Counter()
+    for stack, count in profile.stacks.items():
+        state = "waiting" if stack.endswith("[waiting]") else "running"
+        seconds[state] += count
+        seconds[f"{state}:{_category(stack)}"] += count
+    share = {key: round(wall * count / samples, 6) for key, count in sorted(seconds.items())} if samples else {}
+    return {
+        "id": profile.id,
+        "method": profile.method,
+        "path": profile.path,
+        "route": route,
+        "status": status,
+        "wall_seconds": round(wall, 6),
+        "samples": samples,
+        "interval_seconds": PROFILE_INTERVAL_SECONDS,
+        # Sample counts scaled to the wall time, per state and category
+        "seconds": share,
+        "sql_statements": stats.statements if stats is not None else None,
+        "sql_seconds": round(stats.db_seconds, 6) if stats is not None else None,
+    }
+
+def _write(profile: Profile, summary):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, profile.id)
+    with open(base + ".folded", "w") as f:
+        f.writelines(f"{stack} {count}\n" for stack, count in profile.stacks.most_common())
+    with open(base + ".json", "w") as f:
+        json.dump(summary, f)
+    names = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for name in names[:-PROFILE_KEEP]:
+        for suffix in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, name[:-5] + suffix))
+            except FileNotFoundError:
+                pass
+
+# Stops sampling the request and stores its profile: a summary and the stacks
+# in the folded format flamegraph.pl, inferno and speedscope read
+async def finish_profile(profile: Profile, route: str, status: int, stats):
+    _sampler.remove(profile)
+    summary = _summary(profile, route, status, stats)
+    try:
+        await anyio.to_thread.run_sync(_write, profile, summary)
+    except OSError as exc:
+        logger.warning("Could not store profile %s: %s", profile.id, exc)
+    return summary
+
+def _read_summaries(limit):
+    try:
+        names = sorted((name for name in os.listdir(PROFILE_DIR) if name.endswith(".json")), reverse=True)
+    except FileNotFoundError:
+        return []
+    summaries = []
+    for name in names[:limit]:
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                summaries.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return summaries
+
+async def list_profiles(limit: int):
+    return await anyio.to_thread.run_sync(_read_summaries, limit)
+
+def _read_stacks(profile_id):
+    with open(os.path.join(PROFILE_DIR, profile_id + ".folded")) as f:
+        return f.read()
+
+# Folded stacks of a stored profile, None when unknown or pruned
+async def read_profile(profile_id: str):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        return await anyio.to_thread.run_sync(_read_stacks, profile_id)
+    except FileNotFoundError:
+        return None
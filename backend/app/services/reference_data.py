@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.services.invalidation import publish, register
+from app.models.models import (
+    Role, VehicleType, VehicleStatus, Insurance, EmployeeFunction, EmployeeStatus, DrivingLicense, OrdersStatus
+)
+
+# Small lookup tables served from memory: name -> (model, columns exposed by the API)
+REFERENCE_TABLES = {
+    "vehicle_types": (VehicleType, ("id", "vehicle_type_name")),
+    "vehicle_statuses": (VehicleStatus, ("id", "vehicle_status_name")),
+    "insurances": (Insurance, ("id", "insurance_ref")),
+    "employee_functions": (EmployeeFunction, ("id", "name")),
+    "employee_statuses": (EmployeeStatus, ("id", "name")),
+    "driving_licenses": (DrivingLicense, ("id", "driving_license_ame")),
+    "roles": (Role, ("id", "role_name", "descript")),
+    "orders_statuses": (OrdersStatus, ("id", "orde_status_name")),
+}
+
+REFERENCE_CACHE_TTL_SECONDS = float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300"))
+
+_MODEL_NAMES = {model: name for name, (model, _) in REFERENCE_TABLES.items()}
+
+# name -> (expires_at, rows, ids)
+_cache = {}
+_lock = threading.Lock()
+
+async def _load(db: AsyncSession, name: str):
+    model, columns = REFERENCE_TABLES[name]
+    stmt = select(*(getattr(model, column) for column in columns)).order_by(model.id)
+    rows = [dict(row._mapping) for row in await db.execute(stmt)]
+    entry = (time.monotonic() + REFERENCE_CACHE_TTL_SECONDS, rows, frozenset(row["id"] for row in rows))
+    with _lock:
+        _cache[name] = entry
+    return entry
+
+async def _entry(db: AsyncSession, name: str):
+    entry = _cache.get(name)
+    if entry is None or entry[0] <= time.monotonic():
+        entry = await _load(db, name)
+    return entry
+
+# Rows of a lookup table as returned by its list endpoint
+async def get_reference_rows(db: AsyncSession, name: str):
+    return (await _entry(db, name))[1]
+
+# Foreign key validation against the cached ids. A miss is confirmed with a
+# primary key lookup so rows added by another process are never rejected
+# while the cache is still fresh.
+async def reference_exists(db: AsyncSession, name: str, row_id: int):
+    if row_id in (await _entry(db, name))[2]:
+        return True
+    model, _ = REFERENCE_TABLES[name]
+    if await db.get(model, row_id) is None:
+        return False
+    invalidate_reference_data(name)
+    return True
+
+# Cached id set of a lookup table, for validating many rows at once
+async def get_reference_ids(db: AsyncSession, name: str):
+    return (await _entry(db, name))[2]
+
+# Id of the row whose `column` equals `value`, or None
+async def find_reference_id(db: AsyncSession, name: str, column: str, value):
+    for row in await get_reference_rows(db, name):
+        if row[column] == value:
+            return row["id"]
+    return None
+
+# Loads the given lookup tables, or all of them, into the cache
+async def load_reference_data(db: AsyncSession, *names):
+    for name in names or REFERENCE_TABLES:
+        await _load(db, name)
+
+def _evict(*names):
+    with _lock:
+        if not names:
+            _cache.clear()
+        for name in names:
+            _cache.pop(name, None)
+
+register("reference", _evict)
+
+# Drops the given lookup tables, or all of them, in every worker
+def invalidate_reference_data(*names):
+    publish("reference", *names)
+
+# Write-through invalidation: remember which lookup tables a session touched
+# and drop them from the cache once the transaction commits
+@event.listens_for(Session, "before_flush")
+def _track_reference_writes(session, flush_context, instances):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        name = _MODEL_NAMES.get(type(obj))
+        if name:
+            session.info.setdefault("reference_writes", set()).add(name)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    names = session.info.pop("reference_writes", None)
+    if names:
+        invalidate_reference_data(*names)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("reference_writes", None)
@@ -0,0 +1,16 @@
+import os
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+# List endpoints whose rows come from a flat SQL projection can skip the
+# response_model pass (Pydantic validation, jsonable_encoder, stdlib json)
+# and be written by orjson directly. Off restores the validated path.
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+# `rows` are dicts already shaped like `model`. Returns an ORJSONResponse
+# carrying the headers set on `response`, or the rows themselves (so FastAPI
+# validates them) when the fast path is off or the shape does not match.
+def trusted_rows(rows, model, response: Response):
+    if not FAST_JSON_RESPONSES or (rows and rows[0].keys() != model.__fields__.keys()):
+        return rows
+    return ORJSONResponse(rows, headers=dict(response.headers))
@@ -0,0 +1,137 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import anyio
+from fastapi import HTTPException
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.models import Address, Order, Warehouse
+from app.services.distance import distance_cache
+from app.services.invalidation import publish, register
+from app.services.load_planning import available_vehicles, open_order_clauses
+
+ROUTING_WORKERS = int(os.getenv("ROUTING_WORKERS", "2"))
+# Days with at least this many stops are solved in a worker process, where the
+# distance matrix is built too; smaller days use the cache in a thread
+VRP_PROCESS_POOL_MIN_STOPS = int(os.getenv("VRP_PROCESS_POOL_MIN_STOPS", "500"))
+# A dense float32 matrix for 8000 stops is about 256 MB
+VRP_MAX_STOPS = int(os.getenv("VRP_MAX_STOPS", "8000"))
+
+_executor = None
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _executor = ProcessPoolExecutor(max_workers=ROUTING_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+# (address id, latitude, longitude) of the warehouse the routes start from
+async def _depot(db: AsyncSession, warehouse_id: int):
+    stmt = (
+        select(Address.id, Address.latitude, Address.longitude)
+        .join(Warehouse, Warehouse.address_id == Address.id)
+        .where(Warehouse.id == warehouse_id)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Warehouse not found or has no address")
+    if row.latitude is None or row.longitude is None:
+        raise HTTPException(status_code=400, detail="Warehouse address has no coordinates")
+    return row
+
+# Open orders for `day` with their delivery coordinates, and the ids of open
+# orders that cannot be routed because their address has none
+async def _stops(db: AsyncSession, day: date):
+    stmt = (
+        select(Order.id, Order.weight_kg, Address.id, Address.latitude, Address.longitude)
+        .outerjoin(Address, Address.id == Order.delivery_address)
+        .where(*await open_order_clauses(db, day))
+        .order_by(Order.id)
+    )
+    rows = (await db.execute(stmt)).all()
+    located = [row for row in rows if row[3] is not None and row[4] is not None]
+    missing = [row[0] for row in rows if row[3] is None or row[4] is None]
+    return located, missing
+
+# vrp and numpy are imported on the first plan, not at worker startup
+def _solve_cached(address_ids, lats, lons, demands, capacities):
+    from app.services.vrp import solve
+
+    return solve(lats, lons, demands, capacities, matrix=distance_cache.matrix(address_ids, lats, lons))
+
+# Multi-stop delivery routes for `day` from a warehouse, one per available
+# vehicle, limited by weight. Like the load plan, nothing is written.
+async def plan_routes(db: AsyncSession, day: date, warehouse_id: int):
+    import numpy as np
+    from app.services.vrp import solve
+
+    depot = await _depot(db, warehouse_id)
+    stops, missing = await _stops(db, day)
+    if len(stops) > VRP_MAX_STOPS:
+        raise HTTPException(status_code=400, detail=f"Too many stops to route ({len(stops)} > {VRP_MAX_STOPS})")
+    vehicle_ids, plates, capacities, _ = await available_vehicles(db)
+
+    order_ids = [row[0] for row in stops]
+    demands = np.nan_to_num(np.array([row[1] for row in stops], dtype=float))
+    address_ids = [depot[0], *(row[2] for row in stops)]
+    lats = np.array([depot[1], *(row[3] for row in stops)], dtype=float)
+    lons = np.array([depot[2], *(row[4] for row in stops)], dtype=float)
+
+    if len(stops) >= VRP_PROCESS_POOL_MIN_STOPS:
+        loop = asyncio.get_running_loop()
+        solution = await loop.run_in_executor(_get_executor(), solve, lats, lons, demands, capacities)
+    else:
+        solution = await anyio.to_thread.run_sync(_solve_cached, address_ids, lats, lons, demands, capacities)
+
+    routes = []
+    for route in solution["routes"]:
+        v = route["vehicle"]
+        routes.append({
+            "vehicle_id": int(vehicle_ids[v]),
+            "license_plate": plates[v],
+            "capacity_kg": float(capacities[v]),
+            "load_kg": route["load"],
+            "distance_km": round(route["distance"], 3),
+            "order_ids": [order_ids[k] for k in route["stops"]],
+        })
+    return {
+        "day": day.isoformat(),
+        "warehouse_id": warehouse_id,
+        "orders": len(order_ids) + len(missing),
+        "vehicles_available": len(vehicle_ids),
+        "vehicles_used": len(routes),
+        "distance_km": round(solution["distance"], 3),
+        "routes": routes,
+        "unrouted_order_ids": [order_ids[k] for k in solution["unrouted"]],
+        "missing_coordinates_order_ids": missing,
+        "construction_ms": solution["construction_ms"],
+        "improvement_ms": solution["improvement_ms"],
+    }
+
+def shutdown_routing():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+register("distance", distance_cache.invalidate)
+
+# Cached distances of an address are dropped, in every worker, once a change
+# to it commits
+@event.listens_for(Session, "before_flush")
+def _track_address_moves(session, flush_context, instances):
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, Address):
+            session.info.setdefault("moved_addresses", set()).add(obj.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    moved = session.info.pop("moved_addresses", None)
+    if moved:
+        publish("distance", *moved)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("moved_addresses", None)
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database.database import AsyncSessionLocal
+from app.models.models import UploadBlob
+from app.services.images import schedule_variants, remove_variants
+
+logger = logging.getLogger(__name__)
+
+# Directory to store uploaded photos, shared by employees and vehicles
+UPLOAD_DIR = "uploads"
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+
+# Extensions kept on stored names so the served content type stays right
+_EXTENSIONS = {".jpg": ".jpg", ".jpeg": ".jpg", ".png": ".png", ".gif": ".gif", ".webp": ".webp"}
+# Cleanup tasks, referenced until done
+_background = set()
+
+# Stream the upload to a temp file in chunks, hashing as it goes. Runs in a
+# worker thread; returns the temp path, the content-addressed name and size.
+def _spool(source, extension: str):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := source.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Photo exceeds the maximum size of {MAX_UPLOAD_BYTES} bytes"
+                    )
+                digest.update(chunk)
+                buffer.write(chunk)
+        return tmp_path, digest.hexdigest() + extension, size
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+# Move a spooled upload to its name. Returns False when identical content was
+# already stored and is kept instead.
+def _place(tmp_path: str, file_name: str):
+    path = os.path.join(UPLOAD_DIR, file_name)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+def _unlink(file_names):
+    for file_name in file_names:
+        path = os.path.join(UPLOAD_DIR, file_name)
+        if os.path.exists(path):
+            os.remove(path)
+        remove_variants(path)
+
+def _insert(db: AsyncSession):
+    return postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+
+# Serialises, per stored name, a transaction taking a reference with the
+# cleanup deleting unreferenced files: both hold the lock until they commit,
+# so the cleanup either sees the reference or runs before the file is placed.
+# On SQLite the writes both make already take its database write lock.
+async def _lock_names(db: AsyncSession, file_names):
+    if db.bind.dialect.name == "postgresql":
+        for file_name in sorted(file_names):
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(file_name))))
+
+# Store an uploaded photo and take a reference to it in the current transaction.
+# Returns the value for the photo_file column.
+async def save_photo(db: AsyncSession, photo: UploadFile):
+    extension = _EXTENSIONS.get(os.path.splitext(photo.filename or "")[1].lower(), "")
+    tmp_path, file_name, size = await run_in_threadpool(_spool, photo.file, extension)
+    try:
+        await _lock_names(db, [file_name])
+        insert = _insert(db)
+        stmt = insert(UploadBlob).values(file_name=file_name, size_bytes=size, ref_count=1)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[UploadBlob.file_name],
+            set_={"ref_count": UploadBlob.ref_count + 1},
+        ))
+        placed = await run_in_threadpool(_place, tmp_path, file_name)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if placed:
+        # Removed again if the transaction does not commit
+        db.info.setdefault("placed_uploads", set()).add(file_name)
+    photo_file = os.path.join(UPLOAD_DIR, file_name)
+    db.info.setdefault("new_photos", set()).add(photo_file)
+    return photo_file
+
+# Drop a reference to a stored photo. Content that is no longer referenced is
+# deleted from disk once the transaction commits. Take the new reference
+# first when replacing a photo, which may have the same content.
+async def release_photo(db: AsyncSession, photo_file):
+    if not photo_file:
+        return
+    file_name = os.path.basename(photo_file)
+    result = await db.execute(
+        update(UploadBlob)
+        .where(UploadBlob.file_name == file_name)
+        .values(ref_count=UploadBlob.ref_count - 1)
+    )
+    if result.rowcount == 0:
+        # Photo stored before content addressing: it was never shared by design
+        db.info.setdefault("orphan_uploads", set()).add(file_name)
+        return
+    result = await db.execute(
+        delete(UploadBlob).where((UploadBlob.file_name == file_name) & (UploadBlob.ref_count <= 0))
+    )
+    if result.rowcount:
+        db.info.setdefault("orphan_uploads", set()).add(file_name)
+
+# Deletes the files among `file_names` that no upload_blob row references,
+# in a transaction of its own: another request may have stored the same
+# content again since they were released
+async def _remove_unreferenced(file_names):
+    try:
+        async with AsyncSessionLocal() as db:
+            await _lock_names(db, file_names)
+            # Also takes SQLite's write lock
+            await db.execute(delete(UploadBlob).where(UploadBlob.file_name.in_(file_names), UploadBlob.ref_count <= 0))
+            referenced = set(await db.scalars(select(UploadBlob.file_name).where(UploadBlob.file_name.in_(file_names))))
+            await run_in_threadpool(_unlink, [name for name in file_names if name not in referenced])
+            await db.commit()
+    except Exception:
+        logger.exception("Could not remove unreferenced uploads %s", sorted(file_names))
+
+def _schedule_removal(file_names):
+    if not file_names:
+        return
+    task = asyncio.get_running_loop().create_task(_remove_unreferenced(sorted(file_names)))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    session.info.pop("placed_uploads", None)
+    for photo_file in session.info.pop("new_photos", ()):
+        schedule_variants(photo_file)
+    _schedule_removal(session.info.pop("orphan_uploads", ()))
+
+# Rolled back, or closed without committing: nothing was released, and the
+# files this transaction placed may be unreferenced
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session, transaction):
+    if transaction.parent is not None:
+        return
+    session.info.pop("orphan_uploads", None)
+    session.info.pop("new_photos", None)
+    _schedule_removal(session.info.pop("placed_uploads", ()))
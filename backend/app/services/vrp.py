@@ -0,0 +1,245 @@
+import bisect
+import os
+import time
+import numpy as np
+from app.services.distance import distance_matrix
+
+# Candidate neighbours per stop for the savings list and relocate moves
+VRP_NEIGHBOURS = int(os.getenv("VRP_NEIGHBOURS", "30"))
+# Wall-clock budget for local search after the construction phase
+VRP_TIME_LIMIT_SECONDS = float(os.getenv("VRP_TIME_LIMIT_SECONDS", "10"))
+
+# Improvements below a metre are float32 rounding and would make moves cycle
+_EPSILON = 1e-3
+
+# The k nearest other stops of every stop, nearest first. Node 0 is the
+# depot and is never a neighbour; stops are 1..n.
+def nearest_neighbours(matrix, k):
+    n = matrix.shape[0] - 1
+    k = min(k, n - 1)
+    neighbours = np.empty((n, max(k, 0)), dtype=np.int64)
+    if k <= 0:
+        return neighbours
+    for start in range(0, n, 512):
+        stop = min(start + 512, n)
+        block = matrix[1 + start:1 + stop, 1:].astype(float)
+        block[np.arange(stop - start), np.arange(start, stop)] = np.inf
+        nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(block, nearest, axis=1), axis=1)
+        neighbours[start:stop] = np.take_along_axis(nearest, order, axis=1) + 1
+    return neighbours
+
+# Clarke-Wright savings over the neighbour pairs: every stop starts on its
+# own route and routes are joined end to end, best saving first, while the
+# joined load fits `capacity`.
+def savings_routes(matrix, demands, capacity, neighbours):
+    n = len(demands) - 1
+    first = np.repeat(np.arange(1, n + 1), neighbours.shape[1])
+    second = neighbours.ravel()
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    pairs = np.unique(low * (n + 1) + high)
+    low, high = pairs // (n + 1), pairs % (n + 1)
+    saving = matrix[0, low].astype(float) + matrix[0, high] - matrix[low, high]
+    keep = saving > 0
+    order = np.argsort(-saving[keep], kind="stable")
+
+    route_of = list(range(n + 1))
+    routes = {i: [i] for i in range(1, n + 1)}
+    load = {i: float(demands[i]) for i in range(1, n + 1)}
+    for a, b in zip(low[keep][order].tolist(), high[keep][order].tolist()):
+        ra, rb = route_of[a], route_of[b]
+        if ra == rb or load[ra] + load[rb] > capacity:
+            continue
+        route_a, route_b = routes[ra], routes[rb]
+        if a not in (route_a[0], route_a[-1]) or b not in (route_b[0], route_b[-1]):
+            continue
+        if route_a[-1] != a:
+            route_a.reverse()
+        if route_b[0] != b:
+            route_b.reverse()
+        # Relabel the shorter route
+        if len(route_a) >= len(route_b):
+            keep_id, drop_id = ra, rb
+            route_a.extend(route_b)
+            merged, moved = route_a, route_b
+        else:
+            keep_id, drop_id = rb, ra
+            route_b[:0] = route_a
+            merged, moved = route_b, route_a
+        for stop in moved:
+            route_of[stop] = keep_id
+        routes[keep_id] = merged
+        load[keep_id] += load.pop(drop_id)
+        del routes[drop_id]
+    return [(routes[r], load[r]) for r in routes]
+
+def route_distance(matrix, route):
+    if not route:
+        return 0.0
+    path = np.array([0, *route, 0])
+    return float(matrix[path[:-1], path[1:]].sum())
+
+# Heaviest route first onto the smallest free vehicle that can carry it. A
+# route no free vehicle can carry is cut in visiting order over the largest
+# free vehicles, so each piece stays geographically together.
+def assign_vehicles(routes, demands, capacities):
+    free = sorted((float(capacity), v) for v, capacity in enumerate(capacities))
+    assigned, leftover = {}, []
+    for route, load in sorted(routes, key=lambda item: -item[1]):
+        k = bisect.bisect_left(free, (load, -1))
+        if k < len(free):
+            _, v = free.pop(k)
+            assigned[v] = route
+            continue
+        while route and free:
+            capacity, v = free.pop()
+            cut = int(np.searchsorted(np.cumsum(demands[route]), capacity, side="right"))
+            if cut:
+                assigned[v] = route[:cut]
+                route = route[cut:]
+            else:
+                # Not even the first stop fits: the vehicle stays free
+                leftover.append(route.pop(0))
+                bisect.insort(free, (capacity, v))
+        leftover.extend(route)
+    return assigned, leftover
+
+# Cheapest insertion of the stops no route could take, heaviest first
+def insert_leftovers(matrix, demands, capacities, assigned, leftover):
+    loads = {v: float(demands[route].sum()) for v, route in assigned.items()}
+    unrouted = []
+    for stop in sorted(leftover, key=lambda s: -demands[s]):
+        best = None
+        for v, route in assigned.items():
+            if loads[v] + demands[stop] > capacities[v]:
+                continue
+            path = np.array([0, *route, 0])
+            cost = matrix[path[:-1], stop].astype(float) + matrix[stop, path[1:]] - matrix[path[:-1], path[1:]]
+            position = int(cost.argmin())
+            if best is None or cost[position] < best[0]:
+                best = (cost[position], v, position)
+        if best is None:
+            unrouted.append(stop)
+            continue
+        _, v, position = best
+        assigned[v].insert(position, stop)
+        loads[v] += demands[stop]
+    for v in capacities.nonzero()[0].tolist():
+        assigned.setdefault(v, [])
+    return unrouted
+
+# Best-improvement 2-opt inside one route; each step scores every second
+# edge against the first in one array operation
+def two_opt(matrix, route, deadline):
+    path = np.array([0, *route, 0])
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(len(path) - 3):
+            a, b = path[i], path[i + 1]
+            c, d = path[i + 2:-1], path[i + 3:]
+            gain = matrix[a, b] + matrix[c, d] - matrix[a, c] - matrix[b, d]
+            k = int(gain.argmax())
+            if gain[k] > _EPSILON:
+                j = i + 2 + k
+                path[i + 1:j + 1] = path[i + 1:j + 1][::-1].copy()
+                improved = True
+    return path[1:-1].tolist()
+
+# Moves a stop next to one of its neighbours on another route when that
+# shortens the total and the receiving vehicle has room
+def relocate(matrix, demands, capacities, assigned, neighbours, deadline):
+    route_of, position = {}, {}
+    for v, route in assigned.items():
+        for p, stop in enumerate(route):
+            route_of[stop], position[stop] = v, p
+    loads = {v: float(demands[route].sum()) for v, route in assigned.items()}
+    changed = set()
+
+    def around(route, p):
+        return (route[p - 1] if p > 0 else 0), (route[p + 1] if p + 1 < len(route) else 0)
+
+    for stop in list(route_of):
+        if time.perf_counter() > deadline:
+            break
+        v = route_of[stop]
+        route = assigned[v]
+        prev, nxt = around(route, position[stop])
+        removal = matrix[prev, stop] + matrix[stop, nxt] - matrix[prev, nxt]
+        best = None
+        for other in neighbours[stop - 1].tolist():
+            w = route_of.get(other)
+            if w is None or w == v or loads[w] + demands[stop] > capacities[w]:
+                continue
+            target = assigned[w]
+            p = position[other]
+            before, after = around(target, p)
+            # Insert between `before` and `other`, or between `other` and `after`
+            for at, u, x in ((p, before, other), (p + 1, other, after)):
+                delta = matrix[u, stop] + matrix[stop, x] - matrix[u, x] - removal
+                if delta < -_EPSILON and (best is None or delta < best[0]):
+                    best = (delta, w, at)
+        if best is None:
+            continue
+        _, w, at = best
+        route.pop(position[stop])
+        assigned[w].insert(at, stop)
+        loads[v] -= demands[stop]
+        loads[w] += demands[stop]
+        for u in (v, w):
+            for p, s in enumerate(assigned[u]):
+                route_of[s], position[s] = u, p
+        changed.update((v, w))
+    return changed
+
+# Capacitated routes from a depot. `lats`/`lons` hold the depot first and
+# then the stops; `demands` and the result use the stops' 0-based order.
+# Returns {"routes": [{"vehicle", "stops", "distance", "load"}], "unrouted",
+# "distance", "construction_ms", "improvement_ms"}.
+def solve(lats, lons, demands, capacities, matrix=None, time_limit=VRP_TIME_LIMIT_SECONDS, neighbours=VRP_NEIGHBOURS):
+    start = time.perf_counter()
+    if matrix is None:
+        matrix = distance_matrix(lats, lons)
+    capacities = np.asarray(capacities, dtype=float)
+    # Index 0 is the depot, with no demand
+    demands = np.concatenate(([0.0], np.asarray(demands, dtype=float)))
+    n = len(demands) - 1
+
+    assigned, unrouted = {}, []
+    if n and len(capacities):
+        near = nearest_neighbours(matrix, neighbours)
+        routes = savings_routes(matrix, demands, capacities.max(), near)
+        assigned, leftover = assign_vehicles(routes, demands, capacities)
+        unrouted = insert_leftovers(matrix, demands, capacities, assigned, leftover)
+    else:
+        near = np.empty((n, 0), dtype=np.int64)
+        unrouted = list(range(1, n + 1))
+    construction = time.perf_counter()
+
+    deadline = construction + time_limit
+    for v in assigned:
+        assigned[v] = two_opt(matrix, assigned[v], deadline)
+    while time.perf_counter() < deadline:
+        changed = relocate(matrix, demands, capacities, assigned, near, deadline)
+        if not changed:
+            break
+        for v in changed:
+            assigned[v] = two_opt(matrix, assigned[v], deadline)
+    end = time.perf_counter()
+
+    result = []
+    for v, route in sorted(assigned.items()):
+        if route:
+            result.append({
+                "vehicle": v,
+                "stops": [stop - 1 for stop in route],
+                "distance": route_distance(matrix, route),
+                "load": float(demands[route].sum()),
+            })
+    return {
+        "routes": result,
+        "unrouted": [stop - 1 for stop in unrouted],
+        "distance": sum(route["distance"] for route in result),
+        "construction_ms": round((construction - start) * 1000, 1),
+        "improvement_ms": round((end - construction) * 1000, 1),
+    }
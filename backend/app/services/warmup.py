@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import os
+import anyio
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from app.database.database import AsyncSessionLocal, async_engine, engine
+from app.database.migrate import upgrade
+from app.services.reference_data import REFERENCE_TABLES, load_reference_data
+
+logger = logging.getLogger(__name__)
+
+# First retry delay while the database is unreachable; doubles up to 30s
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "1"))
+HEALTH_DB_TIMEOUT_SECONDS = float(os.getenv("HEALTH_DB_TIMEOUT_SECONDS", "2"))
+
+_state = {"ready": False, "error": None}
+
+def is_ready():
+    return _state["ready"]
+
+def last_error():
+    return _state["error"]
+
+# Opens pool_size connections at once so the first requests skip the connect
+async def _warm_pool():
+    size = getattr(async_engine.sync_engine.pool, "size", lambda: 1)()
+
+    async def ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(size)))
+
+async def _warm_reference(name):
+    async with AsyncSessionLocal() as db:
+        await load_reference_data(db, name)
+
+async def _warm_up():
+    await anyio.to_thread.run_sync(upgrade, engine)
+    await _warm_pool()
+    await asyncio.gather(*(_warm_reference(name) for name in REFERENCE_TABLES))
+
+# Runs as a background task from the lifespan: the worker accepts traffic
+# (and answers /health/live) while the database is still coming up
+async def warm_up():
+    delay = WARMUP_RETRY_SECONDS
+    while True:
+        try:
+            await _warm_up()
+        except Exception as exc:
+            # An unreachable database is expected while it starts; anything
+            # else is a bug, logged with its traceback, and is retried too so
+            # /health/ready keeps reporting it instead of the task dying
+            _state["error"] = f"{type(exc).__name__}: {exc}".splitlines()[0]
+            logger.warning(
+                "Startup warm-up failed, retrying in %.1fs: %s", delay, _state["error"],
+                exc_info=not isinstance(exc, (SQLAlchemyError, OSError)),
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+            continue
+        _state["ready"] = True
+        _state["error"] = None
+        return
+
+async def database_reachable():
+    try:
+        with anyio.fail_after(HEALTH_DB_TIMEOUT_SECONDS):
+            async with async_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+    except (SQLAlchemyError, OSError, TimeoutError) as exc:
+        _state["error"] = f"{type(exc).__name__}: {exc}".splitlines()[0]
+        return False
+    return True
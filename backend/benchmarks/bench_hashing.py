@@ -0,0 +1,42 @@
+"""Password hashing micro-benchmark.
+
+Measures bcrypt verifications per second through the hashing executor at the
+configured cost factor (PASSWORD_HASH_ROUNDS), overall and per core.
+
+    cd backend && python -m benchmarks.bench_hashing --logins 200
+"""
+import argparse
+import asyncio
+import os
+import time
+from app.auth import hashing
+
+async def run(logins: int):
+    hashed = await hashing.get_password_hash("password")
+    # Stay under the queue limit so the benchmark measures throughput, not rejection
+    batch = hashing.PASSWORD_HASH_MAX_PENDING
+    start = time.perf_counter()
+    done = 0
+    while done < logins:
+        size = min(batch, logins - done)
+        results = await asyncio.gather(*(hashing.verify_password("password", hashed) for _ in range(size)))
+        assert all(valid for valid, _ in results)
+        done += size
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+    elapsed = asyncio.run(run(args.logins))
+    rate = args.logins / elapsed
+    cores = min(hashing.PASSWORD_HASH_WORKERS, os.cpu_count() or 1)
+    print(f"bcrypt rounds:     {hashing.PASSWORD_HASH_ROUNDS}")
+    print(f"hashing workers:   {hashing.PASSWORD_HASH_WORKERS}")
+    print(f"logins:            {args.logins} in {elapsed:.2f}s")
+    print(f"logins/sec:        {rate:.1f}")
+    print(f"logins/sec/core:   {rate / cores:.1f}")
+    hashing.shutdown_hashing()
+
+if __name__ == "__main__":
+    main()
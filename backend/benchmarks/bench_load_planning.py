@@ -0,0 +1,45 @@
+"""Load planning micro-benchmark.
+
+Packs synthetic orders onto a synthetic fleet with each strategy and reports
+the planning time, how many orders were placed and the weight utilisation
+of the vehicles used. No database is involved.
+
+    cd backend && python -m benchmarks.bench_load_planning --orders 10000 --vehicles 1000
+"""
+import argparse
+import time
+import numpy as np
+from app.services.load_planning import PLANNING_STRATEGIES, pack
+
+def fleet(rng, vehicles: int):
+    capacities = rng.choice([3500.0, 7500.0, 12000.0, 19000.0], vehicles)
+    # One vehicle in ten has no recorded volume and is not volume-limited
+    volumes = np.where(rng.random(vehicles) < 0.1, np.inf, capacities * 3)
+    return capacities, volumes
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--vehicles", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    weights = rng.uniform(50, 2000, args.orders)
+    volumes = rng.uniform(100, 8000, args.orders)
+    capacities, vehicle_volumes = fleet(rng, args.vehicles)
+
+    print(f"orders:            {args.orders}")
+    print(f"vehicles:          {args.vehicles}")
+    for strategy in PLANNING_STRATEGIES:
+        start = time.perf_counter()
+        assignment = pack(weights, volumes, capacities, vehicle_volumes, strategy)
+        elapsed = time.perf_counter() - start
+        planned = assignment >= 0
+        used = np.unique(assignment[planned])
+        utilisation = weights[planned].sum() / capacities[used].sum() if len(used) else 0.0
+        print(f"{strategy + ':':<18} {elapsed * 1000:.0f} ms, {planned.sum()} placed on {len(used)} vehicles, "
+              f"{utilisation:.1%} of their weight capacity")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Route planning benchmark.
+
+Builds synthetic delivery days (stops scattered around a depot, in clusters
+like towns) and solves them: distance matrix, savings construction, then local
+search. Reports the time of each phase, the total distance with and without
+local search, stops left unrouted and the vehicles used. No database is
+involved.
+
+    cd backend && python -m benchmarks.bench_routing --stops 5000 --vehicles 160
+
+With --pool N, N instances are solved at once in the spawn process pool the
+API uses for large days, to compare throughput against running them in turn.
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from app.services.distance import distance_matrix
+from app.services.vrp import solve
+
+def instance(seed: int, stops: int, vehicles: int):
+    rng = np.random.default_rng(seed)
+    depot = (52.37, 4.89)
+    towns = rng.normal(depot, 0.5, (max(stops // 200, 1), 2))
+    town = rng.integers(0, len(towns), stops)
+    points = towns[town] + rng.normal(0, 0.05, (stops, 2))
+    lats = np.concatenate(([depot[0]], points[:, 0]))
+    lons = np.concatenate(([depot[1]], points[:, 1]))
+    demands = rng.uniform(20, 400, stops)
+    capacities = rng.choice([3500.0, 7500.0, 12000.0], vehicles)
+    return lats, lons, demands, capacities
+
+def report(label, solution, stops):
+    print(f"{label + ':':<18} {solution['distance']:.0f} km on {len(solution['routes'])} routes, "
+          f"{len(solution['unrouted'])} of {stops} unrouted, construction {solution['construction_ms']:.0f} ms, "
+          f"local search {solution['improvement_ms']:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stops", type=int, default=5000)
+    parser.add_argument("--vehicles", type=int, default=160)
+    parser.add_argument("--time-limit", type=float, default=10.0, help="local search budget in seconds")
+    parser.add_argument("--pool", type=int, default=0, help="also solve this many instances in a process pool")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    lats, lons, demands, capacities = instance(args.seed, args.stops, args.vehicles)
+    print(f"stops:             {args.stops}")
+    print(f"vehicles:          {args.vehicles} ({capacities.sum():.0f} kg for {demands.sum():.0f} kg of demand)")
+
+    start = time.perf_counter()
+    matrix = distance_matrix(lats, lons)
+    print(f"distance matrix:   {(time.perf_counter() - start) * 1000:.0f} ms ({matrix.nbytes / 2**20:.0f} MB)")
+    report("savings only", solve(lats, lons, demands, capacities, matrix=matrix, time_limit=0), args.stops)
+    report("with local search", solve(lats, lons, demands, capacities, matrix=matrix, time_limit=args.time_limit), args.stops)
+
+    if args.pool:
+        instances = [instance(args.seed + k, args.stops, args.vehicles) for k in range(args.pool)]
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.pool, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(solve, *case, time_limit=args.time_limit) for case in instances]
+            distances = [future.result()["distance"] for future in futures]
+        elapsed = time.perf_counter() - start
+        print(f"process pool:      {args.pool} instances in {elapsed:.1f} s, "
+              f"{np.mean(distances):.0f} km average")
+
+if __name__ == "__main__":
+    main()
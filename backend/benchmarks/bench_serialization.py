@@ -0,0 +1,74 @@
+"""List response serialization benchmark.
+
+Serializes synthetic employee and vehicle list pages shaped like the SQL
+projections the list endpoints return, once through FastAPI's response_model
+path (Pydantic validation, jsonable_encoder, stdlib json) and once through
+the trusted orjson path, and reports rows per second for each. No database
+is involved; the bodies of both paths are checked to decode to the same data.
+
+    cd backend && python -m benchmarks.bench_serialization --rows 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+from typing import List
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from app.routes.employees import EmployeeResponse
+from app.routes.vehicles import VehicleResponse
+
+def employee_rows(n: int):
+    return [{
+        "id": i, "firstname": f"First{i}", "lastname": f"Last{i}", "email": f"user{i}@example.invalid",
+        "birth_date": date(1980, 1, 1) + timedelta(days=i % 9000), "hire_date": date(2015, 1, 1) + timedelta(days=i % 3000),
+        "function_id": 1, "status_id": 1 + i % 3, "line1": f"{i} Main Street", "line2": None, "line3": None,
+        "postalcode": "75001", "town": "Paris", "state": None, "country": "FR", "license_id": 1,
+        "photo_file": None, "function_name": "driver", "status_name": "available", "license_name": "C",
+        "assigned_vehicle": f"Renault_AB-{i:05d}" if i % 2 else None,
+    } for i in range(n)]
+
+def vehicle_rows(n: int):
+    return [{
+        "id": i, "license_plate": f"AB-{i:05d}", "make": "Renault", "model": "Master", "color": "white",
+        "type_id": 1, "status_id": 1 + i % 3, "insurance_id": 1, "capacity_kg": 3500.0, "volume_litre": 12000.0,
+        "photo_file": None, "vehicle_type_name": "van", "vehicle_status_name": "available", "insurance_ref": "INS-1",
+    } for i in range(n)]
+
+async def validated_body(field, rows):
+    content = await serialize_response(field=field, response_content=rows)
+    return JSONResponse(content).body
+
+def rate(fn, rows: int, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5, help="best of this many runs")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    for name, model, rows in (
+        ("employees", EmployeeResponse, employee_rows(args.rows)),
+        ("vehicles", VehicleResponse, vehicle_rows(args.rows)),
+    ):
+        field = create_response_field(name=f"Response_{name}", type_=List[model])
+        validated = loop.run_until_complete(validated_body(field, rows))
+        trusted = ORJSONResponse(rows).body
+        assert json.loads(validated) == json.loads(trusted), f"{name}: bodies differ"
+
+        before = rate(lambda: loop.run_until_complete(validated_body(field, rows)), len(rows), args.repeat)
+        after = rate(lambda: ORJSONResponse(rows).body, len(rows), args.repeat)
+        print(f"{name + ':':<11} response_model {before:>10,.0f} rows/s   orjson {after:>10,.0f} rows/s   "
+              f"x{after / before:.1f}")
+
+if __name__ == "__main__":
+    main()
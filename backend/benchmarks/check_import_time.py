@@ -0,0 +1,54 @@
+"""Import-time budget for the API.
+
+Imports app.main in fresh interpreters (python -X importtime) and fails if
+the fastest of --runs takes longer than the budget, listing the slowest app
+modules; the minimum is what the code costs, the spread above it is machine
+noise. Also fails if a module only the planning and photo routes need
+(numpy, Pillow) is imported at startup. Importing the app must not touch
+the database, so this also passes with the database down.
+
+    cd backend && python -m benchmarks.check_import_time --budget 1.5
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+# Imported by the functions that use them, never at startup
+LAZY_MODULES = ("numpy", "PIL")
+
+def measure():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit("\n".join(line for line in result.stderr.splitlines() if not line.startswith("import time:")))
+    # "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match:
+            modules.append((int(match.group(2)) / 1e6, int(match.group(1)) / 1e6, match.group(4)))
+    total = next(cumulative for cumulative, _, name in modules if name == "app.main")
+    return total, modules
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=1.5, help="seconds")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    total, modules = min((measure() for _ in range(max(args.runs, 1))), key=lambda run: run[0])
+    eager = sorted({name for _, _, name in modules if name.split(".")[0] in LAZY_MODULES and "." not in name})
+    print(f"import app.main:   {total:.3f}s, fastest of {args.runs} (budget {args.budget:.3f}s)")
+    if eager:
+        print(f"imported at startup, should be lazy: {', '.join(eager)}")
+    print("slowest app modules (self time):")
+    for _, self_time, name in sorted((m for m in modules if m[2].startswith("app")), key=lambda m: -m[1])[:args.top]:
+        print(f"  {self_time:.3f}s  {name}")
+    sys.exit(0 if total <= args.budget and not eager else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Cross-worker cache invalidation check.
+
+Starts --workers processes that each run the LISTEN/NOTIFY invalidation
+listener the API workers run, publishes evictions from this process and
+checks that every worker receives each one exactly once (and that this
+process does not act on its own echo). Reports the delivery latency. Then
+terminates this process's listener connection and checks that the eviction
+whose NOTIFY fails on it still reaches every worker after the reconnect.
+Needs DATABASE_URL pointing at a Postgres server; nothing is written.
+
+    cd backend && python -m benchmarks.check_invalidation --workers 4 --events 200
+"""
+import argparse
+import asyncio
+import multiprocessing
+import queue
+import sys
+import time
+import asyncpg
+import numpy as np
+from app.services import invalidation
+
+CACHE = "invalidation_check"
+
+def _worker(results, stop):
+    async def run():
+        # The first call, with no keys, is the eviction done on connect
+        invalidation.register(CACHE, lambda *keys: results.put((multiprocessing.current_process().name, keys, time.time())))
+        invalidation.start_invalidation_listener()
+        while not stop.is_set():
+            await asyncio.sleep(0.05)
+        invalidation.stop_invalidation_listener()
+    asyncio.run(run())
+
+# Waits for `keys` to reach every worker; returns (worker, key) -> deliveries
+# and the delivery latencies
+async def collect(results, workers, sent, timeout=30):
+    received, latencies = {}, []
+    deadline = time.monotonic() + timeout
+    while sum(received.values()) < len(sent) * workers and time.monotonic() < deadline:
+        try:
+            name, keys, at = results.get_nowait()
+        except queue.Empty:
+            # Polled: a blocking get would stall this process's listener
+            await asyncio.sleep(0.005)
+            continue
+        for key in keys:
+            if key in sent:
+                received[(name, key)] = received.get((name, key), 0) + 1
+                latencies.append(at - sent[key])
+    return received, latencies
+
+# Terminates the listener connection of this process, the one sending NOTIFYs
+async def drop_publisher():
+    connection = await asyncpg.connect(invalidation._dsn())
+    try:
+        return await connection.fetchval(
+            "SELECT count(pg_terminate_backend(pid)) FROM pg_stat_activity"
+            " WHERE pid <> pg_backend_pid() AND query LIKE 'SELECT pg_notify%'"
+        )
+    finally:
+        await connection.close()
+
+async def check(args):
+    context = multiprocessing.get_context("spawn")
+    results, stop = context.Queue(), context.Event()
+    workers = [context.Process(target=_worker, args=(results, stop), name=f"worker-{k}") for k in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        connected = set()
+        while len(connected) < args.workers:
+            name, keys, _ = results.get(timeout=30)
+            connected.add(name)
+
+        echoed = []
+        invalidation.register(CACHE, lambda *keys: echoed.append(keys))
+        invalidation.start_invalidation_listener()
+        await asyncio.sleep(0.5)
+        echoed.clear()
+
+        sent = {}
+        for n in range(args.events):
+            key = f"key-{n}"
+            sent[key] = time.time()
+            invalidation.notify(CACHE, key)
+            await asyncio.sleep(0)
+
+        received, latencies = await collect(results, args.workers, sent)
+
+        echoes = len(echoed)
+        dropped = await drop_publisher()
+        resent = {"after-reconnect": time.time()}
+        invalidation.notify(CACHE, "after-reconnect")
+        after_reconnect, _ = await collect(results, args.workers, resent)
+        invalidation.stop_invalidation_listener()
+        # The reconnect empties this process's caches; that is not an echo
+        del echoed[echoes:]
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(5)
+
+    missing = args.events * args.workers - len(received)
+    duplicated = sum(count - 1 for count in received.values())
+    print(f"workers:   {args.workers}")
+    print(f"events:    {args.events} sent, {missing} missing, {duplicated} duplicated, {len(echoed)} echoed back")
+    if latencies:
+        p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+        print(f"latency:   p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+    lost = args.workers - len(after_reconnect)
+    print(f"reconnect: {dropped} connection terminated, eviction sent on it reached {len(after_reconnect)}/{args.workers} workers")
+    return not (missing or duplicated or echoed or lost or not dropped)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    if not invalidation.enabled():
+        sys.exit("DATABASE_URL must point at Postgres (and CACHE_INVALIDATION be on)")
+    sys.exit(0 if asyncio.run(check(args)) else 1)
+
+if __name__ == "__main__":
+    main()
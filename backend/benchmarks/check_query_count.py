@@ -0,0 +1,154 @@
+"""Constant query count check for the employee and vehicle routes.
+
+Seeds --rows employees and vehicles (half of them assigned, with an ended
+assignment each and some with a photo), counts the SQL statements the list
+(unpaginated) and detail routes run, then grows the tables to ten times
+that size and counts again. Exits non-zero when a route's count changed,
+the signature of a per-row query. Each route is requested once before
+counting so the lookup and principal caches are warm at both sizes.
+
+Runs the app in-process against a fresh SQLite file unless --database-url
+points at an empty scratch database. Needs httpx and aiosqlite (pip install
+httpx aiosqlite).
+
+    cd backend && python -m benchmarks.check_query_count --rows 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+USERNAME = "query-count"
+PASSWORD = "query-count-password"
+ROUTES = ("/api/employees", "/api/employees/{employee_id}", "/api/vehicles", "/api/vehicles/{vehicle_id}")
+
+# Reference rows, an Admin user to log in with; returns the foreign keys
+def seed_reference(conn):
+    from sqlalchemy import insert, select
+    from app.auth.hashing import pwd_context
+    from app.models import models
+
+    def add(model, values):
+        return conn.execute(insert(model).values(**values).returning(model.id)).scalar_one() if conn.dialect.insert_returning \
+            else conn.execute(insert(model).values(**values)).inserted_primary_key[0]
+
+    if conn.scalar(select(models.Employee.id).limit(1)) is not None:
+        raise SystemExit("The database already has employees; use an empty scratch database")
+    role_id = add(models.Role, {"role_name": "Admin"})
+    add(models.User, {"username": USERNAME, "hashed_password": pwd_context.hash(PASSWORD), "role_id": role_id, "is_active": True})
+    return {
+        "function_id": add(models.EmployeeFunction, {"name": "driver"}),
+        "employee_status_id": add(models.EmployeeStatus, {"name": "disponible"}),
+        "license_id": add(models.DrivingLicense, {"driving_license_ame": "C"}),
+        "vehicle_status_id": add(models.VehicleStatus, {"vehicle_status_name": "disponible"}),
+        "type_id": add(models.VehicleType, {"vehicle_type_name": "truck"}),
+        "insurance_id": add(models.Insurance, {"insurance_ref": "QC-1"}),
+    }
+
+# Employees and vehicles numbered [start, stop); every other pair assigned
+def seed_rows(conn, refs, start: int, stop: int):
+    from sqlalchemy import insert, select
+    from app.models import models
+
+    now = datetime.utcnow()
+    conn.execute(insert(models.Employee), [{
+        "firstname": f"Count{i}", "lastname": "Check", "email": f"count-{i}@example.invalid",
+        "birth_date": date(1980, 1, 1), "hire_date": date(2015, 1, 1),
+        "function_id": refs["function_id"], "status_id": refs["employee_status_id"], "license_id": refs["license_id"],
+        "town": "Lyon", "photo_file": f"uploads/count-{i}.jpg" if i % 4 == 0 else None,
+        "created_at": now, "updated_at": now,
+    } for i in range(start, stop)])
+    conn.execute(insert(models.Vehicle), [{
+        "license_plate": f"QC-{i}", "make": "Count", "model": "Check",
+        "type_id": refs["type_id"], "status_id": refs["vehicle_status_id"], "insurance_id": refs["insurance_id"],
+        "capacity_kg": 3500.0, "volume_litre": 12000.0,
+        "photo_file": f"uploads/qc-{i}.jpg" if i % 4 == 0 else None,
+        "created_at": now, "updated_at": now,
+    } for i in range(start, stop)])
+    employee_ids = list(conn.scalars(select(models.Employee.id).order_by(models.Employee.id)))[start:stop]
+    vehicle_ids = list(conn.scalars(select(models.Vehicle.id).order_by(models.Vehicle.id)))[start:stop]
+    pairs = list(zip(vehicle_ids, employee_ids))[::2]
+    conn.execute(insert(models.VehicleAssign), [
+        {"vehicle_id": v, "employee_id": e, "created_at": now - timedelta(days=30), "updated_at": now, "end_date": now - timedelta(days=1)}
+        for v, e in pairs
+    ] + [
+        {"vehicle_id": v, "employee_id": e, "created_at": now, "updated_at": now, "end_date": None}
+        for v, e in pairs
+    ])
+    active = conn.execute(select(models.VehicleAssign.id, models.VehicleAssign.vehicle_id, models.VehicleAssign.employee_id)
+                          .where(models.VehicleAssign.end_date.is_(None), models.VehicleAssign.vehicle_id.in_(vehicle_ids)))
+    conn.execute(insert(models.CurrentVehicleAssign), [
+        {"vehicle_id": vehicle_id, "employee_id": employee_id, "assign_id": assign_id, "assigned_at": now}
+        for assign_id, vehicle_id, employee_id in active
+    ])
+    # An assigned pair, so the detail routes include an assignment
+    return {"employee_id": pairs[0][1], "vehicle_id": pairs[0][0]}
+
+# Statements run by one request to each route, and the rows it returned
+def measure(client, statements, ids):
+    results = {}
+    for route in ROUTES:
+        path = route.format(**ids)
+        client.get(path).raise_for_status()
+        statements.clear()
+        response = client.get(path)
+        response.raise_for_status()
+        body = response.json()
+        results[route] = (list(statements), len(body) if isinstance(body, list) else 1)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100, help="employees and vehicles at the small size")
+    parser.add_argument("--database-url", help="default: a fresh SQLite file in a temporary directory")
+    parser.add_argument("--verbose", action="store_true", help="print the statements of a changed route")
+    args = parser.parse_args()
+    if args.rows < 2:
+        parser.error("--rows must be at least 2")
+
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='query-count-'), 'check.db')}"
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.database.database import async_engine, engine
+    from app.database.migrate import upgrade
+    from app.main import app
+
+    upgrade(engine)
+    with engine.begin() as conn:
+        refs = seed_reference(conn)
+        ids = seed_rows(conn, refs, 0, args.rows)
+
+    statements = []
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", lambda conn, cursor, statement, *rest: statements.append(statement))
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 60
+        while client.get("/health/ready").status_code != 200:
+            if time.monotonic() > deadline:
+                raise SystemExit("The app did not become ready")
+            time.sleep(0.1)
+        token = client.post("/api/login", data={"username": USERNAME, "password": PASSWORD}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        small = measure(client, statements, ids)
+        with engine.begin() as conn:
+            seed_rows(conn, refs, args.rows, args.rows * 10)
+        large = measure(client, statements, ids)
+
+    failed = False
+    print(f"{'route':<32} {'rows':>13} {'statements':>12}")
+    for route in ROUTES:
+        (small_sql, small_rows), (large_sql, large_rows) = small[route], large[route]
+        changed = len(small_sql) != len(large_sql)
+        failed |= changed
+        print(f"{route:<32} {small_rows:>6} {large_rows:>6} {len(small_sql):>6} {len(large_sql):>5}  {'CHANGED' if changed else 'ok'}")
+        if changed and args.verbose:
+            for statement in large_sql:
+                print("    " + " ".join(statement.split())[:160])
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
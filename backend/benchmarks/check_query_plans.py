@@ -0,0 +1,132 @@
+"""Query plan regression check for the hot lookups.
+
+Seeds a large synthetic dataset inside a transaction, runs ANALYZE and then
+EXPLAIN on every statement from hot_queries(). Exits non-zero when a plan scans
+a whole large table instead of using an index. The transaction is rolled
+back, so the database is left as it was; still, point DATABASE_URL at a
+scratch database with the migrations applied.
+
+    cd backend && python -m benchmarks.check_query_plans --vehicles 20000
+
+Low-cardinality filters such as status_id are not listed: the planner is
+right to scan when a third of the table matches.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from app.database.database import engine
+from app.models.models import CurrentVehicleAssign, Employee, Vehicle, VehicleAssign
+
+LARGE_TABLES = {"vehicles", "employees", "vehicle_assign", "current_vehicle_assign"}
+
+# Built once the seeded ids are known so every lookup hits a real row
+def hot_queries(vehicle_id, employee_id):
+    return {
+        "active assignment by vehicle": select(VehicleAssign).where(
+            (VehicleAssign.vehicle_id == vehicle_id) & (VehicleAssign.end_date.is_(None))
+        ),
+        "active assignment by employee": select(VehicleAssign).where(
+            (VehicleAssign.employee_id == employee_id) & (VehicleAssign.end_date.is_(None))
+        ),
+        "current assignment by employee": select(CurrentVehicleAssign).where(
+            CurrentVehicleAssign.employee_id == employee_id
+        ),
+        "assignment history by vehicle": select(VehicleAssign).where(VehicleAssign.vehicle_id == vehicle_id),
+        "vehicle by license plate": select(Vehicle.id).where(Vehicle.license_plate == f"PLAN-{vehicle_id}"),
+        "employee by email": select(Employee.id).where(Employee.email == f"plan-{employee_id}@example.invalid"),
+        "vehicles last modified": select(func.max(Vehicle.updated_at)),
+        "employees last modified": select(func.max(Employee.updated_at)),
+        "assignments last modified": select(func.max(VehicleAssign.updated_at)),
+    }
+
+def seed(conn, vehicles: int, employees: int, history: int):
+    now = datetime.utcnow()
+    chunk = 5000
+    for start in range(0, vehicles, chunk):
+        conn.execute(insert(Vehicle), [
+            {"license_plate": f"PLAN-{i}", "make": "Plan", "model": "Check",
+             "created_at": now, "updated_at": now - timedelta(seconds=i)}
+            for i in range(start, min(start + chunk, vehicles))
+        ])
+    for start in range(0, employees, chunk):
+        conn.execute(insert(Employee), [
+            {"firstname": "Plan", "lastname": f"Check{i}", "email": f"plan-{i}@example.invalid",
+             "created_at": now, "updated_at": now - timedelta(seconds=i)}
+            for i in range(start, min(start + chunk, employees))
+        ])
+    vehicle_ids = list(conn.scalars(select(Vehicle.id).where(Vehicle.make == "Plan").order_by(Vehicle.id)))
+    employee_ids = list(conn.scalars(select(Employee.id).where(Employee.firstname == "Plan").order_by(Employee.id)))
+    rows = []
+    for n, vehicle_id in enumerate(vehicle_ids):
+        employee_id = employee_ids[n % len(employee_ids)]
+        for k in range(history):
+            active = k == history - 1
+            rows.append({
+                "vehicle_id": vehicle_id, "employee_id": employee_id,
+                "created_at": now, "updated_at": now,
+                "end_date": None if active else now - timedelta(days=history - k),
+            })
+        if len(rows) >= chunk:
+            conn.execute(insert(VehicleAssign), rows)
+            rows = []
+    if rows:
+        conn.execute(insert(VehicleAssign), rows)
+    conn.execute(insert(CurrentVehicleAssign).from_select(
+        ["vehicle_id", "employee_id", "assign_id", "assigned_at"],
+        select(VehicleAssign.vehicle_id, VehicleAssign.employee_id, VehicleAssign.id, VehicleAssign.created_at)
+        .where(VehicleAssign.end_date.is_(None)),
+    ))
+    conn.execute(text("ANALYZE"))
+    return vehicle_ids[len(vehicle_ids) // 2], employee_ids[len(employee_ids) // 2]
+
+def _postgres_scans(plan):
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in LARGE_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found.extend(_postgres_scans(child))
+    return found
+
+# Names of large tables read by a full scan, and the plan text
+def explain(conn, stmt):
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return _postgres_scans(plan[0]["Plan"]), json.dumps(plan[0]["Plan"], indent=2)
+    # SQLite: a SCAN or SEARCH step without "USING ... INDEX" reads the table
+    details = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    scans = [
+        detail.split()[1] for detail in details
+        if detail.startswith(("SCAN ", "SEARCH ")) and "USING" not in detail and detail.split()[1] in LARGE_TABLES
+    ]
+    return scans, "\n".join(details)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehicles", type=int, default=20000)
+    parser.add_argument("--employees", type=int, default=20000)
+    parser.add_argument("--history", type=int, default=5, help="assignments per vehicle, the last one active")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    failures = 0
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            vehicle_id, employee_id = seed(conn, args.vehicles, args.employees, args.history)
+            for name, stmt in hot_queries(vehicle_id, employee_id).items():
+                scans, plan = explain(conn, stmt)
+                print(f"{'FAIL' if scans else 'ok  '}  {name}" + (f"  (seq scan on {', '.join(scans)})" if scans else ""))
+                if scans or args.verbose:
+                    print(plan)
+                failures += bool(scans)
+        finally:
+            transaction.rollback()
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
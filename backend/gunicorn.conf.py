@@ -0,0 +1,23 @@
+import os
+
+# gunicorn -c gunicorn.conf.py app.main:app
+#
+# One uvicorn worker (one event loop) per CPU this container may run on.
+# Each worker has its own database pools, so Postgres sees up to
+# workers * 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections, plus one
+# cache invalidation listener per worker. WEB_CONCURRENCY overrides the count.
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY") or len(os.sched_getaffinity(0)))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+accesslog = "-"
+
+# Workers sum their /metrics through METRICS_DIR; counts of a previous
+# server run are dropped, which Prometheus handles as a counter reset
+def on_starting(server):
+    import shutil
+    from app.services.instrumentation import METRICS_DIR
+
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
@@ -1,4 +1,7 @@
 -- Copy the entire SQL script you provided here
+-- Baseline schema and reference data for a new database, the same tables as
+-- backend/app/database/migrations/0001_baseline.py. Do not add schema changes
+-- here: the API applies the later migrations when it starts.
 -- roles definition
 CREATE TABLE roles (
     id serial4 NOT NULL,
@@ -275,6 +278,18 @@ CREATE TABLE delivery (
     CONSTRAINT delivery_address_fkey FOREIGN KEY (employee_id) REFERENCES employees(id)
 );
 
+-- upload_blob definition
+CREATE TABLE upload_blob (
+    id serial4 NOT NULL,
+    file_name varchar NOT NULL,
+    size_bytes int4 NULL,
+    ref_count int4 NOT NULL DEFAULT 0,
+    created_at timestamp,
+    updated_at timestamp,
+    CONSTRAINT upload_blob_file_name_key UNIQUE (file_name),
+    CONSTRAINT upload_blob_pkey PRIMARY KEY (id)
+);
+
 -- Insert data into driving_license
 INSERT INTO "driving_license" ("driving_license_ame", "descript")
 VALUES 
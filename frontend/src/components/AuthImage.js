@@ -0,0 +1,41 @@
+import { useEffect, useState } from 'react';
+import { Image } from '@chakra-ui/react';
+import axios from 'axios';
+
+// Image served by an authenticated API route. The browser cannot attach the
+// bearer token to a plain <img src>, so the bytes are fetched with axios and
+// shown through an object URL; the HTTP cache still applies to the request.
+const AuthImage = ({ src, ...props }) => {
+  const [objectUrl, setObjectUrl] = useState(null);
+
+  useEffect(() => {
+    let url = null;
+    let cancelled = false;
+    const fetchImage = async () => {
+      try {
+        const token = localStorage.getItem('token');
+        const response = await axios.get(src, {
+          headers: { Authorization: `Bearer ${token}` },
+          responseType: 'blob',
+        });
+        if (!cancelled) {
+          url = URL.createObjectURL(response.data);
+          setObjectUrl(url);
+        }
+      } catch (error) {
+        setObjectUrl(null);
+      }
+    };
+    fetchImage();
+    return () => {
+      cancelled = true;
+      if (url) {
+        URL.revokeObjectURL(url);
+      }
+    };
+  }, [src]);
+
+  return objectUrl ? <Image src={objectUrl} {...props} /> : null;
+};
+
+export default AuthImage;
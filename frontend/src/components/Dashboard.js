@@ -1,8 +1,9 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { Box, Heading, Grid, GridItem, useToast } from '@chakra-ui/react';
 import axios from 'axios';
 import { Pie } from 'react-chartjs-2';
 import { Chart as ChartJS, ArcElement, Tooltip, Legend } from 'chart.js';
+import useFleetEvents from '../hooks/useFleetEvents';
 
 // Register Chart.js components
 ChartJS.register(ArcElement, Tooltip, Legend);
@@ -12,78 +13,57 @@ const Dashboard = () => {
   const [employeeStatusData, setEmployeeStatusData] = useState({ labels: [], datasets: [] });
   const [vehicleStatusData, setVehicleStatusData] = useState({ labels: [], datasets: [] });
 
-  useEffect(() => {
-    const fetchEmployeeStatusDistribution = async () => {
-      try {
-        const token = localStorage.getItem('token');
-        const response = await axios.get(
-          `${process.env.REACT_APP_API_URL}/employee_status_distribution`,
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
-
-        const data = response.data;
-        const labels = data.map(item => item.status_name);
-        const counts = data.map(item => item.count);
-
-        setEmployeeStatusData({
-          labels,
-          datasets: [
-            {
-              label: 'Employees by Status',
-              data: counts,
-              backgroundColor: ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#C9CBCF'],
-              hoverOffset: 4,
-            },
-          ],
-        });
-      } catch (error) {
-        toast({
-          title: 'Error fetching employee status distribution',
-          description: error.response?.data?.detail || 'An error occurred',
-          status: 'error',
-          duration: 5000,
-          isClosable: true,
-        });
-      }
-    };
+  const fetchDashboardStats = useCallback(async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(
+        `${process.env.REACT_APP_API_URL}/dashboard_stats`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
 
-    const fetchVehicleStatusDistribution = async () => {
-      try {
-        const token = localStorage.getItem('token');
-        const response = await axios.get(
-          `${process.env.REACT_APP_API_URL}/vehicle_status_distribution`,
-          { headers: { Authorization: `Bearer ${token}` } }
-        );
+      const employeeData = response.data.employee_status_distribution;
+      setEmployeeStatusData({
+        labels: employeeData.map(item => item.status_name),
+        datasets: [
+          {
+            label: 'Employees by Status',
+            data: employeeData.map(item => item.count),
+            backgroundColor: ['#FF6384', '#36A2EB', '#FFCE56', '#4BC0C0', '#9966FF', '#FF9F40', '#C9CBCF'],
+            hoverOffset: 4,
+          },
+        ],
+      });
 
-        const data = response.data;
-        const labels = data.map(item => item.status_name);
-        const counts = data.map(item => item.count);
+      const vehicleData = response.data.vehicle_status_distribution;
+      setVehicleStatusData({
+        labels: vehicleData.map(item => item.status_name),
+        datasets: [
+          {
+            label: 'Vehicles by Status',
+            data: vehicleData.map(item => item.count),
+            backgroundColor: ['#36A2EB', '#FFCE56', '#FF6384'], // Blue: Available, Yellow: Maintenance, Red: Assigned
+            hoverOffset: 4,
+          },
+        ],
+      });
+    } catch (error) {
+      toast({
+        title: 'Error fetching dashboard statistics',
+        description: error.response?.data?.detail || 'An error occurred',
+        status: 'error',
+        duration: 5000,
+        isClosable: true,
+      });
+    }
+  }, [toast]);
 
-        setVehicleStatusData({
-          labels,
-          datasets: [
-            {
-              label: 'Vehicles by Status',
-              data: counts,
-              backgroundColor: ['#36A2EB', '#FFCE56', '#FF6384'], // Blue: Available, Yellow: Maintenance, Red: Assigned
-              hoverOffset: 4,
-            },
-          ],
-        });
-      } catch (error) {
-        toast({
-          title: 'Error fetching vehicle status distribution',
-          description: error.response?.data?.detail || 'An error occurred',
-          status: 'error',
-          duration: 5000,
-          isClosable: true,
-        });
-      }
-    };
+  useEffect(() => {
+    fetchDashboardStats();
+  }, [fetchDashboardStats]);
 
-    fetchEmployeeStatusDistribution();
-    fetchVehicleStatusDistribution();
-  }, [toast]);
+  // Any fleet change can move a status count; the stats endpoint is served
+  // from maintained counters, so reloading it per batch is cheap
+  useFleetEvents(fetchDashboardStats);
 
   const pieOptions = {
     responsive: true,
@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useState } from 'react';
 import {
   Box,
   Button,
@@ -24,12 +24,17 @@ import {
   Select,
   SimpleGrid,
   VStack,
-  Image,
 } from '@chakra-ui/react';
 import axios from 'axios';
+import AuthImage from './AuthImage';
+import useFleetEvents, { applyRowEvents } from '../hooks/useFleetEvents';
+
+// Number of employees fetched per page from the API
+const PAGE_SIZE = 100;
 
 const Employees = () => {
   const [employees, setEmployees] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [functions, setFunctions] = useState([]);
   const [statuses, setStatuses] = useState([]);
   const [licenses, setLicenses] = useState([]);
@@ -66,6 +71,7 @@ const Employees = () => {
         const [employeesRes, functionsRes, statusesRes, licensesRes] = await Promise.all([
           axios.get(`${process.env.REACT_APP_API_URL}/employees`, {
             headers: { Authorization: `Bearer ${token}` },
+            params: { limit: PAGE_SIZE },
           }),
           axios.get(`${process.env.REACT_APP_API_URL}/employee_functions`, {
             headers: { Authorization: `Bearer ${token}` },
@@ -78,6 +84,7 @@ const Employees = () => {
           }),
         ]);
         setEmployees(employeesRes.data);
+        setNextCursor(employeesRes.headers['x-next-cursor'] || null);
         setFunctions(functionsRes.data);
         setStatuses(statusesRes.data);
         setLicenses(licensesRes.data);
@@ -94,6 +101,52 @@ const Employees = () => {
     fetchData();
   }, [toast]);
 
+  // Reload the first page, after the server asked for a resync
+  const reloadEmployees = useCallback(async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${process.env.REACT_APP_API_URL}/employees`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: PAGE_SIZE },
+      });
+      setEmployees(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      // The next event or reconnect retries
+    }
+  }, []);
+
+  // Live fleet changes, from any user: touched rows are re-read one by one
+  // instead of reloading the list
+  useFleetEvents(async (events) => {
+    if (!events) {
+      reloadEmployees();
+      return;
+    }
+    setEmployees(await applyRowEvents(events, 'employee', 'employees', 'employee_id', !nextCursor));
+  });
+
+  // Fetch the next page of employees
+  const loadMoreEmployees = async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${process.env.REACT_APP_API_URL}/employees`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: PAGE_SIZE, cursor: nextCursor },
+      });
+      setEmployees([...employees, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      toast({
+        title: 'Error fetching employees',
+        description: error.response?.data?.detail || 'An error occurred',
+        status: 'error',
+        duration: 5000,
+        isClosable: true,
+      });
+    }
+  };
+
   // Reset form data when opening the Add modal
   const openAddModal = () => {
     setFormData({
@@ -408,6 +461,11 @@ const Employees = () => {
           ))}
         </Tbody>
       </Table>
+      {nextCursor && (
+        <Button mt={4} size="sm" onClick={loadMoreEmployees}>
+          Load more
+        </Button>
+      )}
 
       {/* Add Employee Modal */}
       <Modal isOpen={isAddModalOpen} onClose={() => setIsAddModalOpen(false)} size="xl">
@@ -570,8 +628,8 @@ const Employees = () => {
               <HStack spacing={4}>
                 {/* Display Employee Photo */}
                 {selectedEmployee.photo_file ? (
-                  <Image
-                    src={`http://10.118.1.7/api/uploads/${selectedEmployee.photo_file.split('/').pop()}`}
+                  <AuthImage
+                    src={`${process.env.REACT_APP_API_URL}/uploads/${selectedEmployee.photo_file.split('/').pop()}?size=256`}
                     alt={`${selectedEmployee.firstname} ${selectedEmployee.lastname}`}
                     boxSize="150px"
                     objectFit="cover"
@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useCallback, useEffect, useState } from 'react';
 import {
   Box,
   Button,
@@ -24,12 +24,17 @@ import {
   Select,
   SimpleGrid,
   VStack,
-  Image,
 } from '@chakra-ui/react';
 import axios from 'axios';
+import AuthImage from './AuthImage';
+import useFleetEvents, { applyRowEvents } from '../hooks/useFleetEvents';
+
+// Number of vehicles fetched per page from the API
+const PAGE_SIZE = 100;
 
 const Vehicles = () => {
   const [vehicles, setVehicles] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [vehicleTypes, setVehicleTypes] = useState([]);
   const [vehicleStatuses, setVehicleStatuses] = useState([]);
   const [insurances, setInsurances] = useState([]);
@@ -67,6 +72,7 @@ const Vehicles = () => {
         const [vehiclesRes, typesRes, statusesRes, insurancesRes, employeesRes] = await Promise.all([
           axios.get(`${process.env.REACT_APP_API_URL}/vehicles`, {
             headers: { Authorization: `Bearer ${token}` },
+            params: { limit: PAGE_SIZE },
           }),
           axios.get(`${process.env.REACT_APP_API_URL}/vehicle_types`, {
             headers: { Authorization: `Bearer ${token}` },
@@ -82,6 +88,7 @@ const Vehicles = () => {
           }),
         ]);
         setVehicles(vehiclesRes.data);
+        setNextCursor(vehiclesRes.headers['x-next-cursor'] || null);
         setVehicleTypes(typesRes.data);
         setVehicleStatuses(statusesRes.data);
         setInsurances(insurancesRes.data);
@@ -315,6 +322,52 @@ const Vehicles = () => {
     }
   };
 
+  // Reload the first page, after the server asked for a resync
+  const reloadVehicles = useCallback(async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${process.env.REACT_APP_API_URL}/vehicles`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: PAGE_SIZE },
+      });
+      setVehicles(response.data);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      // The next event or reconnect retries
+    }
+  }, []);
+
+  // Live fleet changes, from any user: touched rows are re-read one by one
+  // instead of reloading the list
+  useFleetEvents(async (events) => {
+    if (!events) {
+      reloadVehicles();
+      return;
+    }
+    setVehicles(await applyRowEvents(events, 'vehicle', 'vehicles', 'vehicle_id', !nextCursor));
+  });
+
+  // Fetch the next page of vehicles
+  const loadMoreVehicles = async () => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${process.env.REACT_APP_API_URL}/vehicles`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { limit: PAGE_SIZE, cursor: nextCursor },
+      });
+      setVehicles([...vehicles, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      toast({
+        title: 'Error fetching vehicles',
+        description: error.response?.data?.detail || 'An error occurred',
+        status: 'error',
+        duration: 5000,
+        isClosable: true,
+      });
+    }
+  };
+
   // Handle Assign Vehicle
   const handleAssignVehicle = async () => {
     try {
@@ -336,11 +389,7 @@ const Vehicles = () => {
         duration: 3000,
         isClosable: true,
       });
-      // Refresh vehicles list to reflect the assignment
-      const vehiclesRes = await axios.get(`${process.env.REACT_APP_API_URL}/vehicles`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setVehicles(vehiclesRes.data);
+      // The assignment event refreshes the vehicle's row
     } catch (error) {
       if (error.response?.status === 403) {
         toast({
@@ -382,11 +431,7 @@ const Vehicles = () => {
         duration: 3000,
         isClosable: true,
       });
-      // Refresh vehicles list to reflect the unassignment
-      const vehiclesRes = await axios.get(`${process.env.REACT_APP_API_URL}/vehicles`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setVehicles(vehiclesRes.data);
+      // The unassignment event refreshes the vehicle's row
     } catch (error) {
       toast({
         title: 'Error unassigning vehicle',
@@ -469,6 +514,11 @@ const Vehicles = () => {
           ))}
         </Tbody>
       </Table>
+      {nextCursor && (
+        <Button mt={4} size="sm" onClick={loadMoreVehicles}>
+          Load more
+        </Button>
+      )}
 
       {/* Add Vehicle Modal */}
       <Modal isOpen={isAddModalOpen} onClose={() => setIsAddModalOpen(false)} size="xl">
@@ -588,8 +638,8 @@ const Vehicles = () => {
             {selectedVehicle && (
               <HStack spacing={4}>
                 {selectedVehicle.photo_file ? (
-                  <Image
-                    src={`http://10.118.1.7/api/uploads/${selectedVehicle.photo_file.split('/').pop()}`}
+                  <AuthImage
+                    src={`${process.env.REACT_APP_API_URL}/uploads/${selectedVehicle.photo_file.split('/').pop()}?size=256`}
                     alt={`${selectedVehicle.make} ${selectedVehicle.model}`}
                     boxSize="150px"
                     objectFit="cover"
@@ -0,0 +1,99 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+
+// Subscribes to the server-sent fleet events while the component is mounted.
+// `onEvents` is called with each batch of delta events, or with null when the
+// page should reload what it shows: the server asked for a resync, or the
+// stream was reconnected and events may have been missed meanwhile.
+// fetch() rather than EventSource so the bearer token can be sent.
+const useFleetEvents = (onEvents) => {
+  const handler = useRef(onEvents);
+  handler.current = onEvents;
+
+  useEffect(() => {
+    const controller = new AbortController();
+    let retryDelay = 1000;
+    let connected = false;
+
+    const dispatch = (block) => {
+      let name = 'message';
+      const data = [];
+      block.split('\n').forEach((line) => {
+        if (line.startsWith('event:')) name = line.slice(6).trim();
+        else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+      });
+      if (name === 'delta') handler.current(JSON.parse(data.join('\n')));
+      else if (name === 'resync') handler.current(null);
+    };
+
+    const listen = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          const token = localStorage.getItem('token');
+          const response = await fetch(`${process.env.REACT_APP_API_URL}/events`, {
+            headers: { Authorization: `Bearer ${token}`, Accept: 'text/event-stream' },
+            signal: controller.signal,
+          });
+          if (!response.ok) throw new Error(`HTTP ${response.status}`);
+          if (connected) handler.current(null);
+          connected = true;
+          retryDelay = 1000;
+
+          const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+          let buffer = '';
+          for (;;) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+            let end;
+            while ((end = buffer.indexOf('\n\n')) >= 0) {
+              dispatch(buffer.slice(0, end));
+              buffer = buffer.slice(end + 2);
+            }
+          }
+        } catch (error) {
+          if (controller.signal.aborted) return;
+        }
+        // Back off on failures and server restarts, up to 30 seconds
+        await new Promise((resolve) => setTimeout(resolve, retryDelay));
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      }
+    };
+
+    listen();
+    return () => controller.abort();
+  }, []);
+};
+
+// Re-reads the rows of `type` ('employee' or 'vehicle', served under `path`)
+// touched by a batch of events, an assignment touching the row named by
+// `assignmentKey`, and returns a state updater applying them to a loaded
+// list. New rows are appended only when `appendNew` (the last page is shown).
+export const applyRowEvents = async (events, type, path, assignmentKey, appendNew) => {
+  const token = localStorage.getItem('token');
+  const removed = new Set();
+  const changed = new Set();
+  events.forEach((event) => {
+    if (event.type === type) (event.op === 'deleted' ? removed : changed).add(event.id);
+    else if (event.type === 'assignment') changed.add(event[assignmentKey]);
+  });
+  const fresh = new Map();
+  await Promise.all([...changed].map(async (id) => {
+    try {
+      const response = await axios.get(`${process.env.REACT_APP_API_URL}/${path}/${id}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      fresh.set(id, response.data);
+    } catch (error) {
+      if (error.response?.status === 404) removed.add(id);
+    }
+  }));
+  return (rows) => {
+    const kept = rows.filter((row) => !removed.has(row.id)).map((row) => fresh.get(row.id) || row);
+    if (!appendNew) return kept;
+    const known = new Set(kept.map((row) => row.id));
+    return [...kept, ...[...fresh.values()].filter((row) => !known.has(row.id))];
+  };
+};
+
+export default useFleetEvents;